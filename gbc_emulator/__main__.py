@@ -1,8 +1,11 @@
 #!/usr/bin/env python
 
 import argparse
+import os
 import threading
 import sys
+from gbc_emulator.battery import SaveFile
+from gbc_emulator.cartridge import load_rom
 from gbc_emulator.gameboy import Gameboy
 from gbc_emulator.window import do_window
 from gbc_emulator.reporter import do_reporter
@@ -10,6 +13,11 @@ from gbc_emulator.mqtt import Mqtt
 
 parser = argparse.ArgumentParser()
 parser.add_argument('rom')
+parser.add_argument(
+    '--frame-skip',
+    default='auto',
+    help="draw every Nth frame, 0 for none, or auto to keep up with real time"
+)
 args = parser.parse_args()
 
 mqtt = Mqtt("127.0.0.1")
@@ -19,15 +27,24 @@ while not mqtt.connected:
     pass
 
 gameboy = Gameboy(mqtt, attach_debugger=True, bootloader_enabled=False)
-ptr = 0
-with open(args.rom, "rb") as f:
-    byte = f.read(1)
-    while byte:
-        gameboy.memory.cpu_port[ptr] = int.from_bytes(byte, byteorder='little')
-        ptr += 1
-        byte = f.read(1)
+cartridge = load_rom(args.rom)
+gameboy.insert(cartridge)
+
+save = None
+if cartridge.header.battery and cartridge.ram:
+    save = SaveFile(os.path.splitext(args.rom)[0] + '.sav', len(cartridge.ram))
+    cartridge.use_save(save)
+
+gameboy.idle_loops.use_speed_hacks(cartridge.hash)
+
+if args.frame_skip == 'auto':
+    gameboy.frame_skip.auto = True
+else:
+    gameboy.frame_skip.every = int(args.frame_skip)
 
 def done():
+    if save is not None:
+        save.close()
     gameboy.debugger.onecmd("EOF")
     sys.exit()
 
@@ -0,0 +1,78 @@
+"""Battery-backed cartridge RAM, kept in a memory-mapped .sav file.
+
+The file is mapped shared, so every byte the game stores lands in the page
+cache straight away and survives the emulator crashing. Writes mark the
+256 byte page they fall in as dirty, and a background thread flushes the
+dirty pages to disk every interval, coalesced into whole runs of the
+operating system's pages, rather than the whole file.
+"""
+import mmap
+import os
+import threading
+
+DIRTY_PAGE_SIZE = 0x100
+
+# Seconds between flushes of dirty pages
+FLUSH_INTERVAL = 1.0
+
+def open_save(path, size):
+    """Map size bytes of a .sav file, created or extended with zeros as
+    needed."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if os.fstat(fd).st_size < size:
+            os.ftruncate(fd, size)
+        return mmap.mmap(fd, size, access=mmap.ACCESS_WRITE)
+    finally:
+        os.close(fd) # The map keeps its own reference
+
+def flush_ranges(dirty, size):
+    """(start, length) of the runs of operating system pages, up to size
+    bytes, holding dirty pages."""
+    ranges = []
+    for page, flag in enumerate(dirty):
+        if not flag:
+            continue
+        start = (page * DIRTY_PAGE_SIZE) & ~(mmap.PAGESIZE - 1)
+        end = min(size, start + mmap.PAGESIZE)
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+    return [(start, end - start) for start, end in ranges]
+
+class SaveFile:
+    """Cartridge RAM mapped from path. The dirty pages are flushed every
+    interval seconds on a background thread, or only by flush() when
+    interval is None."""
+    def __init__(self, path, size, interval=FLUSH_INTERVAL):
+        self.path = path
+        self.ram = open_save(path, size)
+        self.dirty = bytearray(-(-size // DIRTY_PAGE_SIZE))
+
+        self.stopped = threading.Event()
+        self.thread = None
+        if interval is not None:
+            self.thread = threading.Thread(target=self.run, args=(interval,), daemon=True)
+            self.thread.start()
+
+    def run(self, interval):
+        while not self.stopped.wait(interval):
+            self.flush()
+
+    def flush(self):
+        """Write the dirty pages to disk."""
+        # The flags of a range are cleared just before it is synced, so a
+        # write landing after the clear marks it dirty again for next time,
+        # and one landing before it is in the sync.
+        for start, length in flush_ranges(bytes(self.dirty), len(self.ram)):
+            first = start // DIRTY_PAGE_SIZE
+            last = -(-(start + length) // DIRTY_PAGE_SIZE)
+            self.dirty[first:last] = bytes(last - first)
+            self.ram.flush(start, length)
+
+    def close(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.flush()
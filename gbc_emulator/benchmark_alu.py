@@ -0,0 +1,145 @@
+"""Benchmark the table-driven 8-bit ALU handlers against branchy ones.
+
+Runs each handler over all 65,536 (A, B) pairs, with both carry flag
+settings where the carry matters, checks that A and F come out the same
+and prints the time each took.
+
+    python -m gbc_emulator.benchmark_alu
+"""
+from time import perf_counter
+from gbc_emulator.lr35902 import LR35902
+from gbc_emulator.lr35902 import codegen
+from gbc_emulator.lr35902.instructions import OPCODES
+from gbc_emulator.lr35902.instructions.spec import Opcode
+
+# The ALU bodies computing flags by hand, as they were before the tables
+BRANCHY = {
+    0x80: '''
+v = B
+result = A + v
+F = 0
+if ((A & 0xF) + (v & 0xF)) & 0x10: # Half carry
+    F |= 0x20
+if result & 0x100: # Carry
+    F |= 0x10
+A = result & 0xFF
+if A == 0:
+    F |= 0x80
+''',
+    0x88: '''
+v = B
+carry_bit = (F & 0x10) >> 4
+result = A + v + carry_bit
+F = 0
+if ((A & 0xF) + (v & 0xF) + carry_bit) & 0x10: # Half carry
+    F |= 0x20
+if result & 0x100: # Carry
+    F |= 0x10
+A = result & 0xFF
+if A == 0:
+    F |= 0x80
+''',
+    0x90: '''
+v = B
+F = 0x40
+if (A & 0xF) < (v & 0xF): # Half borrow
+    F |= 0x20
+if A < v: # Borrow
+    F |= 0x10
+A = (A - v) & 0xFF
+if A == 0:
+    F |= 0x80
+''',
+    0x98: '''
+v = B
+carry_bit = (F & 0x10) >> 4
+F = 0x40
+if (A & 0xF) < ((v & 0xF) + carry_bit): # Half borrow
+    F |= 0x20
+if A < (v + carry_bit): # Borrow
+    F |= 0x10
+A = (A - v - carry_bit) & 0xFF
+if A == 0:
+    F |= 0x80
+''',
+    0xA0: '''
+v = B
+A &= v
+F = 0x20 if A else 0xA0
+''',
+    0xA8: '''
+v = B
+A ^= v
+F = 0 if A else 0x80
+''',
+    0xB0: '''
+v = B
+A |= v
+F = 0 if A else 0x80
+''',
+    0xB8: '''
+v = B
+F = 0x40
+if (A & 0xF) < (v & 0xF): # Half borrow
+    F |= 0x20
+if A < v: # Borrow
+    F |= 0x10
+if A == v:
+    F |= 0x80
+''',
+}
+
+def compile_handler(op):
+    name = codegen.handler_name(op.opcode)
+    return codegen.compile_function(name, codegen.handler_source(name, op), codegen.namespace())
+
+def run(handler, cpu, carries):
+    """Run handler over every (A, B) pair, returning the time taken and the
+    resulting (A, F) pairs."""
+    results = []
+    elapsed = 0
+    for carry in carries:
+        for a in range(0x100):
+            start = perf_counter()
+            for b in range(0x100):
+                cpu.A = a
+                cpu.B = b
+                cpu._f = carry
+                handler(cpu)
+            elapsed += perf_counter() - start
+
+            # Collect outside of the timed loop
+            for b in range(0x100):
+                cpu.A = a
+                cpu.B = b
+                cpu._f = carry
+                handler(cpu)
+                results.append((cpu.A, cpu._f))
+    return elapsed, results
+
+def main():
+    cpu = LR35902([0] * 0x10000)
+
+    print("{:<10} {:>10} {:>10} {:>8}".format("Opcode", "Branchy", "Table", "Speedup"))
+    total_branchy = 0
+    total_table = 0
+    for opcode, body in BRANCHY.items():
+        op = OPCODES[opcode]
+        carries = (0x00, 0x10) if op.mnemonic.startswith(('ADC', 'SBC')) else (0x00,)
+
+        branchy_time, branchy_results = run(compile_handler(Opcode(opcode, op.mnemonic, 1, 4, body)), cpu, carries)
+        table_time, table_results = run(compile_handler(op), cpu, carries)
+
+        if branchy_results != table_results:
+            raise RuntimeError("{} results differ".format(op.mnemonic))
+
+        total_branchy += branchy_time
+        total_table += table_time
+        print("{:<10} {:>9.1f}ms {:>9.1f}ms {:>7.2f}x".format(
+            op.mnemonic, branchy_time * 1000, table_time * 1000, branchy_time / table_time))
+
+    print("{:<10} {:>9.1f}ms {:>9.1f}ms {:>7.2f}x".format(
+        "Total", total_branchy * 1000, total_table * 1000, total_branchy / total_table))
+
+if __name__ == '__main__':
+    main()
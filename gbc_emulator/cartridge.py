@@ -0,0 +1,426 @@
+"""Cartridges: the ROM, its header, and the memory bank controllers.
+
+The ROM file is memory-mapped read-only rather than read in, so a ROM costs
+nothing to load however large it is, and instances running the same game
+share one copy in the page cache.
+
+0x0000-0x3FFF always reads bank 0. Switching banks repoints the
+0x4000-0x7FFF pages of the memory map at a memoryview of the selected
+bank, so nothing is copied. Writes to 0x0000-0x7FFF go to the bank
+controller's registers. External RAM at 0xA000-0xBFFF is mapped the same
+way while enabled.
+
+load_rom() also checks the header, and caches it by the ROM's content hash
+so later loads of the same ROM skip parsing and checking it again.
+
+https://gbdev.io/pandocs/MBCs.html
+"""
+import hashlib
+import mmap
+import os
+from gbc_emulator import json_table
+
+# Default ROM metadata cache
+METADATA_CACHE = os.path.join(os.path.expanduser('~'), '.gbc_emulator', 'roms.json')
+
+ROM_BANK_SIZE = 0x4000
+RAM_BANK_SIZE = 0x2000
+
+# External RAM sizes by header code
+RAM_SIZES = {
+    0x00: 0,
+    0x01: 0x800,
+    0x02: 0x2000,
+    0x03: 0x8000,
+    0x04: 0x20000,
+    0x05: 0x10000,
+}
+
+# Cartridge types keeping their RAM with a battery
+BATTERY = (0x03, 0x06, 0x09, 0x0D, 0x0F, 0x10, 0x13, 0x1B, 0x1E)
+
+class Header:
+    """Cartridge header, 0x0100-0x014F."""
+    def __init__(self, rom):
+        self.cgb = rom[0x143] in (0x80, 0xC0)
+        title = bytes(rom[0x134:0x143 if self.cgb else 0x144]) # Last byte is the CGB flag
+        self.title = title.split(b'\0')[0].decode('ascii', 'replace')
+        self.cartridge_type = rom[0x147]
+        self.battery = self.cartridge_type in BATTERY
+        self.rom_size = 0x8000 << rom[0x148]
+        self.ram_size = RAM_SIZES.get(rom[0x149], 0)
+        self.header_checksum = rom[0x14D]
+        self.global_checksum = (rom[0x14E] << 8) | rom[0x14F]
+
+    @classmethod
+    def from_metadata(cls, metadata):
+        """Header from the attributes saved in a metadata cache."""
+        header = cls.__new__(cls)
+        header.__dict__.update(metadata)
+        return header
+
+def header_checksum(rom):
+    """Checksum of 0x0134-0x014C, as the boot ROM checks it."""
+    return (-sum(rom[0x134:0x14D]) - (0x14D - 0x134)) & 0xFF
+
+def global_checksum(rom):
+    """Sum of every byte but the global checksum itself. Not checked by the
+    hardware, and often wrong in homebrew."""
+    return (sum(memoryview(rom)) - rom[0x14E] - rom[0x14F]) & 0xFFFF
+
+class Window:
+    """Buffer indexed by the addresses of a page, at an offset."""
+    def __init__(self, buffer, offset):
+        self.buffer = buffer
+        self.offset = offset
+
+    def __getitem__(self, index):
+        return self.buffer[index + self.offset]
+
+    def __setitem__(self, index, value):
+        self.buffer[index + self.offset] = value
+
+class TrackedWindow(Window):
+    """Window marking the 256 byte pages of buffer written in touched, and
+    in dirty too unless None."""
+    def __init__(self, buffer, offset, touched, dirty=None):
+        super().__init__(buffer, offset)
+        self.touched = touched
+        self.dirty = dirty
+
+    def __setitem__(self, index, value):
+        index += self.offset
+        self.buffer[index] = value
+        self.touched[index >> 8] = 1
+        if self.dirty is not None:
+            self.dirty[index >> 8] = 1
+
+class Unmapped:
+    """Reads 0xFF, ignores writes. Disabled or missing external RAM."""
+    def __getitem__(self, index):
+        return 0xFF
+
+    def __setitem__(self, index, value):
+        pass
+
+class Register:
+    """One byte of buffer seen at every address, like the MBC3 clock."""
+    def __init__(self, buffer, index):
+        self.buffer = buffer
+        self.index = index
+
+    def __getitem__(self, index):
+        return self.buffer[self.index]
+
+    def __setitem__(self, index, value):
+        self.buffer[self.index] = value
+
+class Cartridge:
+    """ROM only cartridge, with up to 8 KB of RAM, and the base of the bank
+    controllers. rom is any buffer, like an mmap, and header its parsed
+    Header if already known."""
+    # Attributes holding the state of the bank controller
+    REGISTERS = ('rom_bank', 'ram_bank', 'ram_enabled')
+
+    # Whether RAM starts enabled. Without a bank controller to switch it,
+    # it always is.
+    RAM_ENABLED = True
+
+    def __init__(self, rom, header=None):
+        if len(rom) < 0x8000 or len(rom) % ROM_BANK_SIZE:
+            # Pad to whole banks. Only tiny test ROMs are copied.
+            padded = bytearray(max(0x8000, -(-len(rom) // ROM_BANK_SIZE) * ROM_BANK_SIZE))
+            padded[:len(rom)] = rom
+            rom = padded
+
+        self.rom = memoryview(rom)
+        self.header = header if header is not None else Header(self.rom)
+        self.hash = None # Content hash, when loaded by load_rom()
+        self.rom_banks = len(rom) // ROM_BANK_SIZE
+        self.ram = bytearray(self.ram_size())
+        self.dirty = None # Pages of RAM written, while kept in a save file
+        self.touched = bytearray(b'\x01' * -(-len(self.ram) // 0x100)) # Since the last snapshot
+        self.ram_banks = max(1, len(self.ram) // RAM_BANK_SIZE)
+
+        # ROM bank at 0x4000-0x7FFF, and RAM bank at 0xA000-0xBFFF
+        self.rom_bank = 1
+        self.ram_bank = 0
+        self.ram_enabled = self.RAM_ENABLED
+
+        self.memory = None
+        self.last_snapshot = None
+
+    def snapshot(self):
+        """State of the bank controller, and RAM as a tuple of 256 byte
+        pages. Only pages written since the last snapshot are copied, the
+        rest are shared with it."""
+        state = {name: getattr(self, name) for name in self.REGISTERS}
+        if self.last_snapshot is not None:
+            pages = list(self.last_snapshot['ram'])
+        else:
+            pages = [None] * len(self.touched) # All touched
+        for page, flag in enumerate(self.touched):
+            if flag:
+                pages[page] = bytes(self.ram[page << 8:(page + 1) << 8])
+        self.touched[:] = bytes(len(self.touched))
+
+        state['ram'] = tuple(pages)
+        self.last_snapshot = state
+        return state
+
+    def restore(self, state):
+        """Put back a state from snapshot(). Only pages written since the
+        last snapshot, or differing between it and state, are compared and
+        copied back, and only those copied are marked dirty in a save
+        file."""
+        for name in self.REGISTERS:
+            setattr(self, name, state[name])
+
+        last = self.last_snapshot['ram'] if self.last_snapshot is not None else None
+        for page, data in enumerate(state['ram']):
+            if last is not None and data is last[page] and not self.touched[page]:
+                continue # Shared, so unchanged
+            start = page << 8
+            if self.ram[start:start + len(data)] != data:
+                self.ram[start:start + len(data)] = data
+                if self.dirty is not None:
+                    self.dirty[page] = 1
+
+        # RAM now holds state, so later snapshots share its pages
+        self.touched[:] = bytes(len(self.touched))
+        self.last_snapshot = state
+
+        self.select_rom(self.rom_bank)
+        self.select_ram(self.ram_enabled, self.ram_bank)
+
+    def ram_size(self):
+        if not self.header.ram_size:
+            return 0
+        return max(RAM_BANK_SIZE, self.header.ram_size) # 2 KB parts fill a bank
+
+    def map(self, memory):
+        """Map the cartridge into a gbc_emulator.memory.Memory."""
+        self.memory = memory
+        memory.map(0x00, 0x40, reads=self.rom)
+        memory.map(0x00, 0x80, writes=self)
+        self.select_rom(self.rom_bank)
+        self.select_ram(self.ram_enabled, self.ram_bank)
+
+    def use_save(self, save):
+        """Keep RAM in a gbc_emulator.battery.SaveFile, of the size of ram."""
+        self.ram = save.ram
+        self.dirty = save.dirty
+        self.touched[:] = b'\x01' * len(self.touched)
+        self.select_ram(self.ram_enabled, self.ram_bank)
+
+    def select_rom(self, bank):
+        self.rom_bank = bank % self.rom_banks
+        if self.memory is None:
+            return
+
+        if self.rom_bank:
+            # Sliced one bank early, so it is indexed by address
+            start = (self.rom_bank - 1) * ROM_BANK_SIZE
+            window = self.rom[start:start + 2 * ROM_BANK_SIZE]
+        else:
+            window = Window(self.rom, -ROM_BANK_SIZE)
+        self.memory.map(0x40, 0x80, reads=window)
+
+    def select_ram(self, enabled, bank):
+        self.ram_enabled = enabled
+        self.ram_bank = bank % self.ram_banks
+        if self.memory is None:
+            return
+
+        window = self.ram_window() if enabled else Unmapped()
+        self.memory.map(0xA0, 0xC0, reads=window, writes=window)
+
+    def ram_window(self):
+        if not self.ram:
+            return Unmapped()
+        offset = self.ram_bank * RAM_BANK_SIZE - 0xA000
+        return TrackedWindow(self.ram, offset, self.touched, self.dirty)
+
+    def __setitem__(self, address, value):
+        pass # No registers
+
+class MBC1(Cartridge):
+    """Up to 2 MB of ROM and 32 KB of RAM."""
+    RAM_ENABLED = False
+    REGISTERS = Cartridge.REGISTERS + ('low', 'high', 'mode')
+
+    def __init__(self, rom, header=None):
+        super().__init__(rom, header)
+        self.low = 1 # Lower 5 bits of the ROM bank
+        self.high = 0 # Upper 2 bits of the ROM bank, or the RAM bank
+        self.mode = 0 # 1 banks RAM with high
+
+    def __setitem__(self, address, value):
+        if address < 0x2000:
+            self.select_ram((value & 0x0F) == 0x0A, self.ram_bank)
+        elif address < 0x4000:
+            self.low = (value & 0x1F) or 1
+            self.select_rom((self.high << 5) | self.low)
+        elif address < 0x6000:
+            self.high = value & 0x03
+            self.select_rom((self.high << 5) | self.low)
+            self.select_ram(self.ram_enabled, self.high if self.mode else 0)
+        else:
+            self.mode = value & 0x01
+            self.select_ram(self.ram_enabled, self.high if self.mode else 0)
+
+class NibbleRAM:
+    """MBC2's 512 x 4 bits of RAM, repeated through 0xA000-0xBFFF."""
+    def __init__(self, ram, touched, dirty):
+        self.ram = ram
+        self.touched = touched
+        self.dirty = dirty
+
+    def __getitem__(self, index):
+        return self.ram[index & 0x1FF] | 0xF0
+
+    def __setitem__(self, index, value):
+        self.ram[index & 0x1FF] = value & 0x0F
+        self.touched[(index & 0x1FF) >> 8] = 1
+        if self.dirty is not None:
+            self.dirty[(index & 0x1FF) >> 8] = 1
+
+class MBC2(Cartridge):
+    """Up to 256 KB of ROM, with RAM built in."""
+    RAM_ENABLED = False
+
+    def ram_size(self):
+        return 0x200
+
+    def ram_window(self):
+        return NibbleRAM(self.ram, self.touched, self.dirty)
+
+    def __setitem__(self, address, value):
+        if address >= 0x4000:
+            return
+        if address & 0x0100:
+            self.select_rom((value & 0x0F) or 1)
+        else:
+            self.select_ram((value & 0x0F) == 0x0A, 0)
+
+class MBC3(Cartridge):
+    """Up to 2 MB of ROM, 32 KB of RAM and a clock.
+
+    The clock registers, selected in place of a RAM bank, can be read and
+    written, but do not count yet, so latching them does nothing."""
+    RAM_ENABLED = False
+    REGISTERS = Cartridge.REGISTERS + ('register',)
+
+    def __init__(self, rom, header=None):
+        super().__init__(rom, header)
+        self.clock = bytearray(5) # Seconds, minutes, hours, day low, day high
+        self.register = None # Clock register selected in place of RAM
+
+    def snapshot(self):
+        state = super().snapshot()
+        state['clock'] = bytes(self.clock)
+        return state
+
+    def restore(self, state):
+        self.clock[:] = state['clock']
+        super().restore(state)
+
+    def ram_window(self):
+        if self.register is not None:
+            return Register(self.clock, self.register)
+        return super().ram_window()
+
+    def __setitem__(self, address, value):
+        if address < 0x2000:
+            self.select_ram((value & 0x0F) == 0x0A, self.ram_bank)
+        elif address < 0x4000:
+            self.select_rom((value & 0x7F) or 1)
+        elif address < 0x6000:
+            self.register = value - 0x08 if 0x08 <= value <= 0x0C else None
+            self.select_ram(self.ram_enabled, self.ram_bank if self.register is not None else value & 0x03)
+
+class MBC5(Cartridge):
+    """Up to 8 MB of ROM and 128 KB of RAM. Bank 0 can be selected at
+    0x4000-0x7FFF too."""
+    RAM_ENABLED = False
+
+    def __setitem__(self, address, value):
+        if address < 0x2000:
+            self.select_ram((value & 0x0F) == 0x0A, self.ram_bank)
+        elif address < 0x3000:
+            self.select_rom((self.rom_bank & 0x100) | value)
+        elif address < 0x4000:
+            self.select_rom(((value & 0x01) << 8) | (self.rom_bank & 0xFF))
+        elif address < 0x6000:
+            self.select_ram(self.ram_enabled, value & 0x0F)
+
+# Cartridge class by header cartridge type
+CARTRIDGE_TYPES = {
+    0x00: Cartridge, # ROM
+    0x01: MBC1,
+    0x02: MBC1, # +RAM
+    0x03: MBC1, # +RAM+BATTERY
+    0x05: MBC2,
+    0x06: MBC2, # +BATTERY
+    0x08: Cartridge, # ROM+RAM
+    0x09: Cartridge, # ROM+RAM+BATTERY
+    0x0F: MBC3, # +TIMER+BATTERY
+    0x10: MBC3, # +TIMER+RAM+BATTERY
+    0x11: MBC3,
+    0x12: MBC3, # +RAM
+    0x13: MBC3, # +RAM+BATTERY
+    0x19: MBC5,
+    0x1A: MBC5, # +RAM
+    0x1B: MBC5, # +RAM+BATTERY
+    0x1C: MBC5, # +RUMBLE
+    0x1D: MBC5, # +RUMBLE+RAM
+    0x1E: MBC5, # +RUMBLE+RAM+BATTERY
+}
+
+def cartridge(rom, header=None):
+    """Cartridge for a ROM image, by its header."""
+    if header is not None:
+        cartridge_type = header.cartridge_type
+    else:
+        cartridge_type = rom[0x147] if len(rom) > 0x147 else 0x00
+    if cartridge_type not in CARTRIDGE_TYPES:
+        raise RuntimeError("Unsupported cartridge type 0x{:02X}".format(cartridge_type))
+    return CARTRIDGE_TYPES[cartridge_type](rom, header)
+
+def open_rom(path):
+    """Map a ROM file read-only."""
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def load_metadata(path, rom_hash):
+    """Header attributes cached for a ROM, or None."""
+    return json_table.load_table(path).get(rom_hash)
+
+def save_metadata(path, rom_hash, metadata):
+    json_table.save_entry(path, rom_hash, metadata)
+
+def load_rom(path, cache=METADATA_CACHE):
+    """Cartridge for a ROM file, mapped rather than read. The header is
+    checked and parsed once per ROM, then taken from the metadata cache at
+    cache, if given, by the SHA-1 of the ROM."""
+    rom = open_rom(path)
+    rom_hash = hashlib.sha1(rom).hexdigest()
+
+    metadata = load_metadata(cache, rom_hash) if cache is not None else None
+    if metadata is not None:
+        header = Header.from_metadata(metadata)
+    else:
+        if len(rom) < 0x150:
+            raise RuntimeError("{} is too short to be a ROM".format(path))
+
+        header = Header(rom)
+        if header_checksum(rom) != header.header_checksum:
+            raise RuntimeError("{} has a bad header checksum".format(path))
+        header.global_checksum_valid = global_checksum(rom) == header.global_checksum
+
+        if cache is not None:
+            save_metadata(cache, rom_hash, vars(header))
+
+    loaded = cartridge(rom, header)
+    loaded.hash = rom_hash
+    return loaded
@@ -0,0 +1,43 @@
+"""Frame skipping, with a governor choosing how many frames to skip.
+
+Every frame is still emulated, so timing, interrupts and game logic are
+untouched. Only drawing is skipped, which the PPU does a line at a time and
+is much of the cost of a frame. When emulation falls behind real time, the
+governor draws fewer frames, and when there is time to spare, more again.
+"""
+
+# Most frames skipped per frame drawn by the governor
+MAX_SKIP = 9
+
+# Share of full speed below which the governor skips more frames
+BEHIND = 0.98
+
+# Share of real time spent emulating below which it skips fewer
+HEADROOM = 0.75
+
+class FrameSkip:
+    """Draw every every-th frame, or none at 0. With auto set, every is
+    governed by how fast emulation keeps up."""
+    def __init__(self, every=1, auto=False):
+        self.every = every
+        self.auto = auto
+        self.frames = 0 # Frames started
+        self.drawn = 0 # Frames drawn in full
+
+    def next_frame(self, drawn):
+        """Count a frame, drawn or not, ending. Returns whether to draw the
+        next one."""
+        self.drawn += drawn
+        self.frames += 1
+        return bool(self.every) and self.frames % self.every == 0
+
+    def govern(self, speed, load):
+        """Adjust every from speed, as a share of full speed, and load, the
+        share of real time spent emulating rather than waiting."""
+        if not self.auto:
+            return
+
+        if speed < BEHIND:
+            self.every = min(self.every + 1, MAX_SKIP + 1)
+        elif load < HEADROOM:
+            self.every = max(self.every - 1, 1)
@@ -1,60 +1,204 @@
 from time import time, sleep
 from gbc_emulator.lr35902 import LR35902
+from gbc_emulator.lr35902.translator import BlockCache
 from gbc_emulator.memory import Memory
 from gbc_emulator.debugger import Debugger
 from gbc_emulator.timer import Timer
+from gbc_emulator.frame_skip import FrameSkip
 from gbc_emulator.ppu import PPU
+from gbc_emulator.idle_loops import IdleLoops
+from gbc_emulator.scheduler import Scheduler
+from gbc_emulator.snapshot import Snapshot
+
+# State the bootloader leaves behind, applied when it is skipped.
+# https://gbdev.io/pandocs/Power_Up_Sequence.html
+POST_BOOT_REGISTERS = {
+    'A': 0x01, 'F': 0xB0,
+    'B': 0x00, 'C': 0x13,
+    'D': 0x00, 'E': 0xD8,
+    'H': 0x01, 'L': 0x4D,
+    'SP': 0xFFFE,
+    'PC': 0x0100,
+}
+POST_BOOT_IO = bytearray(0x80)
+POST_BOOT_IO[0x00] = 0xCF # P1
+POST_BOOT_IO[0x02] = 0x7E # SC
+POST_BOOT_IO[0x04] = 0xAB # DIV
+POST_BOOT_IO[0x07] = 0xF8 # TAC
+POST_BOOT_IO[0x0F] = 0xE1 # IF
+POST_BOOT_IO[0x10:0x27] = bytes((
+    0x80, 0xBF, 0xF3, 0xFF, 0xBF, 0xFF, 0x3F, 0x00, 0xFF, 0xBF, 0x7F, 0xFF,
+    0x9F, 0xFF, 0xBF, 0xFF, 0xFF, 0x00, 0x00, 0xBF, 0x77, 0xF3, 0xF1,
+)) # Sound
+POST_BOOT_IO[0x40] = 0x91 # LCDC
+POST_BOOT_IO[0x41] = 0x85 # STAT
+POST_BOOT_IO[0x46] = 0xFF # DMA
+POST_BOOT_IO[0x47] = 0xFC # BGP
+POST_BOOT_IO[0x50] = 0x01 # Bootloader disabled
+
+# Where the PPU is as the bootloader hands over: in VBLANK, on its last line,
+# which LY already reads as 0, so STAT above shows a match with LYC. Taken
+# as the start of the line.
+POST_BOOT_PPU = (PPU.MODE_VBLANK, PPU.VBLANK_LINE + 9, 9 * PPU.LINE_DOTS)
 
 class Gameboy:
     CLOCK_PERIOD = 1 / 1048576
     CLOCKS_PER_CHECK = 10485 # 10 ms
+    CYCLES_PER_SLICE = 16 # Longest the peripherals lag behind the CPU
+    BLOCK_CACHE_SIZE = 4096 # Translated blocks kept
 
     def __init__(self, pubsub, attach_debugger=False, bootloader_enabled=True):
         self.memory = Memory(pubsub)
-        self.cpu = LR35902(self.memory.cpu_port, pubsub)
-        self.timer = Timer(self.memory.timer_port)
-        self.ppu = PPU(self.memory.ppu_port)
-        self.rate = 0
+        self.cpu = LR35902(
+            self.memory.cpu_port,
+            pubsub,
+            blocks=BlockCache(Gameboy.BLOCK_CACHE_SIZE, self.memory),
+            lazy_flags=True
+        )
+        self.scheduler = Scheduler()
+        self.memory.scheduler = self.scheduler
+        self.timer = Timer(self.memory.timer_port, self.scheduler)
+        self.memory.attach_timer(self.timer.sync, self.timer.schedule_overflow, self.timer.peek)
+        self.ppu = PPU(self.memory.ppu_port, self.scheduler)
+        self.ppu.frame_done = self.frame_done
+        self.frame_skip = FrameSkip()
+        self.idle_loops = IdleLoops(self)
+        self.cartridge = None
+        self.rate = 0 # Machine cycles per second
+        self.load = 0 # Share of real time spent emulating
         self.clocks = 0
+        self.debugger = None
 
         if attach_debugger:
             self.debugger = Debugger(self)
 
+        # The bootloader is mapped over the cartridge once one is inserted
+        self.bootloader_enabled = bootloader_enabled
+        self.memory.bootloader_unmapped = self.bootloader_unmapped
         if not bootloader_enabled:
-            # Disable bootloader and skip it.
-            self.memory.cpu_port[Memory.REGISTER_BOOTLOADER_DISABLED] = 0xFF
-            self.cpu.PC = 0x100
+            self.skip_boot()
 
         self.running = False
 
+    def skip_boot(self):
+        """Put the CPU, I/O registers, timer and PPU straight into the state
+        the bootloader leaves them in."""
+        for register, value in POST_BOOT_REGISTERS.items():
+            setattr(self.cpu, register, value)
+        self.memory.io[:] = POST_BOOT_IO
+        self.memory.unmap_bootloader()
+        self.cpu.update_interrupts()
+
+        # Both count on from the registers above, dropping the time passed
+        self.timer.restart()
+        self.ppu.restart(*POST_BOOT_PPU)
+
+    def bootloader_unmapped(self):
+        if self.cpu.blocks is not None:
+            self.cpu.blocks.clear() # Translated from the bootloader
+
+    def insert(self, cartridge):
+        """Map a gbc_emulator.cartridge.Cartridge into memory, under the
+        bootloader if it is enabled and has not run yet."""
+        self.cartridge = cartridge
+        cartridge.map(self.memory)
+        if self.bootloader_enabled and not self.memory.cpu_port[Memory.REGISTER_BOOTLOADER_DISABLED]:
+            self.memory.map_bootloader()
+
+        blocks = self.cpu.blocks
+        if blocks is not None:
+            # ROM can no longer be written, only switched
+            blocks.clear()
+            blocks.watch_rom = False
+            blocks.rom_bank = lambda: cartridge.rom_bank
+
+    def frame_done(self):
+        if self.rate: # Measured by run()
+            self.frame_skip.govern(self.rate * Gameboy.CLOCK_PERIOD, self.load)
+        self.ppu.drawing = self.frame_skip.next_frame(self.ppu.drawing)
+
+    def snapshot(self):
+        """A gbc_emulator.snapshot.Snapshot of the whole machine."""
+        return Snapshot(self)
+
+    def restore(self, snapshot):
+        snapshot.restore(self)
+
     def cycle(self):
-        self.ppu.clock()
-        self.ppu.clock()
-        self.ppu.clock()
-        self.ppu.clock()
-        self.timer.clock()
+        self.scheduler.advance(1) # Peripherals wake up for their own events
 
         return self.cpu.clock()
 
+    def cycles_until_interrupt(self):
+        """Number of machine cycles until the PPU or the Timer next request an
+        interrupt."""
+        cycles = -(-self.ppu.dots_until_vblank() // 4)
+
+        timer_cycles = self.timer.cycles_until_overflow()
+        if timer_cycles is not None:
+            cycles = min(cycles, timer_cycles)
+
+        return cycles
+
+    def cycles_until_event(self):
+        """Number of machine cycles until an interrupt request or a
+        scheduled event that can not be skipped."""
+        cycles = self.cycles_until_interrupt()
+
+        event_cycles = self.scheduler.cycles_until_next(skippable=False)
+        if event_cycles is not None:
+            cycles = min(cycles, event_cycles)
+
+        return cycles
+
+    def run_cycles(self, budget):
+        """Run the CPU for at least budget machine cycles, then move the
+        scheduler on. The peripherals only do work at their own events.
+
+        While the CPU is halted nothing happens until an interrupt is
+        requested, so the whole wait is skipped in one go. Likewise for passes
+        of an idle loop until the value it polls can change.
+
+        Returns the number of machine cycles consumed.
+        """
+        if self.cpu.state == LR35902.State.HALTED and not self.cpu.interrupt_requested():
+            budget = max(budget, self.cycles_until_event())
+        else:
+            # Stop for the next event. At least one instruction still runs.
+            event_cycles = self.scheduler.cycles_until_next()
+            if event_cycles is not None:
+                budget = min(budget, event_cycles)
+
+        cycles = self.idle_loops.skip()
+        if not cycles:
+            cycles = self.cpu.run_cycles(budget)
+
+        self.scheduler.advance(cycles)
+
+        return cycles
+
     def run(self):
         last_time = time()
+        busy = 0 # Time spent emulating since last_time
         self.running = True
         while self.running:
             now = time()
             if (
                     self.clocks < Gameboy.CLOCKS_PER_CHECK or
-                    now >= (last_time + (Gameboy.CLOCK_PERIOD * Gameboy.CLOCKS_PER_CHECK))
+                    now >= (last_time + (Gameboy.CLOCK_PERIOD * self.clocks))
                 ):
-                self.clocks += 1
                 if self.clocks >= Gameboy.CLOCKS_PER_CHECK:
+                    self.rate = 0.5 * self.rate + 0.5 * (self.clocks / (now - last_time))
+                    self.load = 0.5 * self.load + 0.5 * (busy / (now - last_time))
                     self.clocks = 0
-                    self.rate = 0.5 * self.rate + 0.5 * (Gameboy.CLOCKS_PER_CHECK / (now - last_time))
+                    busy = 0
                     last_time = now
 
-                cpu_result = self.cycle()
+                self.clocks += self.run_cycles(Gameboy.CYCLES_PER_SLICE)
+                busy += time() - now
 
                 if self.debugger:
-                    if cpu_result == LR35902.BREAKPOINT_HIT:
+                    if self.cpu.breakpoint_hit:
                         self.running = False
 
                     if self.debugger.stop:
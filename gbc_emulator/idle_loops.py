@@ -0,0 +1,226 @@
+"""Idle loop detection.
+
+Games often wait for something by spinning on a short loop, polling LY, DIV
+or a flag in RAM set by an interrupt handler:
+
+    loop: LDH A,(0x44)
+          CP 0x90
+          JR NZ,loop
+
+An idle loop only reads memory, and leaves every register as it found it, so
+each pass is the same as the last until one of the values it polls changes.
+Rather than emulating the passes, the Gameboy can skip whole passes at a
+time up to the next event that could change a polled value.
+
+Loops are checked when the CPU starts two slices in a row at the same PC.
+Confirmed loops are saved to a speed hack table keyed by ROM hash, so later
+runs of the same ROM skip them from the first pass.
+"""
+import os
+from gbc_emulator import json_table
+from gbc_emulator.lr35902 import LR35902
+from gbc_emulator.lr35902.instructions import OPCODES
+from gbc_emulator.lr35902.instructions.spec import CB
+from gbc_emulator.lr35902.translator import SIDE_EFFECTS
+from gbc_emulator.memory import Memory
+
+# Longest loop checked, in instructions
+MAX_LOOP_LENGTH = 8
+
+# Passes in a row found changing the registers before a new loop is given up
+# on. A polling loop sees one after each change to the polled value, a
+# counting loop sees nothing else.
+MAX_UNSTEADY_PASSES = 4
+
+# Default speed hack table
+SPEED_HACKS = os.path.join(os.path.expanduser('~'), '.gbc_emulator', 'speed_hacks.json')
+
+# Registers an idle loop leaves as it found them
+REGISTERS = ('A', 'B', 'C', 'D', 'E', 'F', 'H', 'L', 'SP', 'PC')
+
+def load_speed_hacks(path, rom_hash):
+    """Loop keys saved for a ROM."""
+    return set(tuple(key) for key in json_table.load_table(path).get(rom_hash, ()))
+
+def save_speed_hacks(path, rom_hash, keys):
+    """Replace the loop keys saved for a ROM."""
+    json_table.save_entry(path, rom_hash, sorted(list(key) for key in keys))
+
+class ReadRecorder:
+    """Memory stand-in recording the values read. Writes are refused."""
+    def __init__(self, memory):
+        self.memory = memory
+        self.reads = {}
+
+    def __getitem__(self, index):
+        value = self.memory[index]
+        self.reads[index] = value
+        return value
+
+    def __setitem__(self, index, value):
+        raise RuntimeError("Idle loop wrote to 0x{:04X}".format(index))
+
+class IdleLoops:
+    def __init__(self, gameboy):
+        self.gameboy = gameboy
+
+        # Loop keys (bank, PC) known to be idle, and known not to be
+        self.confirmed = set()
+        self.rejected = set()
+
+        # Last pass checked of each loop, as the registers it started with,
+        # the cycles it took and the values it read. Any pass starting with
+        # the same registers that reads the same values is the same pass.
+        self.passes = {}
+        self.unsteady = {}
+
+        # Speed hack table to save confirmed loops to
+        self.path = None
+        self.rom_hash = None
+
+        self.last_pc = None
+
+    def use_speed_hacks(self, rom_hash, path=SPEED_HACKS):
+        """Apply the loops saved for a ROM, and save newly confirmed ones."""
+        self.path = path
+        self.rom_hash = rom_hash
+        self.confirmed |= load_speed_hacks(path, rom_hash)
+
+    def key(self, pc):
+        cpu = self.gameboy.cpu
+        bank = cpu.blocks.rom_bank() if cpu.blocks is not None and 0x4000 <= pc < 0x8000 else 0
+        return (bank, pc)
+
+    def iteration(self):
+        """Run one pass of the loop at PC against a recording memory, and put
+        the CPU back. Returns the machine cycles per pass, the values read, by
+        address, and whether the pass left the registers as it found them.
+        Returns None if this is not an idle loop at all."""
+        cpu = self.gameboy.cpu
+        memory = cpu.memory
+        head = cpu.PC
+
+        registers = [getattr(cpu, register) for register in REGISTERS]
+        saved = (cpu._f, cpu.pending_flags)
+
+        recorder = ReadRecorder(memory)
+        cycles = 0
+        cpu.memory = recorder
+        try:
+            for _ in range(MAX_LOOP_LENGTH):
+                opcode = recorder[cpu.PC]
+                if opcode == 0xCB:
+                    opcode = CB | recorder[(cpu.PC + 1) & 0xFFFF]
+                if OPCODES[opcode] is None or SIDE_EFFECTS[opcode]:
+                    return None
+
+                cycles += cpu.handlers[opcode](cpu)
+                if cpu.PC == head:
+                    break
+            else:
+                return None # Too long, or not a loop
+
+            # Otherwise the pass depends on the one before it, because it
+            # counts or because a polled value just changed.
+            steady = [getattr(cpu, register) for register in REGISTERS] == registers
+        finally:
+            cpu.memory = memory
+            for register, value in zip(REGISTERS, registers):
+                setattr(cpu, register, value)
+            cpu._f, cpu.pending_flags = saved
+
+        return cycles, recorder.reads, steady
+
+    def cycles_until_change(self, address):
+        """Number of machine cycles until a peripheral could change an I/O
+        register, or None if that can not be told."""
+        gameboy = self.gameboy
+        if address == Memory.REGISTER_LY:
+            return -(-gameboy.ppu.dots_until_line_change() // 4)
+        if address == Memory.REGISTER_STAT:
+            return -(-gameboy.ppu.dots_until_transition() // 4)
+        if address == Memory.REGISTER_DIV:
+            cycles = gameboy.timer.cycles_until_divider_tick()
+        elif address == Memory.REGISTER_TIMA:
+            cycles = gameboy.timer.cycles_until_counter_tick()
+        else:
+            return None
+
+        # Stopped, so only the CPU can change it
+        if cycles is None:
+            cycles = gameboy.cycles_until_interrupt()
+        return cycles
+
+    def skip(self):
+        """Number of machine cycles of idle loop at PC that can be skipped,
+        in whole passes, or 0."""
+        cpu = self.gameboy.cpu
+        pc = cpu.PC
+
+        # Look at loops the CPU is seen spinning on
+        repeated = pc == self.last_pc
+        self.last_pc = pc
+
+        if (
+                cpu.state != LR35902.State.RUNNING or
+                cpu.wait or
+                cpu.interrupts["change_in"] or
+                cpu.verbose or
+                (cpu.debugger and cpu.debugger.breakpoints) or
+                cpu.interrupt_requested()
+            ):
+            return 0
+
+        key = self.key(pc)
+        if key in self.rejected or not (repeated or key in self.confirmed):
+            return 0
+
+        registers = [getattr(cpu, register) for register in REGISTERS]
+        memory = cpu.memory
+        known = self.passes.get(key)
+        if (
+                known is not None and
+                known[0] == registers and
+                all(memory[address] == value for address, value in known[2].items())
+            ):
+            cycles, reads = known[1:]
+        else:
+            loop = self.iteration()
+            if loop is None:
+                self.passes.pop(key, None)
+                if key not in self.confirmed:
+                    self.rejected.add(key)
+                return 0
+
+            cycles, reads, steady = loop
+            if not steady:
+                self.passes.pop(key, None)
+                self.unsteady[key] = self.unsteady.get(key, 0) + 1
+                if self.unsteady[key] >= MAX_UNSTEADY_PASSES and key not in self.confirmed:
+                    self.rejected.add(key)
+                return 0
+            self.passes[key] = (registers, cycles, reads)
+            self.unsteady.pop(key, None)
+
+        # Nothing but the CPU, in an interrupt handler, changes memory other
+        # than the I/O registers, short of a scheduled event like the end of
+        # an OAM DMA.
+        skip = self.gameboy.cycles_until_event()
+        for address in reads:
+            if not 0xFF00 <= address < 0xFF80 or address == Memory.REGISTER_IF:
+                continue
+
+            change = self.cycles_until_change(address)
+            if change is None:
+                if key not in self.confirmed:
+                    self.rejected.add(key)
+                return 0
+            skip = min(skip, change)
+
+        if key not in self.confirmed:
+            self.confirmed.add(key)
+            if self.rom_hash is not None:
+                save_speed_hacks(self.path, self.rom_hash, self.confirmed)
+
+        # Whole passes, up to and including the one that sees the change
+        return -(-skip // cycles) * cycles
@@ -0,0 +1,34 @@
+"""JSON files holding a table of entries keyed by ROM hash, like the ROM
+metadata cache and the speed hack table.
+
+Tables are replaced whole rather than rewritten in place, so a crash or a
+second instance never leaves one half written.
+"""
+import json
+import os
+import tempfile
+
+def load_table(path):
+    """The table in path, or an empty one if missing or unreadable."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_entry(path, key, value):
+    """Set one entry of the table in path. The table is written to a
+    temporary file in the same directory, then moved over path."""
+    table = load_table(path)
+    table[key] = value
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', dir=directory or '.', delete=False) as f:
+        try:
+            json.dump(table, f, indent=2, sort_keys=True)
+        except BaseException:
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
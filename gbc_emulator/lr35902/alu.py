@@ -0,0 +1,121 @@
+"""Precomputed 8-bit ALU tables.
+
+Every 8-bit ADD/ADC and SUB/SBC/CP result and its flags are looked up from
+a pair of tables built once, indexed by (carry << 16) | (A << 8) | operand,
+instead of working out the half carry and carry with branches. The tables
+are lists of small ints, which CPython shares, so a lookup does not allocate.
+AND, OR and XOR only set Z, so those are left as a single expression.
+
+The opcode spec writes these operations as ALU_* statements, for example
+A = ALU_ADD(A, v, carry). They are expanded into a table lookup, or with
+lazy flags into the plain arithmetic and a pending flags tuple (see
+gbc_emulator.lr35902.flags).
+"""
+import re
+
+ALU_STATEMENT = re.compile(r'^([ \t]*)(?:(\w+) = )?ALU_(\w+)\((.*)\)[ \t]*$', re.MULTILINE)
+
+# Tables, built on first use
+_tables = None
+
+def add_flags(a, v, carry):
+    result = a + v + carry
+    f = 0 if result & 0xFF else 0x80
+    if ((a & 0xF) + (v & 0xF) + carry) > 0xF: # Half carry
+        f |= 0x20
+    if result > 0xFF: # Carry
+        f |= 0x10
+    return f
+
+def sub_flags(a, v, carry):
+    result = a - v - carry
+    f = 0x40 if result & 0xFF else 0xC0
+    if (a & 0xF) < ((v & 0xF) + carry): # Half borrow
+        f |= 0x20
+    if result < 0: # Borrow
+        f |= 0x10
+    return f
+
+def build():
+    indices = [(carry, a, v) for carry in (0, 1) for a in range(0x100) for v in range(0x100)]
+    return {
+        'ADD_RESULTS': [(a + v + carry) & 0xFF for carry, a, v in indices],
+        'ADD_FLAGS': [add_flags(a, v, carry) for carry, a, v in indices],
+        'SUB_RESULTS': [(a - v - carry) & 0xFF for carry, a, v in indices],
+        'SUB_FLAGS': [sub_flags(a, v, carry) for carry, a, v in indices],
+    }
+
+def tables():
+    """Table name to list, for the namespace of generated code."""
+    global _tables
+    if _tables is None:
+        _tables = build()
+    return _tables
+
+# Plain arithmetic for each operation, and its kind of lazy flags
+ARITHMETIC = {
+    'ADD': ('{a} + {v}', 'LAZY_ADD'),
+    'SUB': ('{a} - {v}', 'LAZY_SUB'),
+    'AND': ('{a} & {v}', 'LAZY_AND'),
+    'OR': ('{a} | {v}', 'LAZY_OR'),
+    'XOR': ('{a} ^ {v}', 'LAZY_OR'),
+}
+
+# F for a nonzero and a zero result of each logic operation
+LOGIC_FLAGS = {
+    'AND': (0x20, 0xA0),
+    'OR': (0, 0x80),
+    'XOR': (0, 0x80),
+}
+
+def expand(target, kind, arguments, lazy_flags):
+    """Statements for target = ALU_<kind>(a, v[, carry]). Without a target
+    only the flags are set."""
+    a, v = arguments[:2]
+    carry = arguments[2] if len(arguments) > 2 else None
+
+    if lazy_flags:
+        expression, lazy_kind = ARITHMETIC[kind]
+        expression = expression.format(a=a, v=v)
+        if carry:
+            expression += (' + ' if kind == 'ADD' else ' - ') + '({})'.format(carry)
+
+        if kind in ('ADD', 'SUB'):
+            lines = [
+                'result = {}'.format(expression),
+                'FL = ({}, {}, {}, result)'.format(lazy_kind, a, v),
+            ]
+            if target:
+                lines.append('{} = result & 0xFF'.format(target))
+        else:
+            lines = [
+                '{} = {}'.format(target, expression),
+                'FL = ({}, 0, 0, {})'.format(lazy_kind, target),
+            ]
+        return lines
+
+    if kind in LOGIC_FLAGS:
+        nonzero, zero = LOGIC_FLAGS[kind]
+        return [
+            '{} = {}'.format(target, ARITHMETIC[kind][0].format(a=a, v=v)),
+            'F = 0x{:02X} if {} else 0x{:02X}'.format(nonzero, target, zero),
+        ]
+
+    index = '({} << 8) | {}'.format(a, v)
+    if carry:
+        index = '(({}) << 16) | {}'.format(carry, index)
+    if not target:
+        return ['F = {}_FLAGS[{}]'.format(kind, index)]
+    return [
+        'i = {}'.format(index),
+        'F = {}_FLAGS[i]'.format(kind),
+        '{} = {}_RESULTS[i]'.format(target, kind),
+    ]
+
+def expand_statements(body, lazy_flags):
+    """Replace the ALU_* statements of a body with real code."""
+    def replace(match):
+        indentation, target, kind, arguments = match.groups()
+        arguments = [argument.strip() for argument in arguments.split(',')]
+        return '\n'.join(indentation + line for line in expand(target, kind, arguments, lazy_flags))
+    return ALU_STATEMENT.sub(replace, body)
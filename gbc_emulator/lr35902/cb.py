@@ -0,0 +1,80 @@
+"""Precomputed tables for the 0xCB page rotates, shifts, SWAP and BIT.
+
+Each operation has a 256 entry result table and a matching flags table,
+indexed by the operand. RL and RR shift the old carry in, so theirs have
+512 entries indexed by (carry << 8) | operand. BIT has one table of Z and H
+for all eight bits, indexed by (bit << 8) | operand.
+
+The opcode spec writes these operations as CB_* statements, for example
+v = CB_RLC(v) or CB_BIT(3, v), which are expanded into the lookups. They set
+F directly even with lazy flags, as a lookup is no more work than saving
+the operands for later.
+"""
+import re
+
+CB_STATEMENT = re.compile(r'^([ \t]*)(?:(\w+) = )?CB_(\w+)\((.*)\)[ \t]*$', re.MULTILINE)
+
+# Tables, built on first use
+_tables = None
+
+# GBCPUman.pdf pages 94 & 101-107
+# Each operation's result and the bit shifted out into carry, from the
+# operand and the old carry.
+OPERATIONS = {
+    'RLC': lambda v, carry: (((v << 1) & 0xFF) | (v >> 7), v >> 7),
+    'RRC': lambda v, carry: ((v >> 1) | ((v & 0x01) << 7), v & 0x01),
+    'RL': lambda v, carry: (((v << 1) & 0xFF) | carry, v >> 7),
+    'RR': lambda v, carry: ((v >> 1) | (carry << 7), v & 0x01),
+    'SLA': lambda v, carry: ((v << 1) & 0xFF, v >> 7),
+    'SRA': lambda v, carry: ((v & 0x80) | (v >> 1), v & 0x01),
+    'SRL': lambda v, carry: (v >> 1, v & 0x01),
+    'SWAP': lambda v, carry: (((v & 0x0F) << 4) | (v >> 4), 0),
+}
+
+# Operations taking the old carry
+CARRY_IN = ('RL', 'RR')
+
+def build():
+    tables = {}
+    for kind, operation in OPERATIONS.items():
+        carries = (0, 1) if kind in CARRY_IN else (0,)
+        entries = [operation(v, carry) for carry in carries for v in range(0x100)]
+        tables[kind + '_RESULTS'] = [result for result, _ in entries]
+        tables[kind + '_FLAGS'] = [(carry << 4) | (0 if result else 0x80) for result, carry in entries]
+
+    # GBCPUman.pdf page 108
+    tables['BIT_FLAGS'] = [0x20 if v & (1 << bit) else 0xA0 for bit in range(8) for v in range(0x100)]
+    return tables
+
+def tables():
+    """Table name to list, for the namespace of generated code."""
+    global _tables
+    if _tables is None:
+        _tables = build()
+    return _tables
+
+def expand(target, kind, arguments):
+    """Statements for target = CB_<kind>(v[, carry]), or CB_BIT(bit, v)."""
+    if kind == 'BIT':
+        bit, v = arguments
+        return ['F = (F & 0x10) | BIT_FLAGS[({} << 8) | {}]'.format(bit, v)]
+
+    v = arguments[0]
+    if kind in CARRY_IN:
+        return [
+            'i = ({} << 8) | {}'.format(arguments[1], v),
+            'F = {}_FLAGS[i]'.format(kind),
+            '{} = {}_RESULTS[i]'.format(target, kind),
+        ]
+    return [
+        'F = {}_FLAGS[{}]'.format(kind, v),
+        '{} = {}_RESULTS[{}]'.format(target, kind, v),
+    ]
+
+def expand_statements(body):
+    """Replace the CB_* statements of a body with real code."""
+    def replace(match):
+        indentation, target, kind, arguments = match.groups()
+        arguments = [argument.strip() for argument in arguments.split(',')]
+        return '\n'.join(indentation + line for line in expand(target, kind, arguments))
+    return CB_STATEMENT.sub(replace, body)
@@ -0,0 +1,233 @@
+"""Turns the declarative opcode spec into specialized handler functions.
+
+Each opcode body from gbc_emulator.lr35902.instructions is wrapped in a
+function of its own that loads only the registers the body reads into locals,
+fetches its operands, advances PC, and stores back only the registers the
+body writes. The result is one flat function per opcode with no register
+dispatch, lambdas or flag helpers left on the hot path.
+
+Handlers take the LR35902 instance and return the number of machine cycles
+taken.
+
+F is kept in LR35902._f. With lazy flags, the ALU_* statements leave their
+operands in LR35902.pending_flags instead, and F is only materialized in
+front of the first instruction that reads it.
+"""
+import ast
+from gbc_emulator.lr35902 import alu
+from gbc_emulator.lr35902 import cb
+from gbc_emulator.lr35902 import flags
+from gbc_emulator.lr35902.instructions import OPCODES
+from gbc_emulator.lr35902.instructions.spec import CB
+
+REGISTERS = ('A', 'B', 'C', 'D', 'E', 'F', 'H', 'L', 'SP')
+
+# Attributes of LR35902 holding each register, where named differently
+ATTRIBUTES = {'F': '_f'}
+
+# How to fetch each immediate operand. PC still points at the opcode.
+OPERANDS = {
+    'n8': 'n8 = mem[PC + 1]\n',
+    'e8': 'e8 = mem[PC + 1]\ne8 -= (e8 & 0x80) << 1\n',
+    'n16': 'n16 = mem[PC + 1] | (mem[PC + 2] << 8)\n',
+}
+
+# Handler tables, built on first use per flags mode and shared by every
+# LR35902 instance
+_tables = {}
+
+def analyze(body):
+    """Names read and written by a body, and registers it needs loaded."""
+    tree = ast.parse(body)
+    loads = set()
+    stores = set()
+    unconditional = set()
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            if isinstance(node.ctx, ast.Load):
+                loads.add(node.id)
+            else:
+                stores.add(node.id)
+        elif isinstance(node, ast.AugAssign) and isinstance(node.target, ast.Name):
+            loads.add(node.target.id)
+
+    # A register assigned by a top-level statement, and never read, does not
+    # need its old value.
+    for statement in tree.body:
+        if isinstance(statement, ast.Assign):
+            for target in statement.targets:
+                if isinstance(target, ast.Name):
+                    unconditional.add(target.id)
+
+    needed = set(register for register in REGISTERS
+                 if register in loads or (register in stores and register not in unconditional))
+    return loads | stores, stores, needed
+
+def lazy_flags_code(parts):
+    """Thread lazy flags through a sequence of expanded bodies.
+
+    Keeps track of whether the flags are still in the LR35902, pending in the
+    local FL, or materialized in the local F, materializing F in front of any
+    body that reads it. Returns the combined body and the statements storing
+    the flags back.
+    """
+    source = ''
+    state = None # In the LR35902
+    dirty = False
+
+    for part in parts:
+        _, stores, needed = analyze(part)
+        if 'F' in needed:
+            if state == 'pending':
+                source += 'F = materialize(FL)\n'
+            elif state is None:
+                source += 'F = s._f if s.pending_flags is None else materialize(s.pending_flags)\n'
+                dirty = True # Stored back, rather than worked out again
+            state = 'materialized'
+
+        source += part
+
+        if 'FL' in stores:
+            state = 'pending'
+            dirty = True
+        elif 'F' in stores:
+            state = 'materialized'
+            dirty = True
+
+    if not dirty:
+        return source, ''
+    if state == 'pending':
+        return source, 's.pending_flags = FL\n'
+    return source, 's._f = F\ns.pending_flags = None\n'
+
+def frame(parts, lazy_flags=False):
+    """Wrap a sequence of opcode bodies in register loads and stores.
+
+    Returns the names the bodies use, the loads, the body and the stores.
+    PC is left to the caller.
+    """
+    parts = [cb.expand_statements(alu.expand_statements(part, lazy_flags)) for part in parts]
+    body = ''.join(parts)
+    used, stores, needed = analyze(body)
+
+    loads = ''
+    if 'mem' in used:
+        loads += 'mem = s.memory\n'
+    for register in REGISTERS:
+        if register in needed and not (lazy_flags and register == 'F'):
+            loads += '{} = s.{}\n'.format(register, ATTRIBUTES.get(register, register))
+
+    flag_stores = ''
+    if lazy_flags:
+        body, flag_stores = lazy_flags_code(parts)
+
+    register_stores = ''
+    for register in REGISTERS:
+        if register in stores and not (lazy_flags and register == 'F'):
+            register_stores += 's.{} = {}\n'.format(ATTRIBUTES.get(register, register), register)
+
+    return used, loads, body, register_stores + flag_stores
+
+def indent(source, depth=1):
+    prefix = '    ' * depth
+    return ''.join(prefix + line + '\n' if line.strip() else '\n'
+                   for line in source.split('\n'))
+
+def handler_source(name, op, lazy_flags=False):
+    """Python source for a handler implementing a single opcode."""
+    used, loads, body, stores = frame([op.body], lazy_flags)
+    uses_pc = 'PC' in used or any(operand in used for operand in OPERANDS)
+    length = op.length_in_bytes
+    duration = op.duration_in_cycles // 4
+
+    source = loads
+    if uses_pc:
+        if 'mem' not in used and any(operand in used for operand in OPERANDS):
+            source += 'mem = s.memory\n'
+        source += 'PC = s.PC\n'
+        for operand, fetch in OPERANDS.items():
+            if operand in used:
+                source += fetch
+        source += 'PC = (PC + {}) & 0xFFFF\n'.format(length)
+    else:
+        source += 's.PC = (s.PC + {}) & 0xFFFF\n'.format(length)
+
+    if 'cycles' in used:
+        source += 'cycles = {}\n'.format(duration)
+
+    source += body.strip('\n') + '\n'
+    source += stores
+    if uses_pc:
+        source += 's.PC = PC\n'
+
+    if 'cycles' in used:
+        source += 'return cycles\n'
+    else:
+        source += 'return {}\n'.format(duration)
+
+    return 'def {}(s):\n{}'.format(name, indent(source.rstrip('\n')))
+
+def invalid_source(name, opcode):
+    """Python source for a handler that rejects an undefined opcode."""
+    return (
+        'def {0}(s):\n'
+        '    raise RuntimeError("Invalid opcode {1} at 0x{{:04X}}".format(s.PC))\n'
+    ).format(name, opcode)
+
+def namespace():
+    """Globals for generated code."""
+    names = {'materialize': flags.materialize}
+    names.update(alu.tables())
+    names.update(cb.tables())
+    names.update((name, value) for name, value in vars(flags).items() if name.startswith('LAZY_'))
+    return names
+
+def compile_function(name, source, names):
+    code = compile(source, '<lr35902 {}>'.format(name), 'exec')
+    exec(code, names)
+    return names[name]
+
+def handler_name(opcode):
+    if opcode & CB:
+        return 'cb_{:02x}'.format(opcode & 0xFF)
+    return 'op_{:02x}'.format(opcode)
+
+def build(lazy_flags=False):
+    """Generate the 512 entry handler table and its parallel length and
+    duration (in machine cycles) tables. Entries 0x100-0x1FF are the 0xCB
+    page, which opcode 0xCB dispatches into."""
+    handlers = [None] * 0x200
+    lengths = bytearray(0x200)
+    durations = bytearray(0x200)
+    names = namespace()
+    names['handlers'] = handlers
+
+    for op in OPCODES:
+        if op is None:
+            continue
+        name = handler_name(op.opcode)
+        handlers[op.opcode] = compile_function(name, handler_source(name, op, lazy_flags), names)
+        lengths[op.opcode] = op.length_in_bytes
+        durations[op.opcode] = op.duration_in_cycles // 4
+
+    for opcode, handler in enumerate(handlers):
+        if handler is None and opcode != 0xCB:
+            name = handler_name(opcode)
+            text = '0x{:02X}'.format(opcode) if opcode < CB else '0xCB 0x{:02X}'.format(opcode & 0xFF)
+            handlers[opcode] = compile_function(name, invalid_source(name, text), names)
+
+    # The 0xCB prefix dispatches on the following byte.
+    handlers[0xCB] = compile_function('op_cb', (
+        'def op_cb(s):\n'
+        '    return handlers[0x100 | s.memory[s.PC + 1]](s)\n'
+    ), names)
+    lengths[0xCB] = 2
+
+    return handlers, lengths, durations
+
+def tables(lazy_flags=False):
+    """The shared handler, length and duration tables."""
+    if lazy_flags not in _tables:
+        _tables[lazy_flags] = build(lazy_flags)
+    return _tables[lazy_flags]
@@ -3,3 +3,36 @@ FLAG_Z = 7 # Zero Flag
 FLAG_N = 6 # Subtract Flag
 FLAG_H = 5 # Half Carry Flag
 FLAG_C = 4 # Carry Flag
+
+# Lazy flags
+#
+# In lazy flags mode the ALU_* statements of the opcode spec do not build F.
+# Instead they leave a (kind, a, v, result) tuple in LR35902.pending_flags,
+# and F is only worked out from it when something reads it.
+LAZY_ADD = 1
+LAZY_SUB = 2
+LAZY_AND = 3
+LAZY_OR = 4
+
+def materialize(pending):
+    """Work out F from a pending (kind, a, v, result) tuple.
+
+    Carries come out of the unmasked result: bit 8 is set by an add that
+    overflowed and by a subtract that went negative, and bit 4 of
+    a ^ v ^ result is the carry into bit 4.
+    """
+    kind, a, v, result = pending
+
+    if kind == LAZY_ADD or kind == LAZY_SUB:
+        return (
+            (0x40 if kind == LAZY_SUB else 0) |
+            (0 if result & 0xFF else 0x80) |
+            (((a ^ v ^ result) & 0x10) << 1) |
+            ((result >> 4) & 0x10)
+        )
+    if kind == LAZY_AND:
+        return 0x20 if result else 0xA0
+    if kind == LAZY_OR:
+        return 0 if result else 0x80
+
+    raise RuntimeError("Unknown lazy flags kind {}".format(kind))
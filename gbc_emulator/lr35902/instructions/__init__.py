@@ -0,0 +1,35 @@
+"""Declarative spec of the LR35902 instruction set, one module per section of
+GBCPUman.pdf. OPCODES holds all 512 opcodes, with the 0xCB page at
+0x100-0x1FF and None for undefined opcodes."""
+from gbc_emulator.lr35902.instructions import (
+    load_store_move_8bit,
+    load_16bit,
+    alu_8bit,
+    alu_16bit,
+    miscellaneous,
+    rotates_shifts,
+    bit_opcodes,
+    jumps,
+)
+
+SECTIONS = (
+    load_store_move_8bit,
+    load_16bit,
+    alu_8bit,
+    alu_16bit,
+    miscellaneous,
+    rotates_shifts,
+    bit_opcodes,
+    jumps,
+)
+
+def build():
+    opcodes = [None] * 0x200
+    for section in SECTIONS:
+        for op in section.opcodes():
+            if opcodes[op.opcode] is not None:
+                raise RuntimeError("Opcode 0x{:03X} defined twice".format(op.opcode))
+            opcodes[op.opcode] = op
+    return opcodes
+
+OPCODES = build()
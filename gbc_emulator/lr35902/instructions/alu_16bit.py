@@ -0,0 +1,38 @@
+from gbc_emulator.lr35902.instructions.spec import (
+    Opcode, REGISTERS_16BIT, read_16bit, write_16bit
+)
+from gbc_emulator.lr35902.instructions.load_16bit import ADD_SP_E8
+
+# GBCPUman.pdf page 90
+# Add 16-bit register to register HL. Z is kept.
+ADD_HL = '''
+hl = (H << 8) | L
+F &= 0x80
+if ((hl & 0xFFF) + (v & 0xFFF)) > 0xFFF: # Half carry
+    F |= 0x20
+if (hl + v) > 0xFFFF: # Carry
+    F |= 0x10
+hl = (hl + v) & 0xFFFF
+H = hl >> 8
+L = hl & 0xFF
+'''
+
+def opcodes():
+    for index, register in enumerate(REGISTERS_16BIT):
+        # Opcodes 0x09, 0x19, 0x29, 0x39
+        yield Opcode(0x09 | (index << 4), 'ADD HL,{}'.format(register), 1, 8, 'v = {}\n'.format(read_16bit(register)) + ADD_HL)
+
+        # GBCPUman.pdf page 92
+        # Opcodes 0x03, 0x13, 0x23, 0x33
+        # Increment 16-bit register
+        yield Opcode(0x03 | (index << 4), 'INC {}'.format(register), 1, 8, 'v = ({} + 1) & 0xFFFF\n'.format(read_16bit(register)) + write_16bit(register))
+
+        # GBCPUman.pdf page 93
+        # Opcodes 0x0B, 0x1B, 0x2B, 0x3B
+        # Decrement 16-bit register
+        yield Opcode(0x0B | (index << 4), 'DEC {}'.format(register), 1, 8, 'v = ({} - 1) & 0xFFFF\n'.format(read_16bit(register)) + write_16bit(register))
+
+    # GBCPUman.pdf page 91
+    # Opcode 0xE8
+    # Add signed immediate byte to SP.
+    yield Opcode(0xE8, 'ADD SP,r8', 2, 16, ADD_SP_E8 + 'SP = result & 0xFFFF\n')
@@ -0,0 +1,41 @@
+from gbc_emulator.lr35902.instructions.spec import (
+    Opcode, CB, REGISTERS_8BIT, read_8bit, write_8bit, duration_8bit
+)
+
+def opcodes():
+    for bit in range(8):
+        for index, register in enumerate(REGISTERS_8BIT):
+            duration = duration_8bit(register, 8, 16)
+
+            # GBCPUman.pdf page 108
+            # 0xCB Opcodes 0x40-0x7F
+            # Test bit in operand. C is kept.
+            yield Opcode(
+                CB | 0x40 | (bit << 3) | index,
+                'BIT {},{}'.format(bit, register),
+                2,
+                duration,
+                read_8bit(register) + 'CB_BIT({}, v)\n'.format(bit)
+            )
+
+            # GBCPUman.pdf page 110
+            # 0xCB Opcodes 0x80-0xBF
+            # Clear bit in operand
+            yield Opcode(
+                CB | 0x80 | (bit << 3) | index,
+                'RES {},{}'.format(bit, register),
+                2,
+                duration,
+                read_8bit(register) + 'v &= 0x{:02X}\n'.format(~(1 << bit) & 0xFF) + write_8bit(register)
+            )
+
+            # GBCPUman.pdf page 109
+            # 0xCB Opcodes 0xC0-0xFF
+            # Set bit in operand
+            yield Opcode(
+                CB | 0xC0 | (bit << 3) | index,
+                'SET {},{}'.format(bit, register),
+                2,
+                duration,
+                read_8bit(register) + 'v |= 0x{:02X}\n'.format(1 << bit) + write_8bit(register)
+            )
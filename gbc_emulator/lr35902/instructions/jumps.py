@@ -0,0 +1,73 @@
+from gbc_emulator.lr35902.instructions.spec import Opcode, CONDITIONS
+
+# Push PC, the address of the next instruction, on to the stack.
+PUSH_PC = '''
+SP = (SP - 2) & 0xFFFF
+mem[(SP + 1) & 0xFFFF] = PC >> 8
+mem[SP] = PC & 0xFF
+'''
+
+# Pop two bytes off the stack into PC.
+POP_PC = '''
+PC = (mem[(SP + 1) & 0xFFFF] << 8) | mem[SP]
+SP = (SP + 2) & 0xFFFF
+'''
+
+def indent(body):
+    return ''.join('    ' + line + '\n' for line in body.strip('\n').split('\n'))
+
+def opcodes():
+    # GBCPUman.pdf page 111 & 112
+    # Jump to two byte immediate value, or to address contained in HL
+    yield Opcode(0xC3, 'JP a16', 3, 16, 'PC = n16\n')
+    yield Opcode(0xE9, 'JP (HL)', 1, 4, 'PC = (H << 8) | L\n')
+
+    # GBCPUman.pdf page 112
+    # Add 8-bit signed immediate value to PC and jump to it.
+    yield Opcode(0x18, 'JR r8', 2, 12, 'PC = (PC + e8) & 0xFFFF\n')
+
+    # GBCPUman.pdf page 114
+    # Push next instruction address on to stack and jump to two-byte
+    # immediate address.
+    yield Opcode(0xCD, 'CALL a16', 3, 24, PUSH_PC + 'PC = n16\n')
+
+    # GBCPUman.pdf page 117
+    # Pop two bytes off the stack and jump to the address, and for RETI then
+    # enable interrupts.
+    yield Opcode(0xC9, 'RET', 1, 16, POP_PC)
+    yield Opcode(0xD9, 'RETI', 1, 16, POP_PC + 's.interrupts["enabled"] = True\ns.interrupts["change_in"] = 0\ns.update_interrupts()\n')
+
+    # GBCPUman.pdf pages 111, 113, 114 & 117
+    # Conditional jumps, calls and returns take longer when the condition is
+    # met.
+    for index, (condition, test) in enumerate(CONDITIONS):
+        yield Opcode(0xC2 | (index << 3), 'JP {},a16'.format(condition), 3, 12, (
+            'if {}:\n'
+            '    PC = n16\n'
+            '    cycles += 1\n'
+        ).format(test))
+
+        yield Opcode(0x20 | (index << 3), 'JR {},r8'.format(condition), 2, 8, (
+            'if {}:\n'
+            '    PC = (PC + e8) & 0xFFFF\n'
+            '    cycles += 1\n'
+        ).format(test))
+
+        yield Opcode(0xC4 | (index << 3), 'CALL {},a16'.format(condition), 3, 12, (
+            'if {}:\n'
+            '{}'
+            '    PC = n16\n'
+            '    cycles += 3\n'
+        ).format(test, indent(PUSH_PC)))
+
+        yield Opcode(0xC0 | (index << 3), 'RET {}'.format(condition), 1, 8, (
+            'if {}:\n'
+            '{}'
+            '    cycles += 3\n'
+        ).format(test, indent(POP_PC)))
+
+    # GBCPUman.pdf page 116
+    # Push present instruction address on to stack and jump to restart
+    # address.
+    for offset in range(0x00, 0x40, 0x08):
+        yield Opcode(0xC7 | offset, 'RST {:02X}H'.format(offset), 1, 16, PUSH_PC + 'PC = 0x{:02X}\n'.format(offset))
@@ -1,111 +1,56 @@
-from gbc_emulator.lr35902 import flags
-
-
-# GBCPUman.pdf page 76
-# Opcodes 0x01, 0x11, 0x21, 0x31
-# Loads 16-bit immediate value into 16-bit register.
-
-def ld_n_nn_bc(self):
-    self.B = self.memory[self.PC + 2]
-    self.C = self.memory[self.PC + 1]
-
-def ld_n_nn_de(self):
-    self.D = self.memory[self.PC + 2]
-    self.E = self.memory[self.PC + 1]
-
-def ld_n_nn_hl(self):
-    self.H = self.memory[self.PC + 2]
-    self.L = self.memory[self.PC + 1]
-
-def ld_n_nn_sp(self):
-    self.SP = (self.memory[self.PC + 2] << 8) | self.memory[self.PC + 1]
-
-def ld_sp_hl(self):
-    """GBCPUman.pdf page 76
-    Opcode 0xF9
-    Put HL into SP"""
-    self.SP = (self.H << 8) | self.L
-
-def ld_hl_sp_n(self):
-    """GBCPUman.pdf page 77
-    Opcode 0xF8
-    Put SP + n into HL.
-    n is a signed byte"""
-    n = self.memory[self.PC + 1]
-    if n & 0x80:
-        # Negative, must convert with 2's complement
-        n = -((~n & 0xFF) + 1)
-    result = self.SP + n
-
-    self.H = (result >> 8) & 0xFF
-    self.L = result & 0xFF
-
-    self.set_flag(flags.FLAG_Z, False)
-    self.set_flag(flags.FLAG_N, False)
-
-    if n >= 0:
-        self.set_flag(flags.FLAG_C, ((self.SP & 0xFF) + n) > 0xFF)
-        self.set_flag(flags.FLAG_H, ((self.SP & 0xF) + (n & 0xF)) > 0xF)
-    else:
-        self.set_flag(flags.FLAG_C, (result & 0xFF) <= (self.SP & 0xFF))
-        self.set_flag(flags.FLAG_H, (result & 0xF) <= (self.SP & 0xF))
-
-def ld_nn_sp(self):
-    """GBCPUman.pdf page 78
-    Opcode 0x08
-    Put SP at address nn
-    nn is two bytes."""
-    nn = (self.memory[self.PC + 2] << 8) | self.memory[self.PC + 1]
-    self.memory[nn] = self.SP & 0xFF
-    self.memory[nn + 1] = (self.SP >> 8) & 0xFF
-
-# GBCPUman.pdf page 78
-# Opcodes 0xC5, 0xD5, 0xE5, 0xF5
-# Push register pair onto stack.
-# Decrement SP twice.
-# TODO: Keeping lower byte at lower address. Verify this is correct.
-
-def push_nn_bc(self):
-    self.SP -= 2
-    self.memory[self.SP + 1] = self.B
-    self.memory[self.SP] = self.C
-
-def push_nn_de(self):
-    self.SP -= 2
-    self.memory[self.SP + 1] = self.D
-    self.memory[self.SP] = self.E
-
-def push_nn_hl(self):
-    self.SP -= 2
-    self.memory[self.SP + 1] = self.H
-    self.memory[self.SP] = self.L
-
-def push_nn_af(self):
-    self.SP -= 2
-    self.memory[self.SP + 1] = self.A
-    self.memory[self.SP] = self.F
-
-# GBCPUman.pdf page 79
-# Opcodes 0xC1, 0xD1, 0xE1, 0xF1
-# Pop two bytes off of stack into register pair
-# Increment SP twice.
-
-def pop_nn_bc(self):
-    self.B = self.memory[self.SP + 1]
-    self.C = self.memory[self.SP]
-    self.SP += 2
-
-def pop_nn_de(self):
-    self.D = self.memory[self.SP + 1]
-    self.E = self.memory[self.SP]
-    self.SP += 2
-
-def pop_nn_hl(self):
-    self.H = self.memory[self.SP + 1]
-    self.L = self.memory[self.SP]
-    self.SP += 2
-
-def pop_nn_af(self):
-    self.A = self.memory[self.SP + 1]
-    self.F = self.memory[self.SP] & 0xF0 # Lower 4 bytes of can never be 1
-    self.SP += 2
+from gbc_emulator.lr35902.instructions.spec import Opcode, REGISTERS_16BIT, write_16bit
+
+# GBCPUman.pdf page 77
+# Put SP + n into HL, or into SP for ADD SP,n on page 91.
+# n is a signed byte. Z and N are reset.
+ADD_SP_E8 = '''
+result = SP + e8
+if e8 >= 0:
+    F = 0x10 if ((SP & 0xFF) + e8) > 0xFF else 0
+    if ((SP & 0xF) + (e8 & 0xF)) > 0xF:
+        F |= 0x20
+else:
+    F = 0x10 if (result & 0xFF) <= (SP & 0xFF) else 0
+    if (result & 0xF) <= (SP & 0xF):
+        F |= 0x20
+'''
+
+def opcodes():
+    # GBCPUman.pdf page 76
+    # Opcodes 0x01, 0x11, 0x21, 0x31
+    # Loads 16-bit immediate value into 16-bit register.
+    for index, register in enumerate(REGISTERS_16BIT):
+        yield Opcode(0x01 | (index << 4), 'LD {},d16'.format(register), 3, 12, 'v = n16\n' + write_16bit(register))
+
+    # GBCPUman.pdf page 76
+    # Opcode 0xF9
+    # Put HL into SP
+    yield Opcode(0xF9, 'LD SP,HL', 1, 8, 'SP = (H << 8) | L\n')
+
+    # GBCPUman.pdf page 77
+    # Opcode 0xF8
+    yield Opcode(0xF8, 'LD HL,SP+r8', 2, 12, ADD_SP_E8 + 'H = (result >> 8) & 0xFF\nL = result & 0xFF\n')
+
+    # GBCPUman.pdf page 78
+    # Opcode 0x08
+    # Put SP at address nn
+    yield Opcode(0x08, 'LD (a16),SP', 3, 20, 'mem[n16] = SP & 0xFF\nmem[(n16 + 1) & 0xFFFF] = SP >> 8\n')
+
+    # GBCPUman.pdf page 78 & 79
+    # Opcodes 0xC5, 0xD5, 0xE5, 0xF5 and 0xC1, 0xD1, 0xE1, 0xF1
+    # Push register pair onto stack, or pop two bytes off of stack into
+    # register pair. Keeping lower byte at lower address.
+    for index, register in enumerate(('BC', 'DE', 'HL', 'AF')):
+        high, low = register
+
+        yield Opcode(0xC5 | (index << 4), 'PUSH {}'.format(register), 1, 16, (
+            'SP = (SP - 2) & 0xFFFF\n'
+            'mem[(SP + 1) & 0xFFFF] = {}\n'
+            'mem[SP] = {}\n'
+        ).format(high, low))
+
+        yield Opcode(0xC1 | (index << 4), 'POP {}'.format(register), 1, 12, (
+            '{} = mem[(SP + 1) & 0xFFFF]\n'
+            '{} = mem[SP]{}\n' # Lower 4 bits of F can never be 1
+            'SP = (SP + 2) & 0xFFFF\n'
+        ).format(high, low, ' & 0xF0' if low == 'F' else ''))
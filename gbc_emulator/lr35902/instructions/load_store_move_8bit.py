@@ -1,421 +1,75 @@
-# GBCPUman.pdf page 65
-# Opcodes 0x06, 0x0E, 0x16, 0x1E, 0x26, 0x2E, 0x3E
-# Put 8-bit immediate value into 8-bit register.
-# NOTE: This is also implements 0x3E from LD A, # from page 68.
-def ld_nn_n_a(self):
-    self.A = self.memory[self.PC + 1]
-
-def ld_nn_n_b(self):
-    self.B = self.memory[self.PC + 1]
-
-def ld_nn_n_c(self):
-    self.C = self.memory[self.PC + 1]
-
-def ld_nn_n_d(self):
-    self.D = self.memory[self.PC + 1]
-
-def ld_nn_n_e(self):
-    self.E = self.memory[self.PC + 1]
-
-def ld_nn_n_h(self):
-    self.H = self.memory[self.PC + 1]
-
-def ld_nn_n_l(self):
-    self.L = self.memory[self.PC + 1]
-
-# GBCPUman.pdf page 66
-# Opcodes
-# A - 0x78, 0x79, 0x7A, 0x7B, 0x7C, 0x7D
-# B - 0x40, 0x41, 0x42, 0x43, 0x44, 0x45
-# C - 0x48, 0x49, 0x4A, 0x4B, 0x4C, 0x4D
-# D - 0x50, 0x51, 0x52, 0x53, 0x54, 0x55
-# E - 0x58, 0x59, 0x5A, 0x5B, 0x5C, 0x5D
-# H - 0x60, 0x61, 0x62, 0x63, 0x64, 0x65
-# L - 0x68, 0x69, 0x6A, 0x6B, 0x6C, 0x6D
-# Put value of r2 into r1
-# r2 = src register
-# r1 = dst register
-# Note: A is not a valid source for this function. It is documented in
-# ld_n_a page 69.
-def ld_a_b_between_registers(self):
-    """0x78"""
-    self.A = self.B
-
-def ld_a_c_between_registers(self):
-    """0x79"""
-    self.A = self.C
-
-def ld_a_d_between_registers(self):
-    """0x7A"""
-    self.A = self.D
-
-def ld_a_e_between_registers(self):
-    """0x7B"""
-    self.A = self.E
-
-def ld_a_h_between_registers(self):
-    """0x7C"""
-    self.A = self.H
-
-def ld_a_l_between_registers(self):
-    """0x7D"""
-    self.A = self.L
-
-def ld_b_c_between_registers(self):
-    """0x41"""
-    self.B = self.C
-
-def ld_b_d_between_registers(self):
-    """0x42"""
-    self.B = self.D
-
-def ld_b_e_between_registers(self):
-    """0x43"""
-    self.B = self.E
-
-def ld_b_h_between_registers(self):
-    """0x44"""
-    self.B = self.H
-
-def ld_b_l_between_registers(self):
-    """0x45"""
-    self.B = self.L
-
-def ld_c_b_between_registers(self):
-    """0x48"""
-    self.C = self.B
-
-def ld_c_d_between_registers(self):
-    """0x4A"""
-    self.C = self.D
-
-def ld_c_e_between_registers(self):
-    """0x4B"""
-    self.C = self.E
-
-def ld_c_h_between_registers(self):
-    """0x4C"""
-    self.C = self.H
-
-def ld_c_l_between_registers(self):
-    """0x4D"""
-    self.C = self.L
-
-def ld_d_b_between_registers(self):
-    """0x50"""
-    self.D = self.B
-
-def ld_d_c_between_registers(self):
-    """0x51"""
-    self.D = self.C
-
-def ld_d_e_between_registers(self):
-    """0x53"""
-    self.D = self.E
-
-def ld_d_h_between_registers(self):
-    """0x54"""
-    self.D = self.H
-
-def ld_d_l_between_registers(self):
-    """0x55"""
-    self.D = self.L
-
-def ld_e_b_between_registers(self):
-    """0x58"""
-    self.E = self.B
-
-def ld_e_c_between_registers(self):
-    """0x59"""
-    self.E = self.C
-
-def ld_e_d_between_registers(self):
-    """0x5A"""
-    self.E = self.D
-
-def ld_e_h_between_registers(self):
-    """0x5C"""
-    self.E = self.H
-
-def ld_e_l_between_registers(self):
-    """0x5D"""
-    self.E = self.L
-
-def ld_h_b_between_registers(self):
-    """0x60"""
-    self.H = self.B
-
-def ld_h_c_between_registers(self):
-    """0x61"""
-    self.H = self.C
-
-def ld_h_d_between_registers(self):
-    """0x62"""
-    self.H = self.D
-
-def ld_h_e_between_registers(self):
-    """0x63"""
-    self.H = self.E
-
-def ld_h_l_between_registers(self):
-    """0x65"""
-    self.H = self.L
-
-def ld_l_b_between_registers(self):
-    """0x68"""
-    self.L = self.B
-
-def ld_l_c_between_registers(self):
-    """0x69"""
-    self.L = self.C
-
-def ld_l_d_between_registers(self):
-    """0x6A"""
-    self.L = self.D
-
-def ld_l_e_between_registers(self):
-    """0x6B"""
-    self.L = self.E
-
-def ld_l_h_between_registers(self):
-    """0x6C"""
-    self.L = self.H
-
-# GBCPUman.pdf page 66
-# Opcodes 0x46, 0x4E, 0x56, 0x5E, 0x66, 0x6E
-# Put value of memory at r2 into r1
-# r2 = src register pointing to memory
-# r1 = dst register
-def ld_hl_b_from_memory(self):
-    """0x46"""
-    ptr = (self.H << 8) | self.L
-    self.B = self.memory[ptr]
-
-def ld_hl_c_from_memory(self):
-    """0x4E"""
-    ptr = (self.H << 8) | self.L
-    self.C = self.memory[ptr]
-
-def ld_hl_d_from_memory(self):
-    """0x56"""
-    ptr = (self.H << 8) | self.L
-    self.D = self.memory[ptr]
-
-def ld_hl_e_from_memory(self):
-    """0x5E"""
-    ptr = (self.H << 8) | self.L
-    self.E = self.memory[ptr]
-
-def ld_hl_h_from_memory(self):
-    """0x66"""
-    ptr = (self.H << 8) | self.L
-    self.H = self.memory[ptr]
-
-def ld_hl_l_from_memory(self):
-    """0x6E"""
-    ptr = (self.H << 8) | self.L
-    self.L = self.memory[ptr]
-
-# GBCPUman.pdf page 66
-# Opcodes 0x70, 0x71, 0x72, 0x73, 0x74, 0x75
-# Put value of r2 into memory at r1
-# r2 = src register
-# r1 = dst register pointing to memory
-def ld_hl_b_to_memory(self):
-    """0x70"""
-    self.memory[(self.H << 8) | self.L] = self.B
-
-def ld_hl_c_to_memory(self):
-    """0x71"""
-    self.memory[(self.H << 8) | self.L] = self.C
-
-def ld_hl_d_to_memory(self):
-    """0x72"""
-    self.memory[(self.H << 8) | self.L] = self.D
-
-def ld_hl_e_to_memory(self):
-    """0x73"""
-    self.memory[(self.H << 8) | self.L] = self.E
-
-def ld_hl_h_to_memory(self):
-    """0x74"""
-    self.memory[(self.H << 8) | self.L] = self.H
-
-def ld_hl_l_to_memory(self):
-    """0x75"""
-    self.memory[(self.H << 8) | self.L] = self.L
-
-def ld_r1_r2_immediate_to_memory(self):
-    """"GBCPUman.pdf page 66
-    Opcode 0x36
-    Put value of r2 into memory at r1
-    r1 = dst register pointing to memory
-    r2 = immediate 8-bit value
-    """
-    self.memory[(self.H << 8) | self.L] = self.memory[self.PC + 1]
-
-# GBCPUman.pdf page 68
-# Opcodes 0x0A, 0x1A, 0x7E
-# Put value of n into A
-# src = source register pointing to memory
-def ld_a_bc_from_memory(self):
-    """0x0A"""
-    ptr = (self.B << 8) | self.C
-    self.A = self.memory[ptr]
-
-def ld_a_de_from_memory(self):
-    """0x1A"""
-    ptr = (self.D << 8) | self.E
-    self.A = self.memory[ptr]
-
-def ld_a_hl_from_memory(self):
-    """0x78"""
-    ptr = (self.H << 8) | self.L
-    self.A = self.memory[ptr]
-
-def ld_a_n_from_memory_immediate(self):
-    """"GBCPUman.pdf page 68
-    Opcode 0xFA
-    Put value memory at nn into A
-    nn - two byte immediate value
-    """
-    ptr = (self.memory[self.PC + 2] << 8) | self.memory[self.PC + 1]
-    self.A = self.memory[ptr]
-
-# GBCPUman.pdf page 69
-# Opcodes 0x47, 0x4F, 0x57, 0x5F, 0x67, 0x6F, 0x7F
-# Put value of A into register
-# dst - source register
-def ld_b_a(self):
-    """0x47"""
-    self.B = self.A
-
-def ld_c_a(self):
-    """0x4F"""
-    self.C = self.A
-
-def ld_d_a(self):
-    """0x57"""
-    self.D = self.A
-
-def ld_e_a(self):
-    """0x5F"""
-    self.E = self.A
-
-def ld_h_a(self):
-    """0x67"""
-    self.H = self.A
-
-def ld_l_a(self):
-    """0x6F"""
-    self.L = self.A
-
-# GBCPUman.pdf page 69
-# Opcodes 0x02, 0x12, 0x77
-# Put value of A into memory at register pointer
-# dst - source register
-def ld_bc_a_pointer(self):
-    """0x02"""
-    addr = (self.B << 8) | self.C
-    self.memory[addr] = self.A
-
-def ld_de_a_pointer(self):
-    """0x12"""
-    addr = (self.D << 8) | self.E
-    self.memory[addr] = self.A
-
-def ld_hl_a_pointer(self):
-    """0x77"""
-    addr = (self.H << 8) | self.L
-    self.memory[addr] = self.A
-
-def ld_n_a_immediate(self):
-    """"GBCPUman.pdf page 69
-    Opcodes 0xEA
-    Put value of A into memory at immediate 16-bit address
-    """
-    addr = (self.memory[self.PC + 2] << 8) | self.memory[self.PC + 1]
-
-    self.memory[addr] = self.A
-
-def ld_a_c_offset(self):
-    """"GBCPUman.pdf page 70
-    Opcode 0xF2
-    Put value at address 0xFF00 + C into register A
-    """
-    addr = 0xFF00 + self.C
-    self.A = self.memory[addr]
-
-def ld_c_a_offset(self):
-    """"GBCPUman.pdf page 70
-    Opcode 0xE2
-    Put value of register A into memory at address 0xFF00 + C.
-    """
-    addr = 0xFF00 + self.C
-    self.memory[addr] = self.A
-
-def ld_a_hl_decrement(self):
-    """"GBCPUman.pdf page 71
-    Opcode 0x3A
-    Put value at address HL into A. Decrement HL.
-    """
-    addr = (self.H << 8) | self.L
-    self.A = self.memory[addr]
-
-    addr -= 1
-    self.H = ((addr & 0xFF00) >> 8) & 0xFF
-    self.L = addr & 0xFF
-
-def ld_hl_a_decrement(self):
-    """"GBCPUman.pdf page 72
-    Opcode 0x32
-    Put value at A into memory at address HL. Decrement HL.
-    """
-    addr = (self.H << 8) | self.L
-    self.memory[addr] = self.A
-
-    addr -= 1
-    self.H = ((addr & 0xFF00) >> 8) & 0xFF
-    self.L = addr & 0xFF
-
-def ld_a_hl_increment(self):
-    """"GBCPUman.pdf page 73
-    Opcode 0x2A
-    Put value at address HL into A. Increment HL.
-    """
-    addr = (self.H << 8) | self.L
-    self.A = self.memory[addr]
-
-    addr += 1
-    self.H = ((addr & 0xFF00) >> 8) & 0xFF
-    self.L = addr & 0xFF
-
-def ld_hl_a_increment(self):
-    """"GBCPUman.pdf page 74
-    Opcode 0x22
-    Put value at A into memory at address HL. Increment HL.
-    """
-    addr = (self.H << 8) | self.L
-    self.memory[addr] = self.A
-
-    addr += 1
-    self.H = ((addr & 0xFF00) >> 8) & 0xFF
-    self.L = addr & 0xFF
-
-def ldh_n_a(self):
-    """"GBCPUman.pdf page 75
-    Opcode 0xE0
-    Put value at A into memory at address n + 0xFF00
-    n is an immediate byte
-    """
-    addr = self.memory[self.PC + 1] + 0xFF00
-    self.memory[addr] = self.A
-
-def ldh_a_n(self):
-    """"GBCPUman.pdf page 75
-    Opcode 0xF0
-    Put value at address n + 0xFF00 into register A
-    n is an immediate byte
-    """
-    addr = self.memory[self.PC + 1] + 0xFF00
-    self.A = self.memory[addr]
+from gbc_emulator.lr35902.instructions.spec import Opcode, REGISTERS_8BIT
+
+def opcodes():
+    # GBCPUman.pdf page 65
+    # Opcodes 0x06, 0x0E, 0x16, 0x1E, 0x26, 0x2E, 0x36, 0x3E
+    # Put 8-bit immediate value into 8-bit register.
+    # NOTE: This is also implements 0x3E from LD A, # from page 68.
+    for index, register in enumerate(REGISTERS_8BIT):
+        if register == '(HL)':
+            yield Opcode(0x06 | (index << 3), 'LD (HL),d8', 2, 12, 'mem[(H << 8) | L] = n8\n')
+        else:
+            yield Opcode(0x06 | (index << 3), 'LD {},d8'.format(register), 2, 8, '{} = n8\n'.format(register))
+
+    # GBCPUman.pdf pages 66, 67 & 69
+    # Opcodes 0x40-0x7F, except 0x76 which is HALT
+    # Put value of r2 into r1
+    for dst_index, dst in enumerate(REGISTERS_8BIT):
+        for src_index, src in enumerate(REGISTERS_8BIT):
+            opcode = 0x40 | (dst_index << 3) | src_index
+            mnemonic = 'LD {},{}'.format(dst, src)
+
+            if dst == '(HL)' and src == '(HL)':
+                continue # HALT
+            elif dst == '(HL)':
+                yield Opcode(opcode, mnemonic, 1, 8, 'mem[(H << 8) | L] = {}\n'.format(src))
+            elif src == '(HL)':
+                yield Opcode(opcode, mnemonic, 1, 8, '{} = mem[(H << 8) | L]\n'.format(dst))
+            elif dst == src:
+                yield Opcode(opcode, mnemonic, 1, 4, '')
+            else:
+                yield Opcode(opcode, mnemonic, 1, 4, '{} = {}\n'.format(dst, src))
+
+    # GBCPUman.pdf page 68
+    # Opcodes 0x0A, 0x1A, 0xFA
+    # Put value of n into A
+    yield Opcode(0x0A, 'LD A,(BC)', 1, 8, 'A = mem[(B << 8) | C]\n')
+    yield Opcode(0x1A, 'LD A,(DE)', 1, 8, 'A = mem[(D << 8) | E]\n')
+    yield Opcode(0xFA, 'LD A,(a16)', 3, 16, 'A = mem[n16]\n')
+
+    # GBCPUman.pdf page 69
+    # Opcodes 0x02, 0x12, 0xEA
+    # Put value of A into memory
+    yield Opcode(0x02, 'LD (BC),A', 1, 8, 'mem[(B << 8) | C] = A\n')
+    yield Opcode(0x12, 'LD (DE),A', 1, 8, 'mem[(D << 8) | E] = A\n')
+    yield Opcode(0xEA, 'LD (a16),A', 3, 16, 'mem[n16] = A\n')
+
+    # GBCPUman.pdf page 70
+    # Opcodes 0xF2, 0xE2
+    # Put value at address 0xFF00 + C into A, and the other way around.
+    # These disagree with pastraiser length of 2 bytes.
+    yield Opcode(0xF2, 'LD A,(C)', 1, 8, 'A = mem[0xFF00 + C]\n')
+    yield Opcode(0xE2, 'LD (C),A', 1, 8, 'mem[0xFF00 + C] = A\n')
+
+    # GBCPUman.pdf pages 71-74
+    # Opcodes 0x3A, 0x32, 0x2A, 0x22
+    # Load between A and memory at HL, then decrement or increment HL.
+    for opcode, mnemonic, transfer, step in (
+            (0x3A, 'LD A,(HL-)', 'A = mem[addr]', '- 1'),
+            (0x32, 'LD (HL-),A', 'mem[addr] = A', '- 1'),
+            (0x2A, 'LD A,(HL+)', 'A = mem[addr]', '+ 1'),
+            (0x22, 'LD (HL+),A', 'mem[addr] = A', '+ 1'),
+        ):
+        yield Opcode(opcode, mnemonic, 1, 8, (
+            'addr = (H << 8) | L\n'
+            '{}\n'
+            'addr = (addr {}) & 0xFFFF\n'
+            'H = addr >> 8\n'
+            'L = addr & 0xFF\n'
+        ).format(transfer, step))
+
+    # GBCPUman.pdf page 75
+    # Opcodes 0xE0, 0xF0
+    # Load between A and memory at address n + 0xFF00
+    yield Opcode(0xE0, 'LDH (a8),A', 2, 12, 'mem[0xFF00 + n8] = A\n')
+    yield Opcode(0xF0, 'LDH A,(a8)', 2, 12, 'A = mem[0xFF00 + n8]\n')
@@ -0,0 +1,63 @@
+from gbc_emulator.lr35902.instructions.spec import (
+    Opcode, CB, REGISTERS_8BIT, read_8bit, write_8bit, duration_8bit
+)
+
+# GBCPUman.pdf page 94
+# Swap upper and lower nibbles of operand
+SWAP = 'v = CB_SWAP(v)\n'
+
+# GBCPUman.pdf page 95
+# Decimal adjust A register
+# Source: https://forums.nesdev.com/viewtopic.php?f=20&t=15944
+DAA = '''
+if not F & 0x40:
+    # Last operation was an additon
+    if (F & 0x10) or A > 0x99:
+        A += 0x60
+        F |= 0x10
+    if (F & 0x20) or (A & 0xF) > 0x9:
+        A += 0x6
+else:
+    # Last operation was a subtraction
+    if F & 0x10:
+        A -= 0x60
+    if F & 0x20:
+        A -= 0x06
+A &= 0xFF
+F = (F & 0x50) | (0 if A else 0x80)
+'''
+
+def opcodes():
+    # 0xCB Opcodes 0x30-0x37
+    for index, register in enumerate(REGISTERS_8BIT):
+        yield Opcode(
+            CB | 0x30 | index,
+            'SWAP {}'.format(register),
+            2,
+            duration_8bit(register, 8, 16),
+            read_8bit(register) + SWAP + write_8bit(register)
+        )
+
+    yield Opcode(0x27, 'DAA', 1, 4, DAA)
+
+    # GBCPUman.pdf page 95
+    # Complement (flip all bits) in A register
+    yield Opcode(0x2F, 'CPL', 1, 4, 'A = ~A & 0xFF\nF |= 0x60\n')
+
+    # GBCPUman.pdf page 96
+    # Complement or set carry flag
+    yield Opcode(0x3F, 'CCF', 1, 4, 'F = (F & 0x90) ^ 0x10\n')
+    yield Opcode(0x37, 'SCF', 1, 4, 'F = (F & 0x80) | 0x10\n')
+
+    # GBCPUman.pdf page 97
+    # Do nothing, power down the CPU until an interrupt occurs, or halt CPU
+    # and LCD until button is pressed.
+    yield Opcode(0x00, 'NOP', 1, 4, '')
+    yield Opcode(0x76, 'HALT', 1, 4, 's.state = s.State.HALTED\ns.update_interrupts()\n')
+    yield Opcode(0x10, 'STOP 0', 2, 4, 's.state = s.State.STOPPED\ns.update_interrupts()\n')
+
+    # GBCPUman.pdf page 98
+    # Interrupts are disabled or enabled after the instruction after DI or EI
+    # is executed
+    yield Opcode(0xF3, 'DI', 1, 4, 'if s.interrupts["enabled"]:\n    s.interrupts["change_in"] = 2\n')
+    yield Opcode(0xFB, 'EI', 1, 4, 'if not s.interrupts["enabled"]:\n    s.interrupts["change_in"] = 2\n')
@@ -1,2 +0,0 @@
-def nop(_):
-    pass
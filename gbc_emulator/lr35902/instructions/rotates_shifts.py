@@ -0,0 +1,64 @@
+from gbc_emulator.lr35902.instructions.spec import (
+    Opcode, CB, REGISTERS_8BIT, read_8bit, write_8bit, duration_8bit
+)
+
+# GBCPUman.pdf pages 99 & 100
+# Rotate A. Old bit to carry flag. Zero flag is reset.
+RLCA = '''
+F = (A & 0x80) >> 3
+A = ((A << 1) & 0xFF) | (A >> 7)
+'''
+
+RLA = '''
+carry_bit = (F & 0x10) >> 4
+F = (A & 0x80) >> 3
+A = ((A << 1) & 0xFF) | carry_bit
+'''
+
+RRCA = '''
+F = (A & 0x01) << 4
+A = (A >> 1) | ((A & 0x01) << 7)
+'''
+
+RRA = '''
+carry_bit = (F & 0x10) << 3
+F = (A & 0x01) << 4
+A = (A >> 1) | carry_bit
+'''
+
+# GBCPUman.pdf pages 101-107
+# Rotate or shift operand. Old bit to carry flag.
+RLC = 'v = CB_RLC(v)\n'
+RRC = 'v = CB_RRC(v)\n'
+RL = 'v = CB_RL(v, (F & 0x10) >> 4)\n'
+RR = 'v = CB_RR(v, (F & 0x10) >> 4)\n'
+SLA = 'v = CB_SLA(v)\n'
+SRA = 'v = CB_SRA(v)\n'
+SRL = 'v = CB_SRL(v)\n'
+
+# 0xCB opcode rows 0x00-0x3F in encoding order. 0x30 is SWAP.
+ROTATES_SHIFTS = (
+    (0x00, RLC, 'RLC'),
+    (0x08, RRC, 'RRC'),
+    (0x10, RL, 'RL'),
+    (0x18, RR, 'RR'),
+    (0x20, SLA, 'SLA'),
+    (0x28, SRA, 'SRA'),
+    (0x38, SRL, 'SRL'),
+)
+
+def opcodes():
+    yield Opcode(0x07, 'RLCA', 1, 4, RLCA)
+    yield Opcode(0x17, 'RLA', 1, 4, RLA)
+    yield Opcode(0x0F, 'RRCA', 1, 4, RRCA)
+    yield Opcode(0x1F, 'RRA', 1, 4, RRA)
+
+    for row, body, mnemonic in ROTATES_SHIFTS:
+        for index, register in enumerate(REGISTERS_8BIT):
+            yield Opcode(
+                CB | row | index,
+                '{} {}'.format(mnemonic, register),
+                2,
+                duration_8bit(register, 8, 16),
+                read_8bit(register) + body + write_8bit(register)
+            )
@@ -0,0 +1,86 @@
+"""Building blocks for the declarative opcode spec.
+
+Every opcode is described by an Opcode entry whose body is a snippet of
+Python operating on plain names:
+
+    A, B, C, D, E, F, H, L, SP, PC  CPU registers
+    mem                             The memory port
+    n8, e8, n16                     Unsigned byte, signed byte and word operands
+    cycles                          Machine cycles taken, for conditional timing
+    s                               The LR35902 instance, for everything else
+
+PC already points at the next instruction when the body runs. Flags live in
+F as Z = 0x80, N = 0x40, H = 0x20 and C = 0x10.
+
+8-bit arithmetic is written as ALU_* statements, which set F and can be
+evaluated lazily (see gbc_emulator.lr35902.alu). Carry is optional, and
+without a target only the flags are set:
+
+    A = ALU_ADD(A, v, carry)    ADD and ADC
+    A = ALU_SUB(A, v, carry)    SUB and SBC, or CP without a target
+    A = ALU_AND(A, v)
+    A = ALU_OR(A, v)
+    A = ALU_XOR(A, v)
+
+The rotates, shifts, SWAP and BIT of the 0xCB page are written as CB_*
+statements, which are table lookups (see gbc_emulator.lr35902.cb):
+
+    v = CB_RLC(v)               Likewise RRC, SLA, SRA, SRL and SWAP
+    v = CB_RL(v, carry)         Likewise RR
+    CB_BIT(bit, v)              Z and H from the bit, C is kept
+
+gbc_emulator.lr35902.codegen turns these bodies into specialized handlers.
+"""
+from collections import namedtuple
+
+Opcode = namedtuple('Opcode', [
+    'opcode', # 0x00-0xFF, or CB + 0x00-0xFF for the 0xCB page
+    'mnemonic',
+    'length_in_bytes',
+    'duration_in_cycles',
+    'body',
+])
+
+# Offset of the 0xCB page in the opcode table
+CB = 0x100
+
+# 8-bit operands in the order the opcodes encode them
+REGISTERS_8BIT = ('B', 'C', 'D', 'E', 'H', 'L', '(HL)', 'A')
+
+# 16-bit operands in the order the opcodes encode them
+REGISTERS_16BIT = ('BC', 'DE', 'HL', 'SP')
+
+# Branch conditions in the order the opcodes encode them
+CONDITIONS = (
+    ('NZ', 'not F & 0x80'),
+    ('Z', 'F & 0x80'),
+    ('NC', 'not F & 0x10'),
+    ('C', 'F & 0x10'),
+)
+
+def read_8bit(register):
+    """Statements that load an 8-bit operand into v."""
+    if register == '(HL)':
+        return 'addr = (H << 8) | L\nv = mem[addr]\n'
+    return 'v = {}\n'.format(register)
+
+def write_8bit(register):
+    """Statements that store v back to an operand loaded by read_8bit()."""
+    if register == '(HL)':
+        return 'mem[addr] = v\n'
+    return '{} = v\n'.format(register)
+
+def read_16bit(register):
+    """Expression for the value of a 16-bit register."""
+    if register == 'SP':
+        return 'SP'
+    return '(({} << 8) | {})'.format(register[0], register[1])
+
+def write_16bit(register):
+    """Statements that store v into a 16-bit register."""
+    if register == 'SP':
+        return 'SP = v\n'
+    return '{} = v >> 8\n{} = v & 0xFF\n'.format(register[0], register[1])
+
+def duration_8bit(register, register_cycles, memory_cycles):
+    return memory_cycles if register == '(HL)' else register_cycles
@@ -0,0 +1,97 @@
+"""Register-in-locals interpreter loop for the LR35902.
+
+Generates one function running instruction after instruction with every
+register, and the cycle count, kept in local variables, dispatching on the
+opcode through a tree of comparisons. The registers are only loaded from
+and stored back to the LR35902 when the loop is entered and left, rather
+than by every instruction.
+
+The loop runs the same opcode bodies as the handlers in
+gbc_emulator.lr35902.codegen, with flags always computed eagerly. It stops
+when the budget is used up, at a breakpoint, when a memory write leaves an
+interrupt pending, and in front of any instruction touching CPU state other
+than registers, like HALT or EI, which are left to LR35902.execute().
+"""
+from gbc_emulator.lr35902 import codegen
+from gbc_emulator.lr35902.instructions import OPCODES
+from gbc_emulator.lr35902.instructions.spec import CB
+from gbc_emulator.lr35902.translator import uses_cpu_state, writes_memory
+
+REGISTERS = ('A', 'B', 'C', 'D', 'E', 'F', 'H', 'L', 'SP', 'PC')
+
+# Loop, built on first use
+_loop = None
+
+def leaf_source(op):
+    """Statements running one opcode inside the loop."""
+    if op is None or uses_cpu_state(op):
+        return 'break\n' # Left to LR35902.execute()
+
+    body = codegen.frame([op.body])[2]
+    used = codegen.analyze(body)[0]
+    duration = op.duration_in_cycles // 4
+
+    source = ''
+    for operand, fetch in codegen.OPERANDS.items():
+        if operand in used:
+            source += fetch
+    source += 'PC = (PC + {}) & 0xFFFF\n'.format(op.length_in_bytes)
+
+    if 'cycles' in used:
+        source += 'cycles = {}\n'.format(duration)
+        source += body.strip('\n') + '\n'
+        source += 'elapsed += cycles\n'
+    else:
+        source += body.strip('\n') + '\n'
+        source += 'elapsed += {}\n'.format(duration)
+
+    if writes_memory(op):
+        # A write to IE or IF may have left an interrupt to service
+        source += 'if s.interrupt_pending:\n    budget = 0\n'
+
+    return source
+
+def tree_source(variable, leaves, low, high):
+    """Dispatch on variable, known to be in low..high - 1, by bisection."""
+    if high - low == 1:
+        return leaves[low]
+
+    middle = (low + high) // 2
+    return (
+        'if {} < 0x{:02X}:\n'.format(variable, middle) +
+        codegen.indent(tree_source(variable, leaves, low, middle).rstrip('\n')) +
+        'else:\n' +
+        codegen.indent(tree_source(variable, leaves, middle, high).rstrip('\n'))
+    )
+
+def loop_source(name='run_loop'):
+    """Python source for the loop. It takes the LR35902, a budget in machine
+    cycles and the breakpoints, if any, and returns the cycles taken."""
+    leaves = [leaf_source(OPCODES[opcode]) for opcode in range(0x100)]
+    cb_leaves = [leaf_source(OPCODES[CB | opcode]) for opcode in range(0x100)]
+    leaves[0xCB] = 'cb = mem[PC + 1]\n' + tree_source('cb', cb_leaves, 0, 0x100)
+
+    source = 'mem = s.memory\n'
+    for register in REGISTERS:
+        source += '{0} = s.{0}\n'.format(register)
+    source += 'elapsed = 0\n'
+    source += 'while elapsed < budget:\n'
+    source += codegen.indent(
+        'op = mem[PC]\n' +
+        tree_source('op', leaves, 0, 0x100) +
+        'if breakpoints and PC in breakpoints:\n'
+        '    s.breakpoint_hit = True\n'
+        '    break\n'
+    )
+    for register in REGISTERS:
+        source += 's.{0} = {0}\n'.format(register)
+    source += 'return elapsed\n'
+
+    return 'def {}(s, budget, breakpoints=None):\n{}'.format(name, codegen.indent(source.rstrip('\n')))
+
+def loop():
+    """The shared loop function."""
+    global _loop
+    if _loop is None:
+        _loop = codegen.compile_function('run_loop', loop_source(), codegen.namespace())
+    return _loop
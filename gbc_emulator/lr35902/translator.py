@@ -0,0 +1,220 @@
+"""Basic-block translation for the LR35902.
+
+A block is a straight-line run of instructions starting at some PC, compiled
+into one Python function built from the same opcode bodies as the single
+instruction handlers in gbc_emulator.lr35902.codegen. Registers are loaded
+into locals once per block, operands are baked in as constants and the cycle
+count is precomputed.
+
+A block ends after the first instruction that changes control flow, writes
+memory or touches CPU state other than registers, so interrupts are still
+serviced on the same instruction boundaries as when stepping one
+instruction at a time.
+"""
+import ast
+from collections import OrderedDict
+from gbc_emulator.lr35902 import codegen
+from gbc_emulator.lr35902.instructions import OPCODES
+from gbc_emulator.lr35902.instructions.spec import CB
+
+# Longest block, in instructions
+MAX_BLOCK_LENGTH = 32
+
+def uses_cpu_state(op):
+    """True if an opcode touches CPU state other than registers."""
+    tree = ast.parse(op.body)
+    return any(isinstance(node, ast.Name) and node.id == 's' for node in ast.walk(tree))
+
+def writes_memory(op):
+    """True if an opcode writes memory."""
+    tree = ast.parse(op.body)
+    for node in ast.walk(tree):
+        if (
+                isinstance(node, ast.Subscript) and
+                not isinstance(node.ctx, ast.Load) and
+                isinstance(node.value, ast.Name) and
+                node.value.id == 'mem'
+            ):
+            return True
+    return False
+
+def has_side_effects(op):
+    """True if an opcode writes memory or touches CPU state other than
+    registers."""
+    return uses_cpu_state(op) or writes_memory(op)
+
+def ends_block(op):
+    """True if a block has to stop after this opcode."""
+    if has_side_effects(op):
+        return True
+    tree = ast.parse(op.body)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id == 'PC' and not isinstance(node.ctx, ast.Load):
+            return True # Control flow
+    return False
+
+ENDS_BLOCK = [op is not None and ends_block(op) for op in OPCODES]
+SIDE_EFFECTS = [op is not None and has_side_effects(op) for op in OPCODES]
+
+def block_source(name, instructions, lazy_flags=False):
+    """Python source for a block. instructions is a list of (address, op,
+    operand bytes)."""
+    parts = []
+    duration = 0
+    end = instructions[0][0]
+
+    for address, op, operands in instructions:
+        used = codegen.analyze(op.body)[0]
+        end = (address + op.length_in_bytes) & 0xFFFF
+        duration += op.duration_in_cycles // 4
+
+        part = ''
+        if 'PC' in used:
+            part += 'PC = 0x{:04X}\n'.format(end)
+        if 'n8' in used:
+            part += 'n8 = 0x{:02X}\n'.format(operands[0])
+        if 'e8' in used:
+            part += 'e8 = {}\n'.format(operands[0] - ((operands[0] & 0x80) << 1))
+        if 'n16' in used:
+            part += 'n16 = 0x{:04X}\n'.format(operands[0] | (operands[1] << 8))
+        parts.append(part + op.body.strip('\n') + '\n')
+
+    used, loads, body, stores = codegen.frame(parts, lazy_flags)
+
+    source = loads
+    if 'cycles' in used:
+        source += 'cycles = {}\n'.format(duration)
+
+    source += body
+    source += stores
+    if 'PC' in codegen.analyze(body)[1]:
+        source += 's.PC = PC\n'
+    else:
+        source += 's.PC = 0x{:04X}\n'.format(end)
+
+    if 'cycles' in used:
+        source += 'return cycles\n'
+    else:
+        source += 'return {}\n'.format(duration)
+
+    return 'def {}(s):\n{}'.format(name, codegen.indent(source.rstrip('\n')))
+
+class BlockCache:
+    """Translated blocks keyed by (bank, PC), evicted least recently used
+    first once there are more than size of them.
+
+    Blocks in RAM are only translated when memory, a
+    gbc_emulator.memory.Memory, is given to report writes to them, and are
+    dropped as soon as any of their bytes are written. Cartridge RAM is
+    never translated, as its banks can be switched. Blocks in ROM never
+    need invalidating, except that Memory still lets 0x0000-0x7FFF be
+    written like RAM, so they are watched too while watch_rom is set.
+    """
+    def __init__(self, size=4096, memory=None):
+        self.size = size
+        self.blocks = OrderedDict()
+
+        # Returns the ROM bank mapped at 0x4000-0x7FFF
+        self.rom_bank = lambda: 1
+
+        # Addresses holding watched code, and the blocks using them
+        self.memory = memory
+        self.watch_rom = memory is not None
+        self.watched = {}
+        self.ranges = {}
+        if memory is not None:
+            memory.code_written = self.invalidate
+
+    def cacheable(self, address):
+        if address < 0x8000:
+            return True # ROM
+        if self.memory is None or 0xA000 <= address < 0xC000:
+            # Cartridge RAM is left out, as switching or disabling its banks
+            # changes the code there without writing it.
+            return False
+        return address < 0xFF00 or 0xFF80 <= address < 0xFFFF # RAM or HRAM
+
+    def execute(self, cpu):
+        """Run the block at PC, translating it first if needed. Returns the
+        machine cycles taken."""
+        pc = cpu.PC
+        key = (self.rom_bank() if 0x4000 <= pc < 0x8000 else 0, pc)
+
+        block = self.blocks.get(key)
+        if block is not None:
+            self.blocks.move_to_end(key)
+            return block(cpu)
+
+        if self.cacheable(pc):
+            block = self.translate(cpu, key)
+            if block is not None:
+                return block(cpu)
+
+        return cpu.handlers[cpu.memory[pc]](cpu)
+
+    def translate(self, cpu, key):
+        mem = cpu.memory
+        start = key[1]
+        address = start
+        instructions = []
+
+        while len(instructions) < MAX_BLOCK_LENGTH:
+            opcode = mem[address]
+            if opcode == 0xCB:
+                opcode = CB | mem[(address + 1) & 0xFFFF]
+
+            op = OPCODES[opcode]
+            if op is None:
+                break # Let the handler raise when it is reached
+
+            operands = [mem[(address + offset) & 0xFFFF] for offset in range(1, op.length_in_bytes)]
+            if opcode & CB:
+                operands = operands[1:]
+            instructions.append((address, op, operands))
+
+            following = address + op.length_in_bytes
+            if ENDS_BLOCK[opcode] or (following >> 14) != (start >> 14) or not self.cacheable(following):
+                break
+            address = following
+
+        if not instructions:
+            return None
+
+        name = 'block_{:x}_{:04x}'.format(*key)
+        source = block_source(name, instructions, cpu.lazy_flags)
+        block = codegen.compile_function(name, source, codegen.namespace())
+
+        if len(self.blocks) >= self.size:
+            self.discard(next(iter(self.blocks)))
+        self.blocks[key] = block
+
+        if start >= 0x8000 or self.watch_rom:
+            end = instructions[-1][0] + instructions[-1][1].length_in_bytes
+            self.ranges[key] = (start, end)
+            for address in range(start, end):
+                self.watched.setdefault(address, set()).add(key)
+                self.memory.watch(address)
+
+        return block
+
+    def discard(self, key):
+        del self.blocks[key]
+
+        if key in self.ranges:
+            start, end = self.ranges.pop(key)
+            for address in range(start, end):
+                keys = self.watched[address]
+                keys.discard(key)
+                if not keys:
+                    del self.watched[address]
+                    self.memory.unwatch(address)
+
+    def invalidate(self, address):
+        """Drop every block containing address. Called by Memory on writes
+        to watched addresses."""
+        for key in list(self.watched.get(address, ())):
+            self.discard(key)
+
+    def clear(self):
+        for key in list(self.blocks):
+            self.discard(key)
@@ -9,15 +9,228 @@ class Memory:
         PPU = 3
 
     class Port:
+        """A view of memory through a page table per direction. Each of the
+        256 entries covers 256 addresses and is indexed by the full address:
+        either the backing bytearray itself, or a handler for pages with
+        side effects. Ports differ only in the tables they are bound to.
+
+        reads and writes are the tables in use: page_reads and page_writes,
+        unless the port is locked out of the bus."""
         def __init__(self, port_type, memory):
             self.port_type = port_type
             self.memory = memory
+            self.page_reads = [memory.physical_memory] * 256
+            self.pages = memory.write_pages(port_type) # Before watches
+            self.page_writes = list(self.pages)
+            self.reads = self.page_reads
+            self.writes = self.page_writes
+            self.kept = None # The page left open while locked
+
+        def lock(self, keep):
+            """Cut the port off from every page but keep, until unlock().
+            Reads give 0xFF and writes are dropped."""
+            self.kept = keep
+            self.reads = [Memory.LOCKED_PAGE] * 256
+            self.writes = [Memory.LOCKED_PAGE] * 256
+            self.reads[keep] = self.page_reads[keep]
+            self.writes[keep] = self.page_writes[keep]
+
+        def unlock(self):
+            self.kept = None
+            self.reads = self.page_reads
+            self.writes = self.page_writes
+
+        def bind(self, page, handler):
+            """Set the write handler of a page, in the table in use too if
+            the port is locked but keeps the page."""
+            self.page_writes[page] = handler
+            if page == self.kept:
+                self.writes[page] = handler
 
         def __setitem__(self, index, value):
-            self.memory.__setitem__(index, value, port_type=self.port_type)
+            self.writes[index >> 8][index] = value
 
         def __getitem__(self, index):
-            return self.memory.__getitem__(index, port_type=self.port_type)
+            return self.reads[index >> 8][index]
+
+        def read(self, start, end):
+            """Bytes start to end - 1, a page at a time."""
+            data = bytearray()
+            while start < end:
+                stop = min(end, (start | 0xFF) + 1)
+                page = self.reads[start >> 8]
+                if isinstance(page, (bytearray, memoryview)):
+                    data += page[start:stop]
+                else:
+                    data += bytes(page[address] for address in range(start, stop))
+                start = stop
+            return data
+
+    class LockedPage:
+        def __getitem__(self, index):
+            return 0xFF
+
+        def __setitem__(self, index, value):
+            pass
+
+    class ReadOnlyPage:
+        def __setitem__(self, index, value):
+            raise RuntimeError("An AUDIT port can not change memory.")
+
+    class IOPage:
+        """Writes to 0xFF00-0xFFFF, the I/O registers, HRAM and IE."""
+        def __init__(self, memory, port_type):
+            self.memory = memory
+            self.physical_memory = memory.physical_memory
+            self.cpu = port_type == Memory.PortType.CPU
+
+        def __setitem__(self, index, value):
+            if (Memory.REGISTER_DIV <= index <= Memory.REGISTER_TAC) and self.cpu:
+                self.write_timer(index, value)
+            elif index == 0xFF02:
+                if value == 0x81:
+                    char = str(chr(self.physical_memory[0xFF01]))
+                    self.memory.pubsub.publish("serial/out", char)
+
+            elif (index == Memory.REGISTER_STAT) and self.cpu:
+                # The mode and coincidence flag are read only
+                self.physical_memory[index] = (value & 0x78) | (self.physical_memory[index] & 0x07)
+            elif index == Memory.REGISTER_DMA:
+                self.physical_memory[index] = value
+                self.memory.dma(value)
+            elif index == Memory.REGISTER_BOOTLOADER_DISABLED:
+                self.physical_memory[index] = value
+                if value:
+                    self.memory.unmap_bootloader()
+            else:
+                self.physical_memory[index] = value
+
+                if (
+                        (index == Memory.REGISTER_IF or index == Memory.REGISTER_IE) and
+                        self.memory.interrupts_written is not None
+                    ):
+                    self.memory.interrupts_written()
+
+        def write_timer(self, index, value):
+            memory = self.memory
+            if memory.timer_sync is not None:
+                memory.timer_sync() # Counts up to now under the old values
+
+            if index == Memory.REGISTER_DIV:
+                value = 0x00 # Zeros when written to by CPU.
+            self.physical_memory[index] = value
+
+            if memory.timer_synced is not None:
+                memory.timer_synced()
+
+    class TimerPage:
+        """Reads of 0xFF00-0xFFFF, syncing the timer first for 0xFF04-0xFF07.
+        Only bound for the CPU port, once a timer is attached."""
+        def __init__(self, memory):
+            self.memory = memory
+            self.physical_memory = memory.physical_memory
+
+        def __getitem__(self, index):
+            if Memory.REGISTER_DIV <= index <= Memory.REGISTER_TAC:
+                self.memory.timer_sync()
+            return self.physical_memory[index]
+
+    class TimerViewPage:
+        """Reads of 0xFF00-0xFFFF, with 0xFF04-0xFF07 as a synced read would
+        give them, but leaving the timer as it is. Bound for the AUDIT port,
+        read from other threads than the CPU's."""
+        def __init__(self, memory):
+            self.memory = memory
+            self.physical_memory = memory.physical_memory
+
+        def __getitem__(self, index):
+            if Memory.REGISTER_DIV <= index <= Memory.REGISTER_TAC:
+                return self.memory.timer_peek(index)
+            return self.physical_memory[index]
+
+    class VideoPage:
+        """Writes to VRAM or OAM, marked in every VideoDirty tracking them.
+        Only bound while something is tracking."""
+        def __init__(self, memory):
+            self.memory = memory
+            self.physical_memory = memory.physical_memory
+
+        def __setitem__(self, index, value):
+            if self.physical_memory[index] != value:
+                self.physical_memory[index] = value
+                for dirty in self.memory.video_trackers:
+                    dirty.mark(index)
+
+    class VideoDirty:
+        """What changed in VRAM and OAM since a consumer last looked: a flag
+        per 16 byte tile in 0x8000-0x97FF, per 32 byte row of the two tile
+        maps in 0x9800-0x9FFF, and one for OAM. Everything starts dirty."""
+        TILES = 384
+        TILEMAP_ROWS = 64 # Map 0, then map 1
+
+        def __init__(self):
+            self.tiles = bytearray(b'\x01' * Memory.VideoDirty.TILES)
+            self.tilemap_rows = bytearray(b'\x01' * Memory.VideoDirty.TILEMAP_ROWS)
+            self.oam = True
+
+        def mark(self, index):
+            if index < 0x9800:
+                self.tiles[(index - 0x8000) >> 4] = 1
+            elif index < 0xA000:
+                self.tilemap_rows[(index - 0x9800) >> 5] = 1
+            elif index < 0xFEA0:
+                self.oam = True
+
+        def take_tiles(self):
+            """Tiles written since the last call."""
+            tiles = [tile for tile, flag in enumerate(self.tiles) if flag]
+            self.tiles[:] = bytes(Memory.VideoDirty.TILES)
+            return tiles
+
+        def take_tilemap_rows(self):
+            """Tile map rows written since the last call."""
+            rows = [row for row, flag in enumerate(self.tilemap_rows) if flag]
+            self.tilemap_rows[:] = bytes(Memory.VideoDirty.TILEMAP_ROWS)
+            return rows
+
+        def take_oam(self):
+            """Whether OAM was written since the last call."""
+            oam, self.oam = self.oam, False
+            return oam
+
+    class WatchedPage:
+        """Writes to a page holding translated code."""
+        def __init__(self, memory, page):
+            self.memory = memory
+            self.page = page
+
+        def __setitem__(self, index, value):
+            if self.memory.code_watch[index]:
+                self.memory.code_written(index)
+            self.page[index] = value
+
+    class CopyOnWritePage:
+        """First write to a page since the last snapshot. The page is marked
+        for copying at the next snapshot, then writes go straight through."""
+        def __init__(self, memory, page, handler):
+            self.memory = memory
+            self.page = page
+            self.handler = handler
+
+        def __setitem__(self, index, value):
+            self.memory.touch(self.page)
+            self.handler[index] = value
+
+    class VerbosePage:
+        """Writes printed, and recorded in last_addr, while verbose is set."""
+        def __init__(self, memory, page):
+            self.memory = memory
+            self.page = page
+
+        def __setitem__(self, index, value):
+            self.memory.last_addr = index
+            print("memory[{}] = {} ({})".format(hex(index), hex(value), str(chr(value))))
+            self.page[index] = value
 
     BOOTLOADER = (
         0x31, 0xfe, 0xff, 0xaf, 0x21, 0xff, 0x9f, 0x32, 0xcb, 0x7c, 0x20, 0xfb, 0x21, 0x26, 0xff, 0x0e,
@@ -38,6 +251,13 @@ class Memory:
         0xf5, 0x06, 0x19, 0x78, 0x86, 0x23, 0x05, 0x20, 0xfb, 0x86, 0x20, 0xfe, 0x3e, 0x01, 0xe0, 0x50,
     )
 
+    # Indexed by address, as a page table entry
+    BOOTLOADER_PAGE = bytes(BOOTLOADER)
+    LOCKED_PAGE = LockedPage()
+
+    # Machine cycles the CPU is locked out of all but 0xFF00-0xFFFF by OAM DMA
+    DMA_CYCLES = 160
+
     # Register Map
     # https://youtu.be/HyzD8pNlpwI?t=1320
     # Interrupt Controller
@@ -70,49 +290,249 @@ class Memory:
     REGISTER_WY = 0xFF4A # Window Y Position
     REGISTER_WX = 0xFF4B # Window X Postion minus 7
 
+    # Regions, as (start, end) addresses
+    REGION_ROM = (0x0000, 0x8000) # Cartridge ROM
+    REGION_VRAM = (0x8000, 0xA000) # Video RAM
+    REGION_WRAM = (0xC000, 0xE000) # Work RAM
+    REGION_OAM = (0xFE00, 0xFEA0) # Object Attribute Memory
+    REGION_IO = (0xFF00, 0xFF80) # I/O Registers
+    REGION_HRAM = (0xFF80, 0xFFFF) # High RAM
+
     # TODO: Serial Data Transfer
 
     # TODO: Sound Controller
 
     def __init__(self, pubsub):
-        self.physical_memory = [0] * 2**16
-        self.verbose = False
+        self.physical_memory = bytearray(2**16)
+
+        # Views sharing physical_memory, for reading whole regions at once
+        # rather than a byte at a time through a Port. Nothing is copied,
+        # and they see every write. Writes through them skip the side
+        # effects of a Port. Pages mapped elsewhere, like a Cartridge, are
+        # not seen here; Port.read() follows the page tables.
+        self.view = memoryview(self.physical_memory)
+        self.rom = self.view[slice(*Memory.REGION_ROM)]
+        self.vram = self.view[slice(*Memory.REGION_VRAM)]
+        self.wram = self.view[slice(*Memory.REGION_WRAM)]
+        self.oam = self.view[slice(*Memory.REGION_OAM)]
+        self.io = self.view[slice(*Memory.REGION_IO)]
+        self.hram = self.view[slice(*Memory.REGION_HRAM)]
+        self._verbose = False
         self.pubsub = pubsub
 
         # Last addr is used to mark the immediate value for rendering on the
-        # GUI.
+        # GUI. Only kept while verbose is set.
         self.last_addr = 0
 
+        # Addresses holding translated code, the number of them in each page,
+        # and who to tell when they are written. See
+        # gbc_emulator.lr35902.translator.
+        self.code_watch = bytearray(2**16)
+        self.page_watch = [0] * 256
+        self.code_written = None
+
+        # Pages of the last snapshot, as bytes, while snapshots are taken,
+        # and which pages were written since
+        self.snapshot = None
+        self.touched = bytearray(256)
+
+        # VideoDirty trackers of VRAM and OAM writes
+        self.video_trackers = []
+
+        # gbc_emulator.scheduler.Scheduler ending OAM DMA bus lockouts, if
+        # they are modelled
+        self.scheduler = None
+        self.dma_count = 0
+
+        # Page 0 entry under the bootloader while it is mapped, and who to
+        # tell when it is unmapped.
+        self.under_bootloader = None
+        self.bootloader_unmapped = None
+
+        # Who to tell when IE or IF are written. See
+        # gbc_emulator.lr35902.LR35902.update_interrupts().
+        self.interrupts_written = None
+
+        # Who to call before the CPU reads or writes the timer registers, and
+        # after it writes them. See attach_timer().
+        self.timer_sync = None
+        self.timer_synced = None
+        self.timer_peek = None
+
         self.audit_port = Memory.Port(Memory.PortType.AUDIT, self)
         self.cpu_port = Memory.Port(Memory.PortType.CPU, self)
         self.timer_port = Memory.Port(Memory.PortType.TIMER, self)
         self.ppu_port = Memory.Port(Memory.PortType.PPU, self)
+        self.ports = (self.cpu_port, self.timer_port, self.ppu_port) # Writable
 
         self.pubsub.publish("serial/control", "reset")
 
-    def __setitem__(self, index, value, port_type):
+    def write_pages(self, port_type):
+        """Write page table of a port, before any code is watched."""
         if port_type == Memory.PortType.AUDIT: # AUDIT can not change memory.
-            raise RuntimeError("An AUDIT port can not change memory.")
+            return [Memory.ReadOnlyPage()] * 256
+
+        return [self.physical_memory] * 0xFF + [Memory.IOPage(self, port_type)]
+
+    def map(self, first, last, reads=None, writes=None):
+        """Point pages first to last - 1 at new entries, indexed by the full
+        address: reads for every port, writes for the writable ones."""
+        if reads is not None:
+            if first == 0 and self.under_bootloader is not None:
+                self.under_bootloader = reads # Stays under the bootloader
+                first = 1
+            entries = [reads] * (last - first)
+            self.audit_port.page_reads[first:last] = entries
+            for port in self.ports:
+                port.page_reads[first:last] = entries
+        if writes is not None:
+            for port in self.ports:
+                port.pages[first:last] = [writes] * (last - first)
+            for page in range(first, last):
+                self.bind(page)
+
+    def attach_timer(self, sync, synced, peek):
+        """Call sync before the CPU reads or writes 0xFF04-0xFF07, and synced
+        after it writes them, for a timer that only works its registers out
+        when they are looked at. Audit reads of them give peek(address),
+        which must not change the timer."""
+        self.timer_sync = sync
+        self.timer_synced = synced
+        self.timer_peek = peek
+        self.cpu_port.page_reads[0xFF] = Memory.TimerPage(self)
+        self.audit_port.page_reads[0xFF] = Memory.TimerViewPage(self)
+
+    def track_video(self):
+        """A new Memory.VideoDirty, marked by every later VRAM and OAM
+        write."""
+        dirty = Memory.VideoDirty()
+        if not self.video_trackers:
+            video = Memory.VideoPage(self)
+            self.map(0x80, 0xA0, writes=video)
+            self.map(0xFE, 0xFF, writes=video)
+        self.video_trackers.append(dirty)
+        return dirty
+
+    def dma(self, value):
+        """OAM DMA from value << 8, copied in one go. The CPU is then locked
+        out of the bus, but for HRAM and the I/O registers, until a single
+        event DMA_CYCLES later."""
+        source = value << 8
+        if source >= 0xE000:
+            source -= 0x2000 # Echo of WRAM
+        self.oam[:] = self.audit_port.read(source, source + len(self.oam))
+        self.touch(Memory.REGION_OAM[0] >> 8)
+        for dirty in self.video_trackers:
+            dirty.oam = True
+
+        if self.scheduler is not None:
+            self.dma_count += 1
+            count = self.dma_count
+            self.cpu_port.lock(0xFF)
+            self.scheduler.schedule(Memory.DMA_CYCLES, lambda: self.dma_done(count))
+
+    def dma_done(self, count):
+        if count == self.dma_count: # Not restarted since
+            self.cpu_port.unlock()
 
-        self.last_addr = index
+    def map_bootloader(self):
+        """Overlay the bootloader on 0x0000-0x00FF until 0xFF50 is written.
+        Reads pay nothing extra for it."""
+        if self.under_bootloader is None:
+            self.under_bootloader = self.audit_port.page_reads[0x00]
+            self.physical_memory[Memory.REGISTER_BOOTLOADER_DISABLED] = 0x00
+            for port in (self.audit_port,) + self.ports:
+                port.page_reads[0x00] = Memory.BOOTLOADER_PAGE
 
-        if index == 0xFF02:
-            if value == 0x81:
-                char = str(chr(self.physical_memory[0xFF01]))
-                self.pubsub.publish("serial/out", char)
+    def unmap_bootloader(self):
+        if self.under_bootloader is not None:
+            for port in (self.audit_port,) + self.ports:
+                port.page_reads[0x00] = self.under_bootloader
+            self.under_bootloader = None
 
-        elif (index == Memory.REGISTER_DIV) and (port_type == Memory.PortType.CPU):
-            self.physical_memory[index] = 0x00 # Zeros when written to by CPU.
+            if self.bootloader_unmapped is not None:
+                self.bootloader_unmapped()
+
+    def bind(self, page):
+        """Point the write tables of the ports at the handlers a page needs."""
+        for port in self.ports:
+            handler = port.pages[page]
+            if self.page_watch[page]:
+                handler = Memory.WatchedPage(self, handler)
+            if self.snapshot is not None and not self.touched[page]:
+                handler = Memory.CopyOnWritePage(self, page, handler)
+            if self._verbose:
+                handler = Memory.VerbosePage(self, handler)
+            port.bind(page, handler)
+
+    def watch(self, address):
+        """Report writes to address to code_written."""
+        if not self.code_watch[address]:
+            self.code_watch[address] = 1
+            self.page_watch[address >> 8] += 1
+            if self.page_watch[address >> 8] == 1:
+                self.bind(address >> 8)
+
+    def unwatch(self, address):
+        if self.code_watch[address]:
+            self.code_watch[address] = 0
+            self.page_watch[address >> 8] -= 1
+            if self.page_watch[address >> 8] == 0:
+                self.bind(address >> 8)
+
+    def touch(self, page):
+        """Mark a page written since the last snapshot."""
+        if not self.touched[page]:
+            self.touched[page] = 1
+            if self.snapshot is not None:
+                self.bind(page) # Drop the CopyOnWritePage
+
+    def take_snapshot(self):
+        """The address space as a tuple of 256 pages of bytes. Only pages
+        written since the last snapshot are copied, the rest are shared
+        with it."""
+        view = self.view
+        if self.snapshot is None:
+            pages = [bytes(view[page << 8:(page + 1) << 8]) for page in range(256)]
+            touched = range(256)
         else:
-            if self.verbose:
-                print("memory[{}] = {} ({})".format(hex(index), hex(value), str(chr(value))))
-            self.physical_memory[index] = value
+            pages = list(self.snapshot)
+            touched = [page for page, flag in enumerate(self.touched) if flag]
+            for page in touched:
+                pages[page] = bytes(view[page << 8:(page + 1) << 8])
+
+        self.snapshot = tuple(pages)
+        self.touched[:] = bytes(256)
+        for page in touched:
+            self.bind(page) # Copy on the next write
+        return self.snapshot
+
+    def restore_snapshot(self, pages):
+        """Put back the address space from take_snapshot(). Translated code
+        and video trackers are told about the pages that change."""
+        memory = self.physical_memory
+        for page, data in enumerate(pages):
+            start = page << 8
+            if memory[start:start + 0x100] == data:
+                continue
+
+            memory[start:start + 0x100] = data
+            self.touch(page)
+            if self.page_watch[page]:
+                for address in range(start, start + 0x100):
+                    if self.code_watch[address]:
+                        self.code_written(address)
+            if 0x80 <= page < 0xA0 or page == 0xFE:
+                for dirty in self.video_trackers:
+                    for address in range(start, start + 0x100, 0x10):
+                        dirty.mark(address)
+
+    @property
+    def verbose(self):
+        return self._verbose
 
-    def __getitem__(self, index, port_type):
-        # if port_type == Memory.PortType.AUDIT:
-        #     self.last_addr = index
-        #
-        # if index <= 0xFF and not self.physical_memory[Memory.REGISTER_BOOTLOADER_DISABLED]:
-        #     return Memory.BOOTLOADER[index]
-        # else:
-        return self.physical_memory[index]
+    @verbose.setter
+    def verbose(self, verbose):
+        self._verbose = verbose
+        for page in range(256):
+            self.bind(page)
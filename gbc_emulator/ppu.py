@@ -1,5 +1,7 @@
+import numpy as np
 from gbc_emulator.memory import Memory
 from gbc_emulator.lr35902 import LR35902
+from gbc_emulator.tile_cache import TileCache
 
 class PPU:
     MODE_HBLANK = 0
@@ -7,16 +9,161 @@ class PPU:
     MODE_OAM_SEARCH = 2
     MODE_ACTIVE_PICTURE = 3
 
-    def __init__(self, memory):
+    SCREEN_WIDTH, SCREEN_HEIGHT = 160, 144
+    SPRITES_PER_LINE = 10
+
+    # Shades of the 4 colors of each palette register value, 0 the lightest
+    PALETTES = ((np.arange(256)[:, None] >> np.array([0, 2, 4, 6])) & 0x3).astype(np.uint8)
+
+    # RGB of each shade, greens like the DMG's screen
+    SHADES = np.array([
+        (155, 188, 15),
+        (139, 172, 15),
+        (48, 98, 48),
+        (15, 56, 15),
+    ], dtype=np.uint8)
+
+    def __init__(self, memory, scheduler=None):
         self.memory = memory
+        self.scheduler = scheduler
         self.mode = PPU.MODE_OAM_SEARCH
         self.wait = 0
         self.line = 0
-        self.frame = [(0, 0, 0)] * 160 * 144
+        self.synced = 0 # Scheduler cycle the PPU is up to date with
+        self.window_line = 0 # Line of the window drawn next
+
+        # Shades, drawn a line at a time at the end of its active picture,
+        # unless drawing is off, and who to tell as each frame ends. Kept
+        # as 1 byte a pixel, with the palettes already applied, and only
+        # turned into RGB by rgb().
+        self.frame = np.zeros((PPU.SCREEN_HEIGHT, PPU.SCREEN_WIDTH), dtype=np.uint8)
+        self.drawing = True
+        self.frame_done = None
+
+        # The whole address space, to draw from in bulk. VRAM, OAM and the
+        # registers are never mapped elsewhere.
+        self.physical_memory = memory.memory.physical_memory
+        self.ram = np.frombuffer(self.physical_memory, dtype=np.uint8)
+        self.tile_cache = TileCache(memory.memory)
 
         self.DEBUG_last_mode = self.mode
         self.DEBUG_cycles = 0
 
+        if scheduler is not None:
+            self.schedule_transition()
+
+    # Length of each mode in dots
+    MODE_LENGTHS = {
+        MODE_HBLANK: 204,
+        MODE_VBLANK: 4560,
+        MODE_OAM_SEARCH: 80,
+        MODE_ACTIVE_PICTURE: 172,
+    }
+
+    def sync(self):
+        """Bring the PPU up to the cycle the scheduler is at."""
+        if self.scheduler is None:
+            return
+
+        cycles = self.scheduler.cycles - self.synced
+        if cycles:
+            self.synced += cycles
+            self.advance(cycles * 4)
+
+    def schedule_transition(self):
+        """Schedule the next change of mode or LY. Every mode lasts a whole
+        number of machine cycles. Skippable, as sync() crosses any number of
+        transitions at once, and the VBLANK interrupt is found by
+        dots_until_vblank()."""
+        cycles = -(-self.dots_until_transition() // 4)
+        self.scheduler.schedule(cycles, self.transition, skippable=True)
+
+    def transition(self):
+        self.sync()
+        self.schedule_transition()
+
+    def restart(self, mode, line, wait):
+        """Carry on from wait dots into mode on line, as of now, in place of
+        wherever the PPU was. LY and STAT are left as they are."""
+        self.mode = mode
+        self.line = line
+        self.wait = wait
+        self.window_line = 0
+        if self.scheduler is not None:
+            self.synced = self.scheduler.cycles
+            self.scheduler.cancel(self.transition)
+            self.schedule_transition()
+
+    def advance(self, dots):
+        """Catch the PPU up by a number of dots in one go.
+
+        Equivalent to calling clock() that many times, but only does work at
+        mode transitions.
+        """
+        while dots > 0:
+            if self.mode == PPU.MODE_VBLANK:
+                end = (self.wait // PPU.LINE_DOTS + 1) * PPU.LINE_DOTS # LY changes
+            else:
+                end = PPU.MODE_LENGTHS[self.mode]
+            step = min(dots, end - self.wait - 1)
+            self.wait += step
+            self.DEBUG_cycles += step
+            dots -= step
+
+            if dots > 0:
+                self.clock()
+                dots -= 1
+
+    # Dots from the start of a line's active picture to the start of the next
+    LINE_LENGTH = MODE_LENGTHS[MODE_ACTIVE_PICTURE] + MODE_LENGTHS[MODE_HBLANK]
+
+    # Dots per line in VBLANK, as LY counts through it
+    LINE_DOTS = MODE_LENGTHS[MODE_OAM_SEARCH] + LINE_LENGTH
+
+    # Line at which the PPU enters VBLANK
+    VBLANK_LINE = SCREEN_HEIGHT
+
+    def dots_until_transition(self):
+        """Number of dots until the clock() that changes the mode or LY."""
+        self.sync()
+        if self.mode == PPU.MODE_VBLANK:
+            return PPU.LINE_DOTS - self.wait % PPU.LINE_DOTS
+        return PPU.MODE_LENGTHS[self.mode] - self.wait
+
+    def dots_until_vblank(self):
+        """Number of dots until the clock() that enters VBLANK, and may
+        request the VBLANK interrupt."""
+        self.sync()
+        dots = PPU.MODE_LENGTHS[self.mode] - self.wait
+        line = self.line
+
+        # Finish the current line
+        if self.mode == PPU.MODE_VBLANK:
+            dots += PPU.MODE_LENGTHS[PPU.MODE_OAM_SEARCH] + PPU.LINE_LENGTH
+            line = 0
+        elif self.mode == PPU.MODE_OAM_SEARCH:
+            dots += PPU.LINE_LENGTH
+        elif self.mode == PPU.MODE_ACTIVE_PICTURE:
+            dots += PPU.MODE_LENGTHS[PPU.MODE_HBLANK]
+
+        line += 1
+        if line < PPU.VBLANK_LINE:
+            dots += (PPU.VBLANK_LINE - line) * PPU.LINE_LENGTH
+        return dots
+
+    def dots_until_line_change(self):
+        """Number of dots until the clock() that changes LY."""
+        self.sync()
+        if self.mode == PPU.MODE_VBLANK:
+            return PPU.LINE_DOTS - self.wait % PPU.LINE_DOTS
+
+        dots = PPU.MODE_LENGTHS[self.mode] - self.wait
+        if self.mode == PPU.MODE_OAM_SEARCH:
+            dots += PPU.LINE_LENGTH
+        elif self.mode == PPU.MODE_ACTIVE_PICTURE:
+            dots += PPU.MODE_LENGTHS[PPU.MODE_HBLANK]
+        return dots
+
     def clock(self):
         self.wait += 1
 
@@ -28,31 +175,140 @@ class PPU:
         if self.mode == PPU.MODE_HBLANK:
             if self.wait == 204:
                 self.wait = 0
-                self.line += 1
+                self.set_line(self.line + 1)
 
-                if self.line >= 143:
+                if self.line >= PPU.VBLANK_LINE:
                     # print('VBLANK')
                     if self.memory[Memory.REGISTER_IE] << LR35902.INTERRUPT_VBLANK:
                         # print('VBLANK INTERRUPT')
                         self.memory[Memory.REGISTER_IF] |= (1 << LR35902.INTERRUPT_VBLANK)
-                    self.mode = PPU.MODE_VBLANK
+                    self.set_mode(PPU.MODE_VBLANK)
+                    if self.frame_done is not None:
+                        self.frame_done()
                 else:
-                    self.mode = PPU.MODE_ACTIVE_PICTURE
+                    self.set_mode(PPU.MODE_ACTIVE_PICTURE)
         elif self.mode == PPU.MODE_VBLANK:
             if self.wait == 4560:
                 self.wait = 0
-                self.line = 0
-                self.mode = PPU.MODE_OAM_SEARCH
+                self.window_line = 0
+                self.set_line(0)
+                self.set_mode(PPU.MODE_OAM_SEARCH)
+            elif self.wait % PPU.LINE_DOTS == 0:
+                self.set_line(self.line + 1)
         elif self.mode == PPU.MODE_OAM_SEARCH:
             if self.wait == 80:
                 self.wait = 0
-                self.mode = PPU.MODE_ACTIVE_PICTURE
+                self.set_mode(PPU.MODE_ACTIVE_PICTURE)
         elif self.mode == PPU.MODE_ACTIVE_PICTURE:
             if self.wait == 172:
                 self.wait = 0
-                # Render a line
-                # y = self.line - 1
-                # for x_bytes in range(160 * 2):
-                #
+                if self.drawing:
+                    self.render_line()
+                self.set_mode(PPU.MODE_HBLANK)
+
+    def set_mode(self, mode):
+        """Enter mode, shown in the low 2 bits of STAT."""
+        self.mode = mode
+        self.memory[Memory.REGISTER_STAT] = (self.memory[Memory.REGISTER_STAT] & 0xFC) | mode
+
+    def set_line(self, line):
+        """Move LY on to line, flagging in STAT whether it matches LYC."""
+        self.line = line
+        self.memory[Memory.REGISTER_LY] = line
+
+        stat = self.memory[Memory.REGISTER_STAT] & 0xFB
+        if line == self.memory[Memory.REGISTER_LYC]:
+            stat |= 0x04 # Coincidence
+        self.memory[Memory.REGISTER_STAT] = stat
+
+    def rgb(self, shades=SHADES):
+        """The frame as a uint8[144, 160, 3] of RGB, by shades, the RGB of
+        each shade."""
+        return shades[self.frame]
+
+    def render_line(self):
+        """Draw the current line into frame: the background, the window over
+        it and up to SPRITES_PER_LINE sprites, a whole line at a time.
+        See GBCPUman.pdf pages 50-58."""
+        physical_memory = self.physical_memory
+        line = self.frame[self.line]
+        lcdc = physical_memory[Memory.REGISTER_LCDC]
+        if not lcdc & 0x80: # LCD off
+            line[:] = 0
+            return
+
+        self.tile_cache.update()
+        colors = np.zeros(PPU.SCREEN_WIDTH, dtype=np.uint8) # Before the palette
+        if lcdc & 0x01: # Background and window on
+            tile_map = 0x9C00 if lcdc & 0x08 else 0x9800
+            y = (self.line + physical_memory[Memory.REGISTER_SCY]) & 0xFF
+            colors[:] = self.tile_pixels(tile_map, physical_memory[Memory.REGISTER_SCX], y, PPU.SCREEN_WIDTH, lcdc)
+
+            left = physical_memory[Memory.REGISTER_WX] - 7
+            if lcdc & 0x20 and self.line >= physical_memory[Memory.REGISTER_WY] and left < PPU.SCREEN_WIDTH:
+                tile_map = 0x9C00 if lcdc & 0x40 else 0x9800
+                start = max(left, 0)
+                count = PPU.SCREEN_WIDTH - start
+                colors[start:] = self.tile_pixels(tile_map, start - left, self.window_line, count, lcdc)
+                self.window_line += 1
+
+        line[:] = PPU.PALETTES[physical_memory[Memory.REGISTER_BGP]][colors]
+
+        if lcdc & 0x02: # Sprites on
+            self.render_sprites(line, colors, lcdc)
+
+    def tile_pixels(self, tile_map, x, y, count, lcdc):
+        """Colors of count pixels from x along row y of the 256x256 pixel
+        tile map at tile_map, wrapping around."""
+        ram = self.ram
+        columns = np.arange(x >> 3, ((x + count - 1) >> 3) + 1) & 0x1F
+        tiles = ram[tile_map + (y >> 3) * 32 + columns]
+        if not lcdc & 0x10: # Signed, from 0x9000
+            tiles = 0x100 + tiles.view(np.int8).astype(np.int32)
+
+        rows = self.tile_cache.tiles[tiles, y & 0x7]
+        start = x & 0x7
+        return rows.ravel()[start:start + count]
+
+    def render_sprites(self, line, colors, lcdc):
+        """Draw the sprites on the current line over line, given the
+        background colors under them."""
+        ram, physical_memory = self.ram, self.physical_memory
+        tiles = self.tile_cache.tiles
+        height = 16 if lcdc & 0x04 else 8
+        oam = ram[slice(*Memory.REGION_OAM)].reshape(40, 4)
+
+        tops = oam[:, 0].astype(np.int32) - 16
+        found = np.flatnonzero((tops <= self.line) & (self.line < tops + height))
+        if not len(found):
+            return
+        found = found[:PPU.SPRITES_PER_LINE]
+
+        # Lower x, then lower OAM index, wins: draw those last
+        palettes = (
+            PPU.PALETTES[physical_memory[Memory.REGISTER_OBP0]],
+            PPU.PALETTES[physical_memory[Memory.REGISTER_OBP1]],
+        )
+        for sprite in found[np.argsort(oam[found, 1], kind='stable')][::-1].tolist():
+            y, x, tile, flags = oam[sprite].tolist()
+            row = self.line - (y - 16)
+            if flags & 0x40: # Y flip
+                row = height - 1 - row
+            if height == 16: # Rows 8-15 are the next tile
+                tile = (tile & 0xFE) + (row >> 3)
+                row &= 0x7
+
+            pixels = tiles[tile, row]
+            if flags & 0x20: # X flip
+                pixels = pixels[::-1]
+
+            left = x - 8
+            start, end = max(left, 0), min(left + 8, PPU.SCREEN_WIDTH)
+            if start >= end:
+                continue
+            pixels = pixels[start - left:end - left]
 
-                self.mode = PPU.MODE_HBLANK
+            shown = pixels != 0
+            if flags & 0x80: # Behind background colors 1-3
+                shown &= colors[start:end] == 0
+            line[start:end][shown] = palettes[(flags >> 4) & 0x1][pixels[shown]]
@@ -50,8 +50,9 @@ def do_reporter(gameboy, mqtt):
                 center = cpu.SP
 
             stack = []
-            for address in range(center - lower_bound, center + upper_bound):
-                stack.append((hexp(address), hexp(memory[address], 2)))
+            start = center - lower_bound
+            for address, value in enumerate(memory.read(start, center + upper_bound), start):
+                stack.append((hexp(address), hexp(value, 2)))
 
             lower_bound = floor(STACK_DEPTH / 2)
             upper_bound = ceil(STACK_DEPTH / 2)
@@ -64,8 +65,9 @@ def do_reporter(gameboy, mqtt):
                 center = cpu.PC
 
             program = []
-            for address in range(center - lower_bound, center + upper_bound):
-                program.append((hexp(address), hexp(memory[address], 2)))
+            start = center - lower_bound
+            for address, value in enumerate(memory.read(start, center + upper_bound), start):
+                program.append((hexp(address), hexp(value, 2)))
 
             payload = {
                 "fps": fps,
@@ -0,0 +1,47 @@
+"""Events due a number of machine cycles from now.
+
+Rather than checking every cycle whether something is due, peripherals
+schedule a callback once, and the Gameboy fires it when it catches up to
+that cycle.
+"""
+import heapq
+
+class Scheduler:
+    def __init__(self):
+        self.cycles = 0 # Machine cycles so far
+        self.events = [] # Heap of (due, order, callback, skippable)
+        self.order = 0 # Keeps events due at once in the order scheduled
+
+    def schedule(self, delay, callback, skippable=False):
+        """Call callback once delay machine cycles have passed.
+
+        Skippable events only keep something in step that catches up in bulk
+        however late they fire, so waits like HALT can run straight past
+        them."""
+        heapq.heappush(self.events, (self.cycles + delay, self.order, callback, skippable))
+        self.order += 1
+
+    def cancel(self, callback):
+        """Drop the events that would call callback."""
+        self.events = [event for event in self.events if event[2] != callback]
+        heapq.heapify(self.events)
+
+    def cycles_until_next(self, skippable=True):
+        """Machine cycles until the next event, leaving out skippable ones
+        unless skippable is set, or None if there are none."""
+        if skippable:
+            if not self.events:
+                return None
+            return self.events[0][0] - self.cycles
+
+        due = [event[0] for event in self.events if not event[3]]
+        if not due:
+            return None
+        return min(due) - self.cycles
+
+    def advance(self, cycles):
+        """Move time on, firing the events that fall due."""
+        self.cycles += cycles
+        events = self.events
+        while events and events[0][0] <= self.cycles:
+            heapq.heappop(events)[2]()
@@ -0,0 +1,64 @@
+"""Snapshots of the whole machine, for save states, rewind and search.
+
+The address space is copied on write a page at a time: taking a snapshot
+copies only the 256 byte pages written since the last one, and shares the
+rest with it, so one can be taken every frame. Cartridge RAM is snapshotted
+the same way. See gbc_emulator.memory.Memory.take_snapshot() and
+gbc_emulator.cartridge.Cartridge.snapshot().
+"""
+CPU_STATE = ('A', 'B', 'C', 'D', 'E', 'H', 'L', 'SP', 'PC', '_f', 'pending_flags', 'wait', 'state')
+TIMER_STATE = ('divider_wait', 'counter_wait', 'synced', 'overflow_count')
+PPU_STATE = ('mode', 'wait', 'line', 'window_line', 'synced')
+
+class Snapshot:
+    def __init__(self, gameboy):
+        memory = gameboy.memory
+        self.pages = memory.take_snapshot()
+        self.bootloader = memory.under_bootloader is not None
+        self.dma = (memory.cpu_port.reads is not memory.cpu_port.page_reads, memory.dma_count)
+
+        cpu = gameboy.cpu
+        self.cpu = [getattr(cpu, name) for name in CPU_STATE]
+        self.interrupts = dict(cpu.interrupts)
+        self.timer = [getattr(gameboy.timer, name) for name in TIMER_STATE]
+        self.ppu = [getattr(gameboy.ppu, name) for name in PPU_STATE]
+
+        scheduler = gameboy.scheduler
+        self.scheduler = (scheduler.cycles, list(scheduler.events), scheduler.order)
+
+        cartridge = gameboy.cartridge
+        self.cartridge = cartridge.snapshot() if cartridge is not None else None
+
+    def restore(self, gameboy):
+        """Put the machine back as it was. The snapshot can be restored
+        again."""
+        memory = gameboy.memory
+        memory.restore_snapshot(self.pages)
+        if self.bootloader:
+            memory.map_bootloader()
+        else:
+            memory.unmap_bootloader()
+
+        if self.cartridge is not None:
+            gameboy.cartridge.restore(self.cartridge)
+
+        locked, memory.dma_count = self.dma
+        if locked:
+            memory.cpu_port.lock(0xFF)
+        else:
+            memory.cpu_port.unlock()
+
+        cpu = gameboy.cpu
+        for name, value in zip(CPU_STATE, self.cpu):
+            setattr(cpu, name, value)
+        cpu.interrupts = dict(self.interrupts)
+        cpu.update_interrupts()
+
+        for name, value in zip(TIMER_STATE, self.timer):
+            setattr(gameboy.timer, name, value)
+        for name, value in zip(PPU_STATE, self.ppu):
+            setattr(gameboy.ppu, name, value)
+
+        scheduler = gameboy.scheduler
+        scheduler.cycles, events, scheduler.order = self.scheduler
+        scheduler.events = list(events)
@@ -0,0 +1,221 @@
+import mmap
+import os
+import tempfile
+import unittest
+from gbc_emulator import cartridge
+from gbc_emulator.battery import DIRTY_PAGE_SIZE, SaveFile, flush_ranges
+from gbc_emulator.cartridge import MBC1, MBC2, MBC3, MBC5, ROM_BANK_SIZE
+from gbc_emulator.gameboy import Gameboy
+from gbc_emulator.memory import Memory
+
+
+class NullPubSub:
+    def publish(self, topic, message):
+        pass
+
+
+def make_rom(cartridge_type, banks, ram_size=0x00, title=b'TEST'):
+    """ROM with each bank starting with its number."""
+    rom = bytearray(banks * ROM_BANK_SIZE)
+    for bank in range(banks):
+        rom[bank * ROM_BANK_SIZE] = bank & 0xFF
+        rom[bank * ROM_BANK_SIZE + 1] = bank >> 8
+    rom[0x134:0x134 + len(title)] = title
+    rom[0x147] = cartridge_type
+    rom[0x148] = (banks // 2).bit_length() - 1
+    rom[0x149] = ram_size
+    rom[0x14D] = cartridge.header_checksum(rom)
+    checksum = cartridge.global_checksum(rom)
+    rom[0x14E] = checksum >> 8
+    rom[0x14F] = checksum & 0xFF
+    return rom
+
+
+class TestCartridge(unittest.TestCase):
+    def mapped(self, rom):
+        memory = Memory(NullPubSub())
+        cart = cartridge.cartridge(rom)
+        cart.map(memory)
+        return memory, cart
+
+    def test_header(self):
+        cart = cartridge.cartridge(make_rom(0x03, 8, 0x03))
+        self.assertIsInstance(cart, MBC1)
+        self.assertEqual(cart.header.title, 'TEST')
+        self.assertEqual(cart.header.rom_size, 8 * ROM_BANK_SIZE)
+        self.assertEqual(cart.header.ram_size, 0x8000)
+        self.assertEqual(cart.ram_banks, 4)
+
+        with self.assertRaises(RuntimeError):
+            cartridge.cartridge(make_rom(0xFC, 2))
+
+    def test_rom_ram(self):
+        memory, cart = self.mapped(make_rom(0x08, 2, 0x02))
+        self.assertIs(type(cart), cartridge.Cartridge)
+
+        # Always enabled, with no bank controller to switch it
+        memory.cpu_port[0xA123] = 0x42
+        self.assertEqual(memory.cpu_port[0xA123], 0x42)
+        self.assertEqual(cart.ram[0x123], 0x42)
+
+    def test_mbc1(self):
+        rom = make_rom(0x03, 64, 0x03)
+        memory, cart = self.mapped(rom)
+        port = memory.cpu_port
+
+        self.assertEqual(port[0x4000], 1)
+        port[0x2000] = 0x05
+        self.assertEqual(port[0x4000], 5)
+        self.assertEqual(port[0x0000], 0) # Bank 0 stays put
+
+        # Bank 0 selects 1, and the high bits add on top
+        port[0x2000] = 0x00
+        self.assertEqual(port[0x4000], 1)
+        port[0x4000] = 0x01
+        self.assertEqual(port[0x4000], 0x21)
+
+        # The window is a view of the ROM, not a copy
+        self.assertIs(port.reads[0x40].obj, rom)
+
+        # ROM can not be written
+        port[0x0000] = 0xA5 # Also disables RAM
+        self.assertEqual(port[0x0000], 0)
+
+        # RAM reads 0xFF until enabled, and is banked in mode 1
+        self.assertEqual(port[0xA000], 0xFF)
+        port[0x0000] = 0x0A
+        port[0xA000] = 0x12
+        port[0x6000] = 0x01
+        self.assertEqual(port[0xA000], 0x00) # Bank 1
+        port[0xA000] = 0x34
+        port[0x4000] = 0x00
+        self.assertEqual(port[0xA000], 0x12)
+        self.assertEqual(cart.ram[0x2000], 0x34)
+
+    def test_mbc2(self):
+        memory, cart = self.mapped(make_rom(0x06, 16))
+        port = memory.cpu_port
+
+        port[0x0100] = 0x03
+        self.assertEqual(port[0x4000], 3)
+        port[0x0000] = 0x0A
+        port[0xA001] = 0xAB
+        self.assertEqual(port[0xA201], 0xFB) # Repeated, 4 bits wide
+
+    def test_mbc3(self):
+        memory, cart = self.mapped(make_rom(0x10, 128, 0x03))
+        port = memory.cpu_port
+
+        port[0x2000] = 0x7F
+        self.assertEqual(port[0x4000], 0x7F)
+        port[0x0000] = 0x0A
+        port[0x4000] = 0x08 # Seconds
+        port[0xA000] = 0x1E
+        self.assertEqual(cart.clock[0], 0x1E)
+        port[0x4000] = 0x02
+        self.assertEqual(port[0xA000], 0x00)
+
+    def test_mbc5(self):
+        memory, cart = self.mapped(make_rom(0x1B, 512, 0x04))
+        port = memory.cpu_port
+
+        port[0x2000] = 0x00
+        self.assertEqual(port[0x4000], 0) # Bank 0 can be selected
+        port[0x2000] = 0x23
+        port[0x3000] = 0x01
+        self.assertEqual((port[0x4001] << 8) | port[0x4000], 0x123)
+
+    def test_load_rom(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'test.gb')
+            cache = os.path.join(directory, 'roms.json')
+            with open(path, 'wb') as f:
+                f.write(make_rom(0x01, 8))
+
+            cart = cartridge.load_rom(path, cache)
+            self.assertTrue(cart.header.global_checksum_valid)
+            self.assertEqual(cartridge.load_metadata(cache, cart.hash)['title'], 'TEST')
+            self.assertEqual(sorted(os.listdir(directory)), ['roms.json', 'test.gb']) # No temporary left
+
+            # Taken from the cache the second time
+            cached = cartridge.load_rom(path, cache)
+            self.assertEqual(vars(cached.header), vars(cart.header))
+            self.assertIsInstance(cached, MBC1)
+
+            gameboy = Gameboy(NullPubSub())
+            gameboy.insert(cart)
+            gameboy.memory.cpu_port[0x2000] = 0x06
+            self.assertEqual(gameboy.memory.cpu_port[0x4000], 6)
+            self.assertEqual(gameboy.cpu.blocks.rom_bank(), 6)
+            self.assertFalse(gameboy.cpu.blocks.watch_rom)
+
+    def test_save_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'test.sav')
+            memory, cart = self.mapped(make_rom(0x03, 4, 0x03))
+            self.assertTrue(cart.header.battery)
+
+            save = SaveFile(path, len(cart.ram), interval=None)
+            cart.use_save(save)
+            port = memory.cpu_port
+            port[0x0000] = 0x0A
+            port[0x4000] = 0x01
+            port[0x6000] = 0x01
+            port[0xA123] = 0x42 # Bank 1
+
+            self.assertEqual(save.ram[0x2123], 0x42)
+            self.assertEqual([page for page, flag in enumerate(save.dirty) if flag], [0x21])
+            save.close()
+            self.assertFalse(any(save.dirty))
+
+            with open(path, 'rb') as f:
+                data = f.read()
+            self.assertEqual(len(data), 0x8000)
+            self.assertEqual(data[0x2123], 0x42)
+
+    def test_snapshot_pages(self):
+        with tempfile.TemporaryDirectory() as directory:
+            memory, cart = self.mapped(make_rom(0x03, 4, 0x03))
+            save = SaveFile(os.path.join(directory, 'test.sav'), len(cart.ram), interval=None)
+            cart.use_save(save)
+            port = memory.cpu_port
+            port[0x0000] = 0x0A
+            first = cart.snapshot()
+
+            # Only the page written is copied
+            port[0xA123] = 0x42
+            second = cart.snapshot()
+            changed = [page for page in range(len(first['ram'])) if first['ram'][page] is not second['ram'][page]]
+            self.assertEqual(changed, [0x01])
+            self.assertEqual(second['ram'][0x01][0x23], 0x42)
+
+            # And only the pages that differ are put back, and marked dirty
+            save.flush()
+            port[0xA300] = 0x01
+            cart.restore(first)
+            self.assertEqual([page for page, flag in enumerate(save.dirty) if flag], [0x01, 0x03])
+            self.assertEqual(port[0xA123], 0x00)
+            self.assertEqual(port[0xA300], 0x00)
+            save.close()
+
+    def test_flush_ranges(self):
+        # Runs of whole operating system pages, whatever their size
+        page = mmap.PAGESIZE
+        per_page = page // DIRTY_PAGE_SIZE
+        dirty = bytearray(8 * per_page)
+        dirty[0] = dirty[1] = dirty[per_page] = dirty[per_page + 1] = dirty[4 * per_page] = 1
+        self.assertEqual(flush_ranges(dirty, 8 * page), [(0, 2 * page), (4 * page, page)])
+
+        # Cut short at the end of the file
+        self.assertEqual(flush_ranges(dirty, 4 * page + DIRTY_PAGE_SIZE)[-1], (4 * page, DIRTY_PAGE_SIZE))
+
+    def test_load_rom_bad_header(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'test.gb')
+            rom = make_rom(0x01, 8)
+            rom[0x14D] ^= 0xFF
+            with open(path, 'wb') as f:
+                f.write(rom)
+
+            with self.assertRaises(RuntimeError):
+                cartridge.load_rom(path, None)
@@ -0,0 +1,316 @@
+import os
+import tempfile
+import unittest
+from gbc_emulator import cartridge
+from gbc_emulator.frame_skip import FrameSkip
+from gbc_emulator.gameboy import Gameboy, POST_BOOT_IO
+from gbc_emulator.idle_loops import load_speed_hacks, save_speed_hacks
+from gbc_emulator.lr35902 import LR35902
+from gbc_emulator.memory import Memory
+from gbc_emulator.ppu import PPU
+from gbc_emulator.test_cartridge import make_rom
+from gbc_emulator.timer import Timer
+
+
+class NullPubSub:
+    def publish(self, topic, message):
+        pass
+
+
+class TestGameboy(unittest.TestCase):
+    def load(self, gameboy, program, address=0):
+        for offset, value in enumerate(program):
+            gameboy.memory.cpu_port[address + offset] = value
+
+    def test_halt_fast_forward(self):
+        gameboy = Gameboy(NullPubSub())
+        self.load(gameboy, [
+            0x3E, 0x01, # LD A,0x01
+            0xE0, 0xFF, # LDH (0xFF),A ; Enable VBLANK interrupt
+            0xFB, # EI
+            0x76, # HALT
+        ])
+        self.load(gameboy, [0x76], 0x40) # HALT
+
+        while gameboy.cpu.state != LR35902.State.HALTED:
+            gameboy.run_cycles(1)
+
+        # Skips straight to VBLANK
+        expected = gameboy.cycles_until_interrupt()
+        self.assertGreater(expected, Gameboy.CYCLES_PER_SLICE)
+        self.assertEqual(gameboy.run_cycles(Gameboy.CYCLES_PER_SLICE), expected)
+        self.assertEqual(gameboy.ppu.mode, PPU.MODE_VBLANK)
+        self.assertTrue(gameboy.memory.cpu_port[Memory.REGISTER_IF] & 0x01)
+
+        # Then wakes up for the interrupt
+        gameboy.run_cycles(1)
+        self.assertEqual(gameboy.cpu.state, LR35902.State.RUNNING)
+        self.assertEqual(gameboy.cpu.PC, 0x40)
+
+    def test_halt_fast_forward_timer(self):
+        gameboy = Gameboy(NullPubSub())
+        gameboy.memory.cpu_port[Memory.REGISTER_TAC] = 0x05 # Every 4 cycles
+        gameboy.memory.cpu_port[Memory.REGISTER_TIMA] = 0xF0
+        gameboy.memory.cpu_port[Memory.REGISTER_IE] = 0x04
+        self.load(gameboy, [0x76]) # HALT
+
+        gameboy.run_cycles(1)
+        self.assertEqual(gameboy.cpu.state, LR35902.State.HALTED)
+
+        self.assertEqual(gameboy.cycles_until_interrupt(), gameboy.timer.cycles_until_overflow())
+        gameboy.run_cycles(1)
+        self.assertTrue(gameboy.memory.cpu_port[Memory.REGISTER_IF] & 0x04)
+        self.assertEqual(gameboy.memory.cpu_port[Memory.REGISTER_TIMA], 0x00) # Reset to TMA
+
+    def test_timer_synced_on_read(self):
+        gameboy = Gameboy(NullPubSub())
+        port = gameboy.memory.cpu_port
+        port[Memory.REGISTER_TAC] = 0x05 # Every 4 cycles
+        port[Memory.REGISTER_TMA] = 0xF0
+
+        while gameboy.scheduler.cycles < 2000: # NOPs
+            gameboy.run_cycles(Gameboy.CYCLES_PER_SLICE)
+        cycles = gameboy.scheduler.cycles
+        self.assertLess(gameboy.timer.synced, cycles)
+
+        ticks = cycles // 4
+        self.assertEqual(port[Memory.REGISTER_TIMA], 0xF0 + (ticks - 0x100) % 0x10)
+        self.assertEqual(port[Memory.REGISTER_DIV], cycles // Timer.DIVIDER)
+        self.assertEqual(gameboy.timer.synced, cycles)
+        self.assertTrue(port[Memory.REGISTER_IF] & 0x04)
+
+        # Writing DIV zeros it, after counting up to the write
+        port[Memory.REGISTER_DIV] = 0x12
+        self.assertEqual(port[Memory.REGISTER_DIV], 0x00)
+
+    def test_timer_audit_read(self):
+        gameboy = Gameboy(NullPubSub())
+        port = gameboy.memory.cpu_port
+        port[Memory.REGISTER_TAC] = 0x05 # Every 4 cycles
+        port[Memory.REGISTER_TMA] = 0xF0
+
+        while gameboy.scheduler.cycles < 2000: # NOPs
+            gameboy.run_cycles(Gameboy.CYCLES_PER_SLICE)
+        timer = gameboy.timer
+        state = (timer.synced, timer.divider_wait, timer.counter_wait)
+        io = bytes(gameboy.memory.io)
+
+        # Read as the CPU would read them, without syncing the timer
+        audit = gameboy.memory.audit_port
+        div = audit[Memory.REGISTER_DIV]
+        tima = audit[Memory.REGISTER_TIMA]
+        self.assertEqual((timer.synced, timer.divider_wait, timer.counter_wait), state)
+        self.assertEqual(bytes(gameboy.memory.io), io)
+        self.assertEqual(audit[Memory.REGISTER_IF], io[Memory.REGISTER_IF - Memory.REGION_IO[0]])
+
+        self.assertEqual(port[Memory.REGISTER_DIV], div)
+        self.assertEqual(port[Memory.REGISTER_TIMA], tima)
+        self.assertLess(state[0], timer.synced)
+
+    def test_idle_loop(self):
+        program = [
+            0x3E, 0x01, # LD A,0x01
+            0xE0, 0xFF, # LDH (0xFF),A ; Enable VBLANK interrupt
+            0xFB, # EI
+            0xFA, 0x00, 0xC0, # LD A,(0xC000)
+            0xA7, # AND A
+            0x28, 0xFA, # JR Z,-6
+            0x76, # HALT
+        ]
+        handler = [
+            0x3C, # INC A
+            0xEA, 0x00, 0xC0, # LD (0xC000),A
+            0xD9, # RETI
+        ]
+
+        def run(gameboy):
+            self.load(gameboy, program)
+            self.load(gameboy, handler, 0x40)
+            cycles = 0
+            longest = 0
+            while gameboy.cpu.state == LR35902.State.RUNNING:
+                ran = gameboy.run_cycles(Gameboy.CYCLES_PER_SLICE)
+                cycles += ran
+                longest = max(longest, ran)
+            return cycles, longest
+
+        gameboy = Gameboy(NullPubSub())
+        cycles, longest = run(gameboy)
+        self.assertIn((0, 0x0005), gameboy.idle_loops.confirmed)
+        self.assertGreater(longest, 1000)
+
+        # Without skipping, the loop is left within a pass of the same time
+        gameboy = Gameboy(NullPubSub())
+        gameboy.idle_loops.skip = lambda: 0
+        spun, _ = run(gameboy)
+        self.assertLess(abs(cycles - spun), Gameboy.CYCLES_PER_SLICE + 10)
+
+    def test_idle_loop_rejects_counters(self):
+        gameboy = Gameboy(NullPubSub())
+        self.load(gameboy, [
+            0x05, # DEC B
+            0x18, 0xFD, # JR -3
+        ])
+        for _ in range(10):
+            self.assertLessEqual(gameboy.run_cycles(Gameboy.CYCLES_PER_SLICE), Gameboy.CYCLES_PER_SLICE + 3)
+        self.assertIn((0, 0x0000), gameboy.idle_loops.rejected)
+
+    def test_speed_hacks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'speed_hacks.json')
+            save_speed_hacks(path, 'abc', {(0, 0x0150), (2, 0x4000)})
+            save_speed_hacks(path, 'def', {(0, 0x0200)})
+            self.assertEqual(load_speed_hacks(path, 'abc'), {(0, 0x0150), (2, 0x4000)})
+
+            gameboy = Gameboy(NullPubSub())
+            gameboy.idle_loops.use_speed_hacks('def', path)
+            self.assertIn((0, 0x0200), gameboy.idle_loops.confirmed)
+
+    def test_bootloader(self):
+        rom = make_rom(0x00, 2)
+        rom[0x104:0x134] = Memory.BOOTLOADER[0xA8:0xD8] # Logo
+        rom[0x14D] = cartridge.header_checksum(rom)
+
+        gameboy = Gameboy(NullPubSub())
+        gameboy.insert(cartridge.cartridge(rom))
+        self.assertEqual(gameboy.memory.cpu_port[0x0000], Memory.BOOTLOADER[0])
+
+        # Runs until the bootloader unmaps itself
+        cycles = 0
+        while not gameboy.memory.cpu_port[Memory.REGISTER_BOOTLOADER_DISABLED]:
+            cycles += gameboy.run_cycles(Gameboy.CYCLES_PER_SLICE)
+            self.assertLess(cycles, 5000000)
+
+        self.assertEqual(gameboy.memory.cpu_port[0x0000], 0x00)
+        self.assertEqual(gameboy.cpu.SP, 0xFFFE)
+        self.assertEqual(gameboy.memory.cpu_port[Memory.REGISTER_LCDC], POST_BOOT_IO[0x40])
+
+    def test_skip_boot(self):
+        gameboy = Gameboy(NullPubSub(), bootloader_enabled=False)
+        gameboy.insert(cartridge.cartridge(make_rom(0x00, 2)))
+        self.assertEqual(gameboy.cpu.PC, 0x0100)
+        self.assertEqual(gameboy.memory.cpu_port[0x0000], 0x00)
+        self.assertEqual(bytes(gameboy.memory.io), bytes(POST_BOOT_IO))
+
+        # The PPU is where STAT says, and leaves VBLANK for line 0
+        port = gameboy.memory.cpu_port
+        self.assertEqual(gameboy.ppu.mode, port[Memory.REGISTER_STAT] & 0x03)
+        gameboy.run_cycles(PPU.LINE_DOTS // 4)
+        self.assertEqual(gameboy.ppu.mode, PPU.MODE_OAM_SEARCH)
+        self.assertEqual(port[Memory.REGISTER_LY], 0)
+        self.assertEqual(port[Memory.REGISTER_STAT], 0x86)
+
+    def test_skip_boot_later(self):
+        gameboy = Gameboy(NullPubSub())
+        port = gameboy.memory.cpu_port
+        port[Memory.REGISTER_TAC] = 0x05
+        while gameboy.scheduler.cycles < 2000: # NOPs
+            gameboy.run_cycles(Gameboy.CYCLES_PER_SLICE)
+
+        # Time passed before the skip is not counted onto DIV
+        gameboy.skip_boot()
+        self.assertEqual(gameboy.timer.synced, gameboy.scheduler.cycles)
+        self.assertEqual(port[Memory.REGISTER_DIV], 0xAB)
+        self.assertEqual(port[Memory.REGISTER_STAT], 0x85)
+
+        # And the PPU keeps a single chain of transitions
+        transitions = [event for event in gameboy.scheduler.events if event[2] == gameboy.ppu.transition]
+        self.assertEqual(len(transitions), 1)
+
+    def test_frame_skip(self):
+        gameboy = Gameboy(NullPubSub(), bootloader_enabled=False)
+        gameboy.frame_skip.every = 3
+        while gameboy.frame_skip.frames < 7: # NOPs
+            gameboy.run_cycles(Gameboy.CYCLES_PER_SLICE)
+        self.assertEqual(gameboy.frame_skip.drawn, 3) # The first, then every third
+        self.assertFalse(gameboy.ppu.drawing)
+
+        gameboy.frame_skip.every = 0 # None
+        while gameboy.frame_skip.frames < 14:
+            gameboy.run_cycles(Gameboy.CYCLES_PER_SLICE)
+        self.assertEqual(gameboy.frame_skip.drawn, 3)
+
+        # The governor skips more when behind, and fewer with time to spare
+        frame_skip = FrameSkip(auto=True)
+        frame_skip.govern(0.5, 1.0)
+        frame_skip.govern(0.9, 1.0)
+        self.assertEqual(frame_skip.every, 3)
+        frame_skip.govern(1.0, 0.9)
+        self.assertEqual(frame_skip.every, 3)
+        frame_skip.govern(1.0, 0.5)
+        self.assertEqual(frame_skip.every, 2)
+
+    def test_dma(self):
+        gameboy = Gameboy(NullPubSub())
+        gameboy.memory.wram[0:0xA0] = bytes(range(1, 0xA1))
+        self.load(gameboy, [
+            0x31, 0xFE, 0xFF, # LD SP,0xFFFE
+            0xCD, 0x80, 0xFF, # CALL 0xFF80
+            0xFA, 0x00, 0xC0, # LD A,(0xC000)
+            0x76, # HALT
+        ])
+        self.load(gameboy, [
+            0x3E, 0xC0, # LD A,0xC0
+            0xE0, 0x46, # LDH (0x46),A ; Start DMA
+            0x3E, 0x28, # LD A,0x28
+            0x3D, # DEC A
+            0x20, 0xFD, # JR NZ,-3 ; Wait 160 cycles
+            0xC9, # RET
+        ], 0xFF80)
+
+        locked = False
+        while gameboy.cpu.state != LR35902.State.HALTED:
+            gameboy.run_cycles(Gameboy.CYCLES_PER_SLICE)
+            locked |= gameboy.memory.cpu_port[0xC000] == 0xFF
+
+        self.assertTrue(locked)
+        self.assertEqual(bytes(gameboy.memory.oam), bytes(range(1, 0xA1)))
+        self.assertEqual(gameboy.cpu.A, 0x01) # Read once the DMA is done
+
+    def test_snapshot(self):
+        gameboy = Gameboy(NullPubSub())
+        self.load(gameboy, [
+            0x21, 0x00, 0xC0, # LD HL,0xC000
+            0x34, # INC (HL)
+            0x2C, # INC L
+            0x18, 0xFC, # JR -4
+        ])
+
+        def run(cycles):
+            ran = 0
+            while ran < cycles:
+                ran += gameboy.run_cycles(Gameboy.CYCLES_PER_SLICE)
+            registers = [getattr(gameboy.cpu, register) for register in ('A', 'F', 'H', 'L', 'PC')]
+            return bytes(gameboy.memory.physical_memory), registers, gameboy.ppu.line
+
+        run(1000)
+        first = gameboy.snapshot()
+        second = gameboy.snapshot()
+        self.assertIs(second.pages[0xC0], first.pages[0xC0]) # Shared until written
+
+        after = run(5000)
+        third = gameboy.snapshot()
+        self.assertIsNot(third.pages[0xC0], first.pages[0xC0])
+        self.assertIs(third.pages[0xD0], first.pages[0xD0])
+
+        # Runs the same from a restored snapshot, as often as it is restored
+        for _ in range(2):
+            gameboy.restore(second)
+            self.assertEqual(bytes(gameboy.memory.physical_memory), b''.join(second.pages))
+            self.assertEqual(run(5000), after)
+
+    def test_snapshot_cartridge(self):
+        gameboy = Gameboy(NullPubSub(), bootloader_enabled=False)
+        gameboy.insert(cartridge.cartridge(make_rom(0x03, 8, 0x03)))
+        port = gameboy.memory.cpu_port
+        port[0x0000] = 0x0A
+        port[0x2000] = 0x03
+        port[0xA000] = 0x12
+        snapshot = gameboy.snapshot()
+
+        port[0x2000] = 0x05
+        port[0xA000] = 0x34
+        port[0x0000] = 0x00
+        gameboy.restore(snapshot)
+        self.assertEqual(port[0x4000], 3)
+        self.assertEqual(port[0xA000], 0x12)
@@ -1,10 +1,43 @@
 import unittest
-from gbc_emulator.lr35902 import LR35902
+from gbc_emulator import cartridge
+from gbc_emulator.lr35902 import LR35902, flags
+from gbc_emulator.lr35902.translator import BlockCache
+from gbc_emulator.memory import Memory
+from gbc_emulator.test_cartridge import make_rom
+
+
+class NullPubSub:
+    def publish(self, topic, message):
+        pass
+
+
+class CountingMemory(list):
+    """Memory counting reads and writes of one address."""
+    def __init__(self, address):
+        super().__init__([0] * 0x10000)
+        self.address = address
+        self.reads = 0
+        self.writes = 0
+
+    def __getitem__(self, index):
+        if index == self.address:
+            self.reads += 1
+        return super().__getitem__(index)
+
+    def __setitem__(self, index, value):
+        if index == self.address:
+            self.writes += 1
+        super().__setitem__(index, value)
 
 
 class TestLR35902(unittest.TestCase):
+    engine = LR35902.Engine.HANDLERS
+
+    def cpu(self, memory, **kwargs):
+        return LR35902(memory, engine=self.engine, **kwargs)
+
     def test_initialize(self):
-        LR35902([])
+        self.cpu([])
         self.assertEqual(1, 1)
 
     def test_clock(self):
@@ -19,7 +52,7 @@ class TestLR35902(unittest.TestCase):
         for val, i in enumerate(new_memory):
             memory[val] = i
 
-        cpu = LR35902(memory)
+        cpu = self.cpu(memory)
 
         cpu.clock()
         self.assertEqual(1, 1)
@@ -35,7 +68,7 @@ class TestLR35902(unittest.TestCase):
         for val, i in enumerate(new_memory):
             memory[val] = i
 
-        cpu = LR35902(memory)
+        cpu = self.cpu(memory)
 
         cpu.clock()
 
@@ -54,7 +87,7 @@ class TestLR35902(unittest.TestCase):
         for val, i in enumerate(new_memory):
             memory[val] = i
 
-        cpu = LR35902(memory)
+        cpu = self.cpu(memory)
 
         for _ in range(4):
             cpu.clock()
@@ -80,7 +113,7 @@ class TestLR35902(unittest.TestCase):
         for val, i in enumerate(new_memory):
             memory[val] = i
 
-        cpu = LR35902(memory)
+        cpu = self.cpu(memory)
 
         for _ in range(4):
             cpu.clock()
@@ -101,3 +134,314 @@ class TestLR35902(unittest.TestCase):
         for _ in range(2):
             cpu.clock()
         self.assertFalse(cpu.interrupts['enabled'])
+
+    def test_run_cycles(self):
+        memory = [0] * 0x10000
+        new_memory = [
+            0x06, # 2
+            0x53,
+            0x04, # 1
+            0xCB, # 2
+            0x30,
+            0x18, # 3
+            0xFE
+        ]
+
+        # Assign new memory
+        for val, i in enumerate(new_memory):
+            memory[val] = i
+
+        cpu = self.cpu(memory)
+
+        self.assertEqual(cpu.run_cycles(3), 3)
+        self.assertEqual(cpu.B, 0x54)
+
+        self.assertEqual(cpu.run_cycles(1), 2)
+        self.assertEqual(cpu.B, 0x45)
+
+        # JR -2 spins in place
+        self.assertEqual(cpu.run_cycles(8), 9)
+        self.assertEqual(cpu.PC, 0x05)
+
+    def test_run_cycles_matches_clock(self):
+        program = [
+            0x3E, 0x0F, # LD A,0x0F
+            0x06, 0x03, # LD B,0x03
+            0x80, # ADD A,B
+            0x05, # DEC B
+            0x20, 0xFC, # JR NZ,-4
+            0x76, # HALT
+        ]
+
+        clocked_memory = [0] * 0x10000
+        clocked_memory[:len(program)] = program
+        clocked = self.cpu(clocked_memory)
+
+        batched_memory = [0] * 0x10000
+        batched_memory[:len(program)] = program
+        batched = self.cpu(batched_memory)
+
+        for _ in range(40):
+            clocked.clock()
+        self.assertEqual(batched.run_cycles(40), 40)
+
+        for register in ['A', 'B', 'F', 'PC', 'SP']:
+            self.assertEqual(getattr(clocked, register), getattr(batched, register))
+        self.assertEqual(batched.state, LR35902.State.HALTED)
+
+    def test_opcode_tables(self):
+        cpu = self.cpu([0] * 0x10000)
+
+        self.assertEqual(len(cpu.handlers), 0x200)
+        self.assertEqual(cpu.instructions[0xBE].mnemonic, 'CP (HL)')
+        self.assertEqual(cpu.cb_instructions[0x7E].mnemonic, 'BIT 7,(HL)')
+        self.assertEqual(cpu.lengths[0xFA], 3)
+        self.assertEqual(cpu.durations[0x100 | 0x06], 4)
+        self.assertIsNone(cpu.instructions[0xD3])
+
+    def test_conditional_timing(self):
+        memory = [0] * 0x10000
+        memory[:4] = [
+            0xC4, 0x00, 0x10, # CALL NZ,0x1000
+            0xC0, # RET NZ
+        ]
+        memory[0x1000] = 0xC8 # RET Z
+        memory[0x1001] = 0xC9 # RET
+
+        cpu = self.cpu(memory)
+        cpu.F = 0x00
+
+        self.assertEqual(cpu.execute(), 6)
+        self.assertEqual(cpu.PC, 0x1000)
+        self.assertEqual(cpu.SP, 0xFFFC)
+        self.assertEqual(cpu.execute(), 2)
+        self.assertEqual(cpu.execute(), 4)
+        self.assertEqual(cpu.PC, 0x0003)
+        self.assertEqual(cpu.SP, 0xFFFE)
+
+    def test_invalid_opcode(self):
+        memory = [0] * 0x10000
+        memory[0] = 0xD3
+
+        cpu = self.cpu(memory)
+
+        with self.assertRaises(RuntimeError):
+            cpu.execute()
+
+    def test_block_cache_matches_interpreter(self):
+        program = [
+            0x21, 0x00, 0xC0, # LD HL,0xC000
+            0x0E, 0x00, # LD C,0x00
+            0x04, # INC B
+            0x80, # ADD A,B
+            0xCB, 0x11, # RL C
+            0x22, # LD (HL+),A
+            0x0D, # DEC C
+            0x20, 0xF8, # JR NZ,-8
+            0x18, 0xF4, # JR -12
+        ]
+
+        interpreted_memory = [0] * 0x10000
+        interpreted_memory[:len(program)] = program
+        interpreted = self.cpu(interpreted_memory)
+
+        translated_memory = [0] * 0x10000
+        translated_memory[:len(program)] = program
+        translated = LR35902(translated_memory, blocks=BlockCache(4))
+
+        cycles = 0
+        while cycles < 5000:
+            # Step the interpreter over the same instructions as each block
+            remaining = translated.execute(translated.blocks)
+            cycles += remaining
+            while remaining > 0:
+                remaining -= interpreted.execute()
+            self.assertEqual(remaining, 0)
+
+            for register in ['A', 'B', 'C', 'F', 'H', 'L', 'PC', 'SP']:
+                self.assertEqual(getattr(interpreted, register), getattr(translated, register))
+        self.assertEqual(interpreted_memory, translated_memory)
+        self.assertLessEqual(len(translated.blocks.blocks), 4)
+
+    def test_block_cache_invalidation(self):
+        memory = Memory(NullPubSub())
+        cpu = LR35902(memory.cpu_port, blocks=BlockCache(16, memory))
+
+        # INC A; JP 0xC000, running from WRAM
+        for address, value in enumerate([0x3C, 0xC3, 0x00, 0xC0]):
+            memory.cpu_port[0xC000 + address] = value
+        cpu.PC = 0xC000
+
+        cpu.run_cycles(10)
+        self.assertIn((0, 0xC000), cpu.blocks.blocks)
+
+        # Patch INC A into DEC A
+        memory.cpu_port[0xC000] = 0x3D
+        self.assertNotIn((0, 0xC000), cpu.blocks.blocks)
+
+        a = cpu.A
+        cpu.run_cycles(5)
+        self.assertEqual(cpu.A, (a - 1) & 0xFF)
+
+    def test_block_cache_ram_banks(self):
+        memory = Memory(NullPubSub())
+        cart = cartridge.cartridge(make_rom(0x03, 4, 0x03))
+        cart.map(memory)
+        cpu = LR35902(memory.cpu_port, blocks=BlockCache(16, memory))
+
+        port = memory.cpu_port
+        port[0x0000] = 0x0A # Enable RAM
+        port[0x6000] = 0x01 # Bank RAM
+        # INC A; JP 0xA000 in bank 0, and DEC A; JP 0xA000 in bank 1
+        for bank, code in enumerate([[0x3C, 0xC3, 0x00, 0xA0], [0x3D, 0xC3, 0x00, 0xA0]]):
+            port[0x4000] = bank
+            for address, value in enumerate(code):
+                port[0xA000 + address] = value
+        port[0x4000] = 0x00
+        cpu.PC = 0xA000
+
+        a = cpu.A
+        cpu.run_cycles(10)
+        self.assertEqual(cpu.A, (a + 2) & 0xFF)
+        self.assertNotIn((0, 0xA000), cpu.blocks.blocks)
+
+        # Switching banks runs the code of the new one
+        port[0x4000] = 0x01
+        cpu.run_cycles(10)
+        self.assertEqual(cpu.A, a)
+
+    def test_lazy_flags(self):
+        program = [
+            0x3E, 0x0F, # LD A,0x0F
+            0x06, 0x01, # LD B,0x01
+            0x80, # ADD A,B
+            0x90, # SUB B
+            0xF5, # PUSH AF
+            0xC1, # POP BC
+            0x97, # SUB A
+            0x30, 0x00, # JR NC,0
+            0xCE, 0xFF, # ADC A,0xFF
+            0x27, # DAA
+            0x76, # HALT
+        ]
+
+        eager_memory = [0] * 0x10000
+        eager_memory[:len(program)] = program
+        eager = LR35902(eager_memory)
+
+        lazy_memory = [0] * 0x10000
+        lazy_memory[:len(program)] = program
+        lazy = LR35902(lazy_memory, lazy_flags=True)
+
+        for _ in range(4):
+            lazy.execute()
+        self.assertIsNotNone(lazy.pending_flags)
+
+        # Reading F, as other threads do, leaves the flags pending
+        pending = lazy.pending_flags
+        self.assertEqual(lazy.F, flags.materialize(pending))
+        self.assertIs(lazy.pending_flags, pending)
+
+        lazy.execute() # PUSH AF stores back the flags it works out
+        self.assertIsNone(lazy.pending_flags)
+
+        while eager.state == LR35902.State.RUNNING:
+            eager.execute()
+        while lazy.state == LR35902.State.RUNNING:
+            lazy.execute()
+
+        for register in ['A', 'B', 'C', 'F', 'PC', 'SP']:
+            self.assertEqual(getattr(eager, register), getattr(lazy, register))
+
+        # PUSH AF picked up the flags SUB B left pending
+        self.assertEqual(lazy.C, 0x60)
+
+        lazy.F = 0x10
+        self.assertIsNone(lazy.pending_flags)
+        self.assertEqual(lazy.F, 0x10)
+
+    def test_cb_tables(self):
+        program = [
+            0xCB, 0x10, # RL B
+            0xCB, 0x11, # RL C
+            0xCB, 0x1E, # RR (HL)
+            0xCB, 0x7E, # BIT 7,(HL)
+            0xCB, 0x36, # SWAP (HL)
+        ]
+        memory = CountingMemory(0xC000)
+        memory[:len(program)] = program
+        memory[0xC000] = 0x01
+
+        cpu = self.cpu(memory)
+        cpu.B = 0x80
+        cpu.C = 0x00
+        cpu.H = 0xC0
+        cpu.L = 0x00
+        cpu.F = 0x00
+
+        cpu.execute()
+        self.assertEqual(cpu.B, 0x00)
+        self.assertEqual(cpu.F, 0x90)
+
+        cpu.execute()
+        self.assertEqual(cpu.C, 0x01) # Carry shifted in
+        self.assertEqual(cpu.F, 0x00)
+
+        # (HL) operands are read once and written once
+        memory.reads = memory.writes = 0
+        cpu.execute()
+        self.assertEqual((memory.reads, memory.writes), (1, 1))
+        self.assertEqual(memory[0xC000], 0x00)
+        self.assertEqual(cpu.F, 0x90)
+
+        memory.reads = memory.writes = 0
+        cpu.execute()
+        self.assertEqual((memory.reads, memory.writes), (1, 0))
+        self.assertEqual(cpu.F, 0xB0) # C is kept
+
+        memory[0xC000] = 0x3C
+        memory.reads = memory.writes = 0
+        cpu.execute()
+        self.assertEqual((memory.reads, memory.writes), (1, 1))
+        self.assertEqual(memory[0xC000], 0xC3)
+        self.assertEqual(cpu.F, 0x00)
+
+    def test_interrupt_pending(self):
+        memory = Memory(NullPubSub())
+        program = [
+            0x3E, 0x05, # LD A,0x05
+            0xE0, 0xFF, # LDH (0xFF),A ; Enable VBLANK and Timer
+            0xFB, # EI
+            0x00, # NOP
+            0x00, # NOP
+        ]
+        for address, value in enumerate(program):
+            memory.cpu_port[address] = value
+
+        cpu = self.cpu(memory.cpu_port)
+        for _ in range(3):
+            cpu.execute()
+        self.assertEqual(cpu.interrupt_requests, 0)
+
+        # Requested while interrupts are still disabled
+        memory.timer_port[Memory.REGISTER_IF] = 0x06
+        self.assertEqual(cpu.interrupt_requests, 0x04)
+        self.assertEqual(cpu.interrupt_pending, 0)
+
+        cpu.execute() # NOP, then EI takes effect
+        self.assertEqual(cpu.interrupt_pending, 0x04)
+
+        memory.ppu_port[Memory.REGISTER_IF] |= 0x01
+        self.assertEqual(cpu.interrupt_pending, 0x05)
+
+        # Lowest bit first
+        self.assertEqual(cpu.execute(), 5)
+        self.assertEqual(cpu.PC, 0x40)
+        self.assertEqual(memory.cpu_port[Memory.REGISTER_IF], 0x06)
+        self.assertEqual(cpu.interrupt_requests, 0x04)
+        self.assertEqual(cpu.interrupt_pending, 0)
+
+
+class TestLR35902Loop(TestLR35902):
+    """The same tests against the interpreter loop engine."""
+    engine = LR35902.Engine.LOOP
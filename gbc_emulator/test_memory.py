@@ -0,0 +1,128 @@
+import unittest
+from gbc_emulator.memory import Memory
+from gbc_emulator.scheduler import Scheduler
+
+
+class NullPubSub:
+    def publish(self, topic, message):
+        pass
+
+
+class TestMemory(unittest.TestCase):
+    def test_region_views(self):
+        memory = Memory(NullPubSub())
+        memory.cpu_port[0x8010] = 0x3C
+        memory.cpu_port[0xC000] = 0x12
+        memory.cpu_port[0xFE9F] = 0x34
+        memory.cpu_port[0xFFFE] = 0x56
+
+        # Views see writes through the ports
+        self.assertEqual(memory.vram[0x10], 0x3C)
+        self.assertEqual(memory.wram[0], 0x12)
+        self.assertEqual(memory.oam[-1], 0x34)
+        self.assertEqual(memory.hram[-1], 0x56)
+
+        self.assertEqual(len(memory.rom), 0x8000)
+        self.assertEqual(len(memory.vram), 0x2000)
+        self.assertEqual(len(memory.wram), 0x2000)
+        self.assertEqual(len(memory.oam), 0xA0)
+        self.assertEqual(len(memory.hram), 0x7F)
+
+        # And share the backing store rather than copying it
+        memory.wram[1] = 0x78
+        self.assertEqual(memory.cpu_port[0xC001], 0x78)
+        self.assertEqual(bytes(memory.view[0xC000:0xC002]), b'\x12\x78')
+
+    def test_page_tables(self):
+        memory = Memory(NullPubSub())
+
+        # Plain pages write straight to the backing store
+        self.assertIs(memory.cpu_port.writes[0xC0], memory.physical_memory)
+        with self.assertRaises(RuntimeError):
+            memory.audit_port[0xC000] = 0x01
+
+        # Only the CPU zeros DIV
+        memory.timer_port[Memory.REGISTER_DIV] = 0x12
+        self.assertEqual(memory.audit_port[Memory.REGISTER_DIV], 0x12)
+        memory.cpu_port[Memory.REGISTER_DIV] = 0x34
+        self.assertEqual(memory.audit_port[Memory.REGISTER_DIV], 0x00)
+
+        # Pages holding watched code report writes until unwatched
+        written = []
+        memory.code_written = written.append
+        memory.watch(0xC001)
+        memory.cpu_port[0xC000] = 0x01
+        memory.ppu_port[0xC001] = 0x02
+        self.assertEqual(written, [0xC001])
+        memory.unwatch(0xC001)
+        self.assertIs(memory.ppu_port.writes[0xC0], memory.physical_memory)
+        self.assertEqual(memory.audit_port[0xC001], 0x02)
+
+    def test_video_dirty(self):
+        memory = Memory(NullPubSub())
+        self.assertIs(memory.cpu_port.writes[0x80], memory.physical_memory) # Free until tracked
+
+        dirty = memory.track_video()
+        self.assertEqual(len(dirty.take_tiles()), 384) # Starts dirty
+        self.assertEqual(len(dirty.take_tilemap_rows()), 64)
+        self.assertTrue(dirty.take_oam())
+
+        memory.cpu_port[0x8035] = 0x01 # Tile 3
+        memory.cpu_port[0x9820] = 0x01 # Map 0, row 1
+        memory.cpu_port[0x9C41] = 0x01 # Map 1, row 2
+        memory.cpu_port[0xFE00] = 0x01
+        memory.cpu_port[0x8100] = 0x00 # Unchanged
+        self.assertEqual(dirty.take_tiles(), [3])
+        self.assertEqual(dirty.take_tilemap_rows(), [1, 34])
+        self.assertTrue(dirty.take_oam())
+
+        # Taken once
+        self.assertEqual(dirty.take_tiles(), [])
+        self.assertEqual(dirty.take_tilemap_rows(), [])
+        self.assertFalse(dirty.take_oam())
+        self.assertEqual(memory.vram[0x35], 0x01)
+
+        # Each region only marks its own flags
+        memory.cpu_port[0x9FFF] = 0x01 # Map 1, row 31
+        self.assertEqual(dirty.take_tilemap_rows(), [63])
+        self.assertEqual(dirty.take_tiles(), [])
+        self.assertFalse(dirty.take_oam())
+        memory.cpu_port[0xFE9F] = 0x01
+        self.assertTrue(dirty.take_oam())
+        self.assertEqual(dirty.take_tilemap_rows(), [])
+
+        # OAM DMA marks OAM too
+        memory.cpu_port[Memory.REGISTER_DMA] = 0xC0
+        self.assertTrue(dirty.take_oam())
+
+    def test_dma(self):
+        memory = Memory(NullPubSub())
+        memory.scheduler = Scheduler()
+        memory.wram[0:0xA0] = bytes(range(0xA0))
+        memory.cpu_port[0xFF80] = 0x12
+
+        memory.cpu_port[Memory.REGISTER_DMA] = 0xC0
+        self.assertEqual(bytes(memory.oam), bytes(range(0xA0)))
+
+        # Locked out of all but 0xFF00-0xFFFF until the DMA is done
+        self.assertEqual(memory.cpu_port[0xC001], 0xFF)
+        memory.cpu_port[0xC001] = 0x34
+        self.assertEqual(memory.cpu_port[0xFF80], 0x12)
+        self.assertEqual(memory.ppu_port[0xC001], 0x01)
+        memory.scheduler.advance(Memory.DMA_CYCLES - 1)
+        self.assertEqual(memory.cpu_port[0xC001], 0xFF)
+        memory.scheduler.advance(1)
+        self.assertEqual(memory.cpu_port[0xC001], 0x01)
+
+        # Watches made while locked take effect on the kept page straight
+        # away, and on the rest once unlocked
+        written = []
+        memory.code_written = written.append
+        memory.cpu_port[Memory.REGISTER_DMA] = 0xC0
+        memory.watch(0xFF81)
+        memory.watch(0xC002)
+        memory.cpu_port[0xFF81] = 0x56
+        self.assertEqual(written, [0xFF81])
+        memory.scheduler.advance(Memory.DMA_CYCLES)
+        memory.cpu_port[0xC002] = 0x78
+        self.assertEqual(written, [0xFF81, 0xC002])
@@ -0,0 +1,124 @@
+import unittest
+from gbc_emulator.memory import Memory
+from gbc_emulator.ppu import PPU
+from gbc_emulator.scheduler import Scheduler
+from gbc_emulator.tile_cache import TileCache
+
+
+class NullPubSub:
+    def publish(self, topic, message):
+        pass
+
+
+class TestPPU(unittest.TestCase):
+    def setUp(self):
+        self.memory = Memory(NullPubSub())
+        self.ppu = PPU(self.memory.ppu_port)
+
+        vram = self.memory.vram
+        vram[0x0010:0x0020] = bytes([0xF0, 0xFF] * 8) # Tile 1: 3333 2222
+        vram[0x0020:0x0030] = bytes([0xFF, 0x00] * 8) # Tile 2: 1111 1111
+        vram[0x1800] = 0x01
+        vram[0x1801] = 0x02
+
+        port = self.memory.cpu_port
+        port[Memory.REGISTER_LCDC] = 0x91 # LCD and background on, tiles at 0x8000
+        port[Memory.REGISTER_BGP] = 0xE4 # Shade is color
+        port[Memory.REGISTER_OBP0] = 0xE4
+
+    def line(self):
+        return self.ppu.frame[self.ppu.line].tolist()
+
+    def test_background(self):
+        # Drawn at the end of the active picture
+        self.ppu.advance(PPU.MODE_LENGTHS[PPU.MODE_OAM_SEARCH] + PPU.MODE_LENGTHS[PPU.MODE_ACTIVE_PICTURE])
+        self.assertEqual(self.ppu.mode, PPU.MODE_HBLANK)
+        self.assertEqual(self.line(), [3] * 4 + [2] * 4 + [1] * 8 + [0] * 144)
+
+        self.memory.cpu_port[Memory.REGISTER_SCX] = 4
+        self.memory.cpu_port[Memory.REGISTER_BGP] = 0x1B # Reversed
+        self.ppu.render_line()
+        self.assertEqual(self.line(), [1] * 4 + [2] * 8 + [3] * 148)
+
+        # A byte a pixel, only turned into RGB when asked
+        self.assertEqual(self.ppu.frame.nbytes, PPU.SCREEN_WIDTH * PPU.SCREEN_HEIGHT)
+        rgb = self.ppu.rgb()
+        self.assertEqual(rgb.shape, (PPU.SCREEN_HEIGHT, PPU.SCREEN_WIDTH, 3))
+        self.assertEqual(rgb[0, 0].tolist(), PPU.SHADES[1].tolist())
+
+        self.memory.cpu_port[Memory.REGISTER_LCDC] = 0x00
+        self.ppu.render_line()
+        self.assertEqual(self.line(), [0] * 160)
+
+    def test_window(self):
+        self.memory.cpu_port[Memory.REGISTER_LCDC] = 0xB1
+        self.memory.cpu_port[Memory.REGISTER_WX] = 7 + 100
+        self.ppu.render_line()
+        self.assertEqual(self.line()[96:120], [0] * 4 + [3] * 4 + [2] * 4 + [1] * 8 + [0] * 4)
+        self.assertEqual(self.ppu.window_line, 1)
+
+    def test_sprites(self):
+        self.memory.cpu_port[Memory.REGISTER_LCDC] = 0x93
+        self.memory.oam[0:4] = bytes([16, 8 + 12, 0x01, 0x20]) # X flipped
+        self.memory.oam[4:8] = bytes([16, 8 + 14, 0x02, 0x00]) # Under the first
+        self.memory.oam[8:12] = bytes([16, 8 + 0, 0x02, 0x80]) # Behind the background
+        self.ppu.render_line()
+        self.assertEqual(self.line()[:32], [3] * 4 + [2] * 4 + [1] * 4 + [2] * 4 + [3] * 4 + [1] * 2 + [0] * 10)
+
+        # Only ten sprites a line
+        self.memory.oam[:] = bytes([16, 8 + 100, 0x02, 0x00] * 40)
+        self.memory.oam[40:44] = bytes([16, 8 + 140, 0x02, 0x00])
+        self.ppu.render_line()
+        self.assertEqual(self.line()[140:148], [0] * 8)
+
+    def test_scheduled(self):
+        scheduler = Scheduler()
+        ppu = PPU(self.memory.ppu_port, scheduler)
+        port = self.memory.cpu_port
+        port[Memory.REGISTER_LYC] = 1
+
+        scheduler.advance(PPU.MODE_LENGTHS[PPU.MODE_OAM_SEARCH] // 4)
+        self.assertEqual(port[Memory.REGISTER_STAT] & 0x07, PPU.MODE_ACTIVE_PICTURE)
+        scheduler.advance(PPU.LINE_LENGTH // 4)
+        self.assertEqual(port[Memory.REGISTER_LY], 1)
+        self.assertEqual(port[Memory.REGISTER_STAT] & 0x07, 0x04 | PPU.MODE_ACTIVE_PICTURE)
+
+        # The CPU can not write the mode or coincidence flag
+        port[Memory.REGISTER_STAT] = 0x40
+        self.assertEqual(port[Memory.REGISTER_STAT], 0x44 | PPU.MODE_ACTIVE_PICTURE)
+
+        # A whole frame in one go, with one event outstanding at a time
+        frame = (PPU.LINE_DOTS + (PPU.VBLANK_LINE - 1) * PPU.LINE_LENGTH + PPU.MODE_LENGTHS[PPU.MODE_VBLANK]) // 4
+        scheduler.advance(frame)
+        self.assertEqual((ppu.line, ppu.mode, ppu.wait), (1, PPU.MODE_ACTIVE_PICTURE, 0))
+        self.assertEqual(len(scheduler.events), 1)
+        self.assertEqual(ppu.frame[0, :8].tolist(), [3] * 4 + [2] * 4)
+
+    def test_tall_sprites(self):
+        self.memory.cpu_port[Memory.REGISTER_LCDC] = 0x97
+        self.memory.oam[0:4] = bytes([16 - 8, 8, 0x03, 0x40]) # Tiles 2 and 3, Y flipped
+        self.ppu.render_line()
+        self.assertEqual(self.line()[:8], [1] * 8) # Row 7 of tile 2
+
+    def test_tile_cache(self):
+        cache = TileCache(self.memory)
+        cache.update()
+        self.assertEqual(cache.tiles[1, 0].tolist(), [3] * 4 + [2] * 4)
+        self.assertEqual(cache.tiles[2].tolist(), [[1] * 8] * 8)
+
+        # Only the tile written is decoded again
+        cache.tiles[2] = 0
+        self.memory.cpu_port[0x8012] = 0x00 # Tile 1, row 1
+        cache.update()
+        self.assertEqual(cache.tiles[1, 1].tolist(), [2] * 8)
+        self.assertEqual(cache.tiles[2].tolist(), [[0] * 8] * 8)
+
+        # A second cache, like the tile viewer's, has flags of its own
+        viewer = TileCache(self.memory)
+        viewer.update()
+        self.memory.cpu_port[0x8014] = 0x00 # Tile 1, row 2
+        viewer.update()
+        self.assertEqual(viewer.tiles[1, 2].tolist(), [2] * 8)
+        self.assertEqual(cache.tiles[1, 2].tolist(), [3] * 4 + [2] * 4)
+        cache.update()
+        self.assertEqual(cache.tiles[1, 2].tolist(), [2] * 8)
@@ -0,0 +1,44 @@
+"""Tiles of VRAM decoded to colors once per change, rather than once per use.
+
+Each tile is 16 bytes, two per row of 8 pixels, holding the low and high bit
+of every pixel's color. Decoding that a bit at a time for every line drawn,
+or every tile viewer frame, would repeat the same work over and over, as
+tiles change far less often than they are drawn.
+"""
+import numpy as np
+from gbc_emulator.memory import Memory
+
+# Colors of the 8 pixels of a tile row, by its two bytes as high << 8 | low
+TILE_ROWS = (
+    (((np.arange(0x10000)[:, None] >> (15 - np.arange(8))) & 0x1) << 1) |
+    ((np.arange(0x10000)[:, None] >> (7 - np.arange(8))) & 0x1)
+).astype(np.uint8)
+
+class TileCache:
+    """The 384 tiles of 0x8000-0x97FF as colors 0-3, in tiles, a
+    uint8[384, 8, 8] indexed by tile, row and column. Tiles with any of their
+    16 bytes written are decoded again by the next update(), and only
+    those."""
+    def __init__(self, memory):
+        self.tiles = np.zeros((Memory.VideoDirty.TILES, 8, 8), dtype=np.uint8)
+
+        # (tile, row, low or high byte) view of the tile data
+        ram = np.frombuffer(memory.physical_memory, dtype=np.uint8)
+        self.vram = ram[0x8000:0x9800].reshape(Memory.VideoDirty.TILES, 8, 2)
+
+        self.dirty = memory.track_video()
+
+    def update(self):
+        """Decode the tiles written since the last update."""
+        flags = self.dirty.tiles
+        if flags.find(1) < 0: # Nothing written
+            return
+
+        # Only the flags found are cleared, and before decoding, as the tile
+        # viewer's cache is updated on another thread than the CPU writing.
+        view = np.frombuffer(flags, dtype=np.uint8)
+        written = np.flatnonzero(view)
+        view[written] = 0
+
+        data = self.vram[written].astype(np.int32)
+        self.tiles[written] = TILE_ROWS[(data[..., 1] << 8) | data[..., 0]]
@@ -2,6 +2,13 @@ from gbc_emulator.memory import Memory
 from gbc_emulator.lr35902 import LR35902
 
 class Timer:
+    """DIV and TIMA, worked out from the machine cycles passed since they were
+    last synced rather than counted cycle by cycle.
+
+    With a gbc_emulator.scheduler.Scheduler, the registers are synced when the
+    CPU reads or writes 0xFF04-0xFF07, and the cycle TIMA next wraps is
+    scheduled, so the interrupt is requested on time without the timer running
+    in between."""
     DIVIDER = 64
 
     SPEEDS = [
@@ -11,28 +18,126 @@ class Timer:
         64, # 11b
     ]
 
-    def __init__(self, memory):
+    def __init__(self, memory, scheduler=None):
         self.memory = memory
+        self.scheduler = scheduler
+
+        self.divider_wait = 0
+        self.counter_wait = 0
+
+        self.synced = 0 # Scheduler cycle DIV and TIMA are up to date with
+        self.overflow_count = 0 # Bumped to drop the scheduled overflow
+
+    def sync(self):
+        """Bring DIV and TIMA up to the cycle the scheduler is at."""
+        if self.scheduler is None:
+            return
 
+        cycles = self.scheduler.cycles - self.synced
+        if cycles:
+            self.synced += cycles
+            self.advance(cycles)
+
+    def peek(self, index):
+        """Value of 0xFF04-0xFF07 as read once synced, leaving the timer and
+        memory as they are, so that other threads can look at it."""
+        value = self.memory[index]
+        tac = self.memory[Memory.REGISTER_TAC]
+        if self.scheduler is None or not tac & 0x4: # Stopped
+            return value
+
+        cycles = self.scheduler.cycles - self.synced
+        if index == Memory.REGISTER_DIV:
+            return (value + (self.divider_wait + cycles) // Timer.DIVIDER) & 0xFF
+        if index != Memory.REGISTER_TIMA:
+            return value
+
+        speed = Timer.SPEEDS[tac & 0x03]
+        tima = value + (min(self.counter_wait, speed - 1) + cycles) // speed
+        if tima > 0xFF:
+            tma = self.memory[Memory.REGISTER_TMA]
+            tima = tma + ((tima - 0x100) % (0x100 - tma))
+        return tima
+
+    def restart(self):
+        """Count on from the registers as they are now, dropping any part of
+        a tick counted before, as when they are all loaded at once."""
+        if self.scheduler is not None:
+            self.synced = self.scheduler.cycles
         self.divider_wait = 0
         self.counter_wait = 0
+        if self.scheduler is not None:
+            self.schedule_overflow()
+
+    def schedule_overflow(self):
+        """Schedule the cycle TIMA next wraps, in place of any scheduled
+        before. Called whenever the registers are written."""
+        self.overflow_count += 1
+        cycles = self.cycles_until_overflow()
+        if cycles is not None:
+            count = self.overflow_count
+            self.scheduler.schedule(cycles, lambda: self.overflowed(count))
+
+    def overflowed(self, count):
+        if count == self.overflow_count: # Not rescheduled since
+            self.sync()
+            self.schedule_overflow()
+
+    def cycles_until_divider_tick(self):
+        """Number of machine cycles until DIV next increments, or None while
+        the timer is stopped."""
+        self.sync()
+        if not self.memory[Memory.REGISTER_TAC] & 0x4: # Stopped
+            return None
+
+        return Timer.DIVIDER - self.divider_wait
+
+    def cycles_until_counter_tick(self, ticks=1):
+        """Number of machine cycles until TIMA increments for the ticks-th
+        time, or None while the timer is stopped."""
+        self.sync()
+        if not self.memory[Memory.REGISTER_TAC] & 0x4: # Stopped
+            return None
+
+        speed = Timer.SPEEDS[self.memory[Memory.REGISTER_TAC] & 0x03]
+        counter_wait = min(self.counter_wait, speed - 1)
+        return (speed - counter_wait) + (ticks - 1) * speed
+
+    def cycles_until_overflow(self):
+        """Number of machine cycles until TIMA wraps and requests the timer
+        interrupt, or None while the timer is stopped."""
+        self.sync()
+        return self.cycles_until_counter_tick(0x100 - self.memory[Memory.REGISTER_TIMA])
+
+    def advance(self, cycles):
+        """Count a number of machine cycles in one go."""
+        if not self.memory[Memory.REGISTER_TAC] & 0x4: # Stopped
+            return
+
+        # Divider
+        self.divider_wait += cycles
+        if self.divider_wait >= Timer.DIVIDER:
+            ticks, self.divider_wait = divmod(self.divider_wait, Timer.DIVIDER)
+            self.memory[Memory.REGISTER_DIV] = (self.memory[Memory.REGISTER_DIV] + ticks) & 0xFF
+
+        # Counter
+        speed = Timer.SPEEDS[self.memory[Memory.REGISTER_TAC] & 0x03]
+        if self.counter_wait >= speed:
+            # The speed was lowered since the last tick, the next cycle ticks.
+            self.counter_wait = speed - 1
+
+        self.counter_wait += cycles
+        if self.counter_wait < speed:
+            return
+
+        ticks, self.counter_wait = divmod(self.counter_wait, speed)
+        tima = self.memory[Memory.REGISTER_TIMA] + ticks
+        if tima > 0xFF:
+            # Trigger interrupt on wrap
+            self.memory[Memory.REGISTER_IF] |= (1 << LR35902.INTERRUPT_TIMER)
+
+            # Reset to modulo, then keep counting from there.
+            tma = self.memory[Memory.REGISTER_TMA]
+            tima = tma + ((tima - 0x100) % (0x100 - tma))
 
-    def clock(self):
-        if self.memory[Memory.REGISTER_TAC] & 0x4: # Running
-            self.divider_wait += 1
-            self.counter_wait += 1
-
-            # Divider counts up at a fixed 16384 Hz.
-            if self.divider_wait >= Timer.DIVIDER:
-                self.divider_wait = 0
-                self.memory[Memory.REGISTER_DIV] = (self.memory[Memory.REGISTER_DIV] + 1) & 0xFF
-
-            speed = Timer.SPEEDS[self.memory[Memory.REGISTER_TAC] & 0x03]
-            if self.counter_wait >= speed:
-                self.counter_wait = 0
-                self.memory[Memory.REGISTER_TIMA] = (self.memory[Memory.REGISTER_TIMA] + 1) & 0xFF
-                if self.memory[Memory.REGISTER_TIMA] == 0:
-                    # Trigger interrupt on wrap
-                    self.memory[Memory.REGISTER_IF] |= (1 << LR35902.INTERRUPT_TIMER)
-                    # Reset to modulo
-                    self.memory[Memory.REGISTER_TIMA] = self.memory[Memory.REGISTER_TMA]
+        self.memory[Memory.REGISTER_TIMA] = tima
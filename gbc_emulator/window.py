@@ -5,6 +5,9 @@ from statistics import mean
 from math import floor, ceil
 import pygame
 import pygame.freetype
+from gbc_emulator.memory import Memory
+from gbc_emulator.ppu import PPU
+from gbc_emulator.tile_cache import TileCache
 
 GAMEBOY_PIXELS_X, GAMEBOY_PIXELS_Y = 160, 144
 
@@ -26,40 +29,33 @@ def render_title(ctx, title, x, y, width=100):
 
 def render_tiledata(ctx, tiledata_x, tiledata_y):
     COLUMNS, ROWS = 16, 24
-    ADDR_TILE_DATA = 0x8000 # TODO: Refer to map
-
-    # TODO: Map to colors from REGISTER_BGP BG Palette Data.
-    bg_color_map = [
-        GAMEBOY_COLORS['lightest_green'], # 00b
-        GAMEBOY_COLORS['light_green'], # 01b
-        GAMEBOY_COLORS['dark_green'], # 10b
-        GAMEBOY_COLORS['darkest_green'], # 11b
-    ]
 
     tiledata_y = render_title(ctx, "Tile Data", tiledata_x, tiledata_y, width=COLUMNS * 8)
 
-    tiledata = pygame.Surface((COLUMNS * 8, ROWS * 8))
-
-    for tile in range(COLUMNS * ROWS):
-        start_addr = ADDR_TILE_DATA + (tile * 16) # 16 bytes per tile
-
-        x, y = (tile % COLUMNS) * 8, int(tile / COLUMNS) * 8 # 8x8 tiles
-
-        for row in range(8):
-            # Read row data
-            low_byte = ctx['memory'][start_addr + (row * 2)]
-            high_byte = ctx['memory'][start_addr + (row * 2) + 1]
-
-            for column in range(8):
-                tile_color = (((high_byte >> (7 - column)) & 0x1) << 1) & ((low_byte >> (7 - column)) & 0x1)
-
-                tiledata.set_at((x + column, y + row), bg_color_map[tile_color])
+    # The viewer's own cache, apart from the PPU's, as it is updated on this
+    # thread. Laid out as rows of tiles, then x first for surfarray.
+    tile_cache = ctx['tile_cache']
+    tile_cache.update()
+    tiles = tile_cache.tiles
+    pixels = tiles.reshape(ROWS, COLUMNS, 8, 8).transpose(1, 3, 0, 2).reshape(COLUMNS * 8, ROWS * 8)
 
+    # Colors in the background palette
+    shades = PPU.PALETTES[ctx['memory'][Memory.REGISTER_BGP]]
+    tiledata = pygame.surfarray.make_surface(PPU.SHADES[shades][pixels])
     ctx['screen'].blit(tiledata, (tiledata_x, tiledata_y))
 
     return tiledata_y + (ROWS * 8)
 
 
+def render_lcd(ctx, scale):
+    # surfarray wants x first
+    pixels = ctx['gameboy'].ppu.rgb().transpose(1, 0, 2)
+    lcd = pygame.transform.scale(
+        pygame.surfarray.make_surface(pixels),
+        (GAMEBOY_PIXELS_X * scale, GAMEBOY_PIXELS_Y * scale)
+    )
+    ctx['screen'].blit(lcd, (0, 0))
+
 def render_fps(ctx, fps, x, y, width=100):
     fps, rect = ctx['font'].render(fps + "fps", ctx['highlight_color'])
     ctx['screen'].blit(fps, (x + width - rect.width, y))
@@ -129,11 +125,12 @@ def render_stack(ctx, x, y, width=100, depth=9):
     else:
         center = sp
 
-    for address in range(center - lower_bound, center + upper_bound):
+    start = center - lower_bound
+    for address, value in enumerate(ctx['memory'].read(start, center + upper_bound), start):
         label, label_rect = ctx['font'].render(hexp(address), ctx['font_color'] if sp != address else ctx['highlight_color'])
         ctx['screen'].blit(label, (x + ctx['padding'], y))
 
-        val, val_rect = ctx['font'].render(hexp(ctx['memory'][address], 2), ctx['font_color'] if sp != address else ctx['highlight_color'])
+        val, val_rect = ctx['font'].render(hexp(value, 2), ctx['font_color'] if sp != address else ctx['highlight_color'])
         ctx['screen'].blit(val, (x + width - val_rect.width - ctx['padding'], y))
 
         y += max(label_rect.height, val_rect.height) + ctx['padding']
@@ -186,6 +183,7 @@ def do_window(gameboy, done, scale=4, info_width=200):
         "cpu": gameboy.cpu,
         "gameboy": gameboy,
         "memory": gameboy.memory.audit_port,
+        "tile_cache": TileCache(gameboy.memory),
         "padding": 9,
         "font_color": GAMEBOY_COLORS['light_green'],
         "highlight_color": (255, 255, 255),
@@ -215,7 +213,7 @@ def do_window(gameboy, done, scale=4, info_width=200):
             # Draw a frame
             screen.fill(ctx['bg_color'])
 
-            pygame.draw.rect(screen, GAMEBOY_COLORS['lightest_green'], [0, 0, GAMEBOY_PIXELS_X * scale, GAMEBOY_PIXELS_Y * scale])
+            render_lcd(ctx, scale)
 
             fps = str(floor(1 / mean(frame_times)))
             last_y = render_fps(ctx, fps, SCREEN_WIDTH - info_width - TILEMAP_WIDTH, 0, info_width)
@@ -1,3 +1,4 @@
 DEPS = [
+    "numpy",
     "pygame"
 ]